@@ -1,4 +1,14 @@
-from .vision import extract_game_info
-from .game_state import GameState
-
+# This package is imported by the scripts under the name "env" (from env.vision
+# import ...). Attributes are imported on first access, so importing the
+# package (or any one submodule) does not pull in vision's dependencies
 __all__ = ['extract_game_info', 'GameState']
+
+
+def __getattr__(name):
+    if name == 'extract_game_info':
+        from .vision import extract_game_info
+        return extract_game_info
+    if name == 'GameState':
+        from .game_state import GameState
+        return GameState
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
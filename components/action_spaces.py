@@ -0,0 +1,141 @@
+import gym
+import numpy as np
+
+from .roi_profile import BASE_RESOLUTION, screen_size, to_base
+
+# ========================
+# 🎮 Action parameterizations
+# ========================
+# What the policy outputs vs. what AOEEnv executes. Every mapper has a gym
+# `space`, the detection `classes` it needs perception to find, and
+# decode(action, state) -> (action_type, x1, y1, x2, y2) with coordinates at
+# BASE_RESOLUTION, the tuple _execute_action has always taken.
+#   "full"    -> MultiDiscrete([14, 2560, 1440, 2560, 1440]), one logit per pixel
+#   "grid"    -> MultiDiscrete([14, cols, rows, cols, rows]), cell centers of a coarse grid
+#   "compact" -> Discrete over valid (type, arguments) pairs only: types without
+#                arguments take one index, point types one per grid cell, the
+#                drag one per (start, end) pair of a coarser drag grid
+#   "object"  -> MultiDiscrete([14, anchors, offsets]): a point relative to the
+#                visible object of an anchor class nearest the screen center
+
+ACTION_MODES = ("full", "grid", "compact", "object")
+NUM_ACTION_TYPES = 14
+NO_ARG_ACTIONS = (0, 3, 8, 9, 10, 11, 12, 13)  # Ungarrison, queue villager, pans, rotations
+POINT_ACTIONS = (1, 2, 4, 5, 6)  # Build house / mill, clicks
+DRAG_ACTIONS = (7,)
+
+DEFAULT_GRID = (32, 18)  # (columns, rows): 80 px cells at 2560x1440
+COMPACT_GRID = (16, 9)
+COMPACT_DRAG_GRID = (6, 4)
+OBJECT_ANCHORS = ("Screen", "Villager", "TownCenter", "Sheep", "Berry", "Forest", "Gold", "Stone", "House", "Mill", "Scout")
+OBJECT_OFFSETS = (5, 5)  # (columns, rows) of offsets around the anchor
+OBJECT_OFFSET_STEP = 120  # Pixels between offsets
+OBJECT_DRAG_RADIUS = 240  # A drag selects a box this far around the point
+
+
+def _clamp(v, hi):
+    return int(min(max(v, 0), hi - 1))
+
+
+def cell_centers(cells, size):
+    # Pixel centers of `cells` equal cells over `size` pixels
+    return ((np.arange(cells) + 0.5) * size / cells).astype(np.int64)
+
+
+class FullActions:
+    classes = ()
+
+    def __init__(self):
+        w, h = BASE_RESOLUTION
+        self.space = gym.spaces.MultiDiscrete([NUM_ACTION_TYPES, w, h, w, h])
+
+    def decode(self, action, state=None):
+        return tuple(map(int, action))
+
+
+class GridActions:
+    classes = ()
+
+    def __init__(self, grid=DEFAULT_GRID):
+        cols, rows = grid
+        self.grid = (cols, rows)
+        self.space = gym.spaces.MultiDiscrete([NUM_ACTION_TYPES, cols, rows, cols, rows])
+        self._xs = cell_centers(cols, BASE_RESOLUTION[0])
+        self._ys = cell_centers(rows, BASE_RESOLUTION[1])
+
+    def decode(self, action, state=None):
+        action_type, c1, r1, c2, r2 = map(int, action)
+        return action_type, int(self._xs[c1]), int(self._ys[r1]), int(self._xs[c2]), int(self._ys[r2])
+
+
+class CompactActions:
+    classes = ()
+
+    def __init__(self, grid=COMPACT_GRID, drag_grid=COMPACT_DRAG_GRID):
+        # Every valid action decoded once into a (n, 5) table
+        xs, ys = cell_centers(grid[0], BASE_RESOLUTION[0]), cell_centers(grid[1], BASE_RESOLUTION[1])
+        px, py = (a.ravel() for a in np.meshgrid(xs, ys))
+        dxs, dys = cell_centers(drag_grid[0], BASE_RESOLUTION[0]), cell_centers(drag_grid[1], BASE_RESOLUTION[1])
+        dx, dy = (a.ravel() for a in np.meshgrid(dxs, dys))
+        start, end = (a.ravel() for a in np.meshgrid(np.arange(len(dx)), np.arange(len(dx)), indexing="ij"))
+
+        parts = [np.array([[t, 0, 0, 0, 0] for t in NO_ARG_ACTIONS], dtype=np.int64)]
+        for t in POINT_ACTIONS:
+            parts.append(np.stack([np.full_like(px, t), px, py, px, py], axis=1))
+        for t in DRAG_ACTIONS:
+            parts.append(np.stack([np.full_like(start, t), dx[start], dy[start], dx[end], dy[end]], axis=1))
+        self.table = np.concatenate(parts)
+        self.grid = tuple(grid)
+        self.drag_grid = tuple(drag_grid)
+        self.space = gym.spaces.Discrete(len(self.table))
+
+    def decode(self, action, state=None):
+        return tuple(int(v) for v in self.table[int(np.asarray(action).ravel()[0])])
+
+
+class ObjectActions:
+    def __init__(self, anchors=OBJECT_ANCHORS, offsets=OBJECT_OFFSETS, step=OBJECT_OFFSET_STEP,
+                 drag_radius=OBJECT_DRAG_RADIUS):
+        self.anchors = tuple(anchors)
+        cols, rows = offsets
+        ox, oy = np.meshgrid((np.arange(cols) - (cols - 1) / 2) * step, (np.arange(rows) - (rows - 1) / 2) * step)
+        self.offsets = np.stack([ox.ravel(), oy.ravel()], axis=1).astype(np.int64)
+        self.drag_radius = drag_radius
+        self.space = gym.spaces.MultiDiscrete([NUM_ACTION_TYPES, len(self.anchors), len(self.offsets)])
+
+    @property
+    def classes(self):
+        # Every anchor except the screen center has to be detected
+        return tuple(a for a in self.anchors if a != "Screen")
+
+    def anchor_point(self, anchor, state):
+        # Base coordinates of the anchor; the screen center when the class isn't visible
+        w, h = screen_size()
+        obj = state.nearest(anchor, w / 2, h / 2) if state is not None and anchor != "Screen" else None
+        if obj is None:
+            return BASE_RESOLUTION[0] // 2, BASE_RESOLUTION[1] // 2
+        x1, y1, x2, y2 = obj["box"]
+        return to_base((x1 + x2) / 2, (y1 + y2) / 2)
+
+    def decode(self, action, state=None):
+        action_type, anchor, offset = map(int, action)
+        ax, ay = self.anchor_point(self.anchors[anchor], state)
+        x, y = ax + self.offsets[offset][0], ay + self.offsets[offset][1]
+        w, h = BASE_RESOLUTION
+        if action_type in DRAG_ACTIONS:
+            r = self.drag_radius
+            return action_type, _clamp(x - r, w), _clamp(y - r, h), _clamp(x + r, w), _clamp(y + r, h)
+        return action_type, _clamp(x, w), _clamp(y, h), _clamp(x, w), _clamp(y, h)
+
+
+def make_action_mapper(mode="full", grid=None):
+    # grid: (columns, rows) for "grid" / "compact"; offsets for "object"
+    if mode == "full":
+        return FullActions()
+    if mode == "grid":
+        return GridActions(grid or DEFAULT_GRID)
+    if mode == "compact":
+        return CompactActions(grid or COMPACT_GRID)
+    if mode == "object":
+        return ObjectActions(offsets=grid or OBJECT_OFFSETS)
+    raise ValueError(f"Unknown action mode: {mode}")
@@ -1,5 +1,44 @@
-import pyautogui
-import time
+from .input_backend import PyAutoGuiBackend, get_timing_profile
+from .profiling import profiler
+from .roi_profile import screen_size
+
+# ========================
+# ⚙️ Input configuration
+# ========================
+
+_backend = None
+PROFILE = get_timing_profile("human")
+VERBOSE = True  # Log every action; turn off for training
+_chain_targets = []  # Screen points clicked by the chains executed since the last take_chain_targets()
+
+def get_backend():
+    global _backend
+    if _backend is None:
+        _backend = PyAutoGuiBackend()
+        _backend.apply_profile(PROFILE)
+    return _backend
+
+def set_backend(backend):
+    global _backend
+    _backend = backend
+    backend.apply_profile(PROFILE)
+
+def set_timing_profile(profile):
+    global PROFILE
+    PROFILE = get_timing_profile(profile)
+    if _backend is not None:
+        _backend.apply_profile(PROFILE)
+
+def take_chain_targets():
+    # Points the ActionChains executed since the last call clicked on (e.g.
+    # the unit a macro selected); settle detection watches those areas
+    global _chain_targets
+    targets, _chain_targets = _chain_targets, []
+    return targets
+
+def _log(message):
+    if VERBOSE:
+        print(message)
 
 # ========================
 # 🧠 Utility functions
@@ -9,10 +48,11 @@ def get_box_center(box):
     x1, y1, x2, y2 = box
     return (int((x1 + x2) / 2), int((y1 + y2) / 2))
 
-def move_and_click(x, y, clicks=1, interval=0.2, button='left'):
-    pyautogui.moveTo(x, y, duration=0.1)
-    pyautogui.click(clicks=clicks, interval=interval, button=button)
-    print(f"🖱️ {button.capitalize()} click ({clicks}x) at ({x}, {y})")
+def move_and_click(x, y, clicks=1, interval=None, button='left'):
+    backend = get_backend()
+    backend.move_to(x, y, duration=PROFILE.move_duration)
+    backend.click(clicks=clicks, interval=PROFILE.click_interval if interval is None else interval, button=button)
+    _log(f"🖱️ {button.capitalize()} click ({clicks}x) at ({x}, {y})")
 
 # ========================
 # 🎯 Micro Actions
@@ -27,8 +67,10 @@ def double_click(x, y):
 def right_click(x, y):
     move_and_click(x, y, button='right')
 
-def drag_from_to(start, end, duration=0.5, screen_w=2560, screen_h=1440, margin=50):
+def drag_from_to(start, end, duration=None, screen_w=None, screen_h=None, margin=50):
     # Clamp start and end points inside safe screen margins
+    if screen_w is None or screen_h is None:
+        screen_w, screen_h = screen_size()
     sx, sy = start
     ex, ey = end
 
@@ -37,43 +79,49 @@ def drag_from_to(start, end, duration=0.5, screen_w=2560, screen_h=1440, margin=
     ex = max(margin, min(screen_w - margin, ex))
     ey = max(margin, min(screen_h - margin, ey))
 
-    pyautogui.moveTo(sx, sy)
-    pyautogui.dragTo(ex, ey, duration=duration, button='left')
-    print(f"📦 Safe Drag from ({sx}, {sy}) to ({ex}, {ey})")
+    backend = get_backend()
+    backend.move_to(sx, sy)
+    backend.drag_to(ex, ey, duration=PROFILE.drag_duration if duration is None else duration, button='left')
+    _log(f"📦 Safe Drag from ({sx}, {sy}) to ({ex}, {ey})")
 
 def pan(direction, duration=0.01):
     keys = {"up": "up", "down": "down", "left": "left", "right": "right"}
     key = keys.get(direction)
     if key:
-        pyautogui.keyDown(key)
-        time.sleep(duration)
-        pyautogui.keyUp(key)
-        print(f"🕹️ Panned {direction}")
-
-def pan_by_mouse_edge(direction, screen_width=2560, screen_height=1440, duration=0.01):
+        backend = get_backend()
+        backend.key_down(key)
+        backend.sleep(duration)
+        backend.key_up(key)
+        _log(f"🕹️ Panned {direction}")
+
+def pan_by_mouse_edge(direction, screen_width=None, screen_height=None, duration=None):
+    if screen_width is None or screen_height is None:
+        screen_width, screen_height = screen_size()
     edges = {
         "left": (1, screen_height // 2),
         "right": (screen_width - 1, screen_height // 2),
         "up": (screen_width // 2, 1),
         "down": (screen_width // 2, screen_height - 1),
     }
+    backend = get_backend()
     if direction in edges:
         x, y = edges[direction]
-        pyautogui.moveTo(x, y, duration=0.1)
-        time.sleep(duration)
-        print(f"🕹️ Panned to {direction} edge")
-    pyautogui.moveTo(screen_width // 2, screen_height // 2, duration=0.1)
+        backend.move_to(x, y, duration=PROFILE.move_duration)
+        backend.sleep(PROFILE.pan_hold if duration is None else duration)
+        _log(f"🕹️ Panned to {direction} edge")
+    backend.move_to(screen_width // 2, screen_height // 2, duration=PROFILE.move_duration)
 
 def rotate_camera(direction, drag_distance=27):
-    x, y = pyautogui.position()
-    pyautogui.keyDown('altleft')
-    time.sleep(0.05)
+    backend = get_backend()
+    x, y = backend.position()
+    backend.key_down('altleft')
+    backend.sleep(PROFILE.key_hold)
     if direction == "left":
-        pyautogui.moveTo(x + drag_distance, y, duration=0.3)
+        backend.move_to(x + drag_distance, y, duration=PROFILE.rotate_duration)
     elif direction == "right":
-        pyautogui.moveTo(x - drag_distance, y, duration=0.3)
-    pyautogui.keyUp('altleft')
-    print(f"🌀 Rotated camera {direction}")
+        backend.move_to(x - drag_distance, y, duration=PROFILE.rotate_duration)
+    backend.key_up('altleft')
+    _log(f"🌀 Rotated camera {direction}")
 
 # ========================
 # 🔗 ActionChain
@@ -82,7 +130,7 @@ class ActionChain:
     def __init__(self):
         self.steps = []
 
-    def add_move_click(self, x, y, clicks=1, interval=0.2, button='left'):
+    def add_move_click(self, x, y, clicks=1, interval=None, button='left'):
         self.steps.append(('move_click', (x, y, clicks, interval, button)))
 
     def add_keypress(self, key):
@@ -91,15 +139,21 @@ class ActionChain:
     def add_sleep(self, seconds):
         self.steps.append(('sleep', seconds))
 
-    def execute(self):
+    def execute(self, executor=None):
+        # With an ActionExecutor the chain is queued and a Future returned
+        if executor is not None:
+            return executor.submit(self.execute)
+        _chain_targets.extend((params[0], params[1]) for action, params in self.steps if action == 'move_click')
+        backend = get_backend()
         for action, params in self.steps:
-            match action:
-                case 'move_click':
-                    x, y, clicks, interval, button = params
-                    move_and_click(x, y, clicks, interval, button)
-                case 'keypress':
-                    pyautogui.press(params)
-                    print(f"⌨️ Pressed key: {params}")
-                case 'sleep':
-                    time.sleep(params)
-                    print(f"⏳ Slept {params}s")
+            with profiler.span("action", action):
+                match action:
+                    case 'move_click':
+                        x, y, clicks, interval, button = params
+                        move_and_click(x, y, clicks, interval, button)
+                    case 'keypress':
+                        backend.press(params)
+                        _log(f"⌨️ Pressed key: {params}")
+                    case 'sleep':
+                        backend.sleep(params)
+                        _log(f"⏳ Slept {params}s")
@@ -1,24 +1,52 @@
 import gym
-import numpy as np
 import time
-import cv2
 
-from env.vision import capture_game_window, extract_game_info
-from env import actions
-from env import macro_actions
+from env.action_spaces import make_action_mapper
+from env.backends import LiveGameBackend, VISIBLE_UNIT_CLASSES
+from env.debug_renderer import DEBUG_FPS, DebugRenderer
+from env.game_state import GameState
+from env.observations import ObservationBuilder
+from env.profiling import profiler
+from env.vision import is_headless
 
 SCREEN_W, SCREEN_H = 2560, 1440
 NO_PROGRESS_THRESHOLD = 30  # Steps with no meaningful resource growth
-
-cv2.namedWindow("AOE4 RL Agent", cv2.WINDOW_NORMAL)
+MAX_PERCEPTION_AGE = 1.0  # Seconds an observation's detections may be reused to act on
+RENDER_WINDOW = "AOE4 RL Agent"
 
 class AOEEnv(gym.Env):
-    def __init__(self):
+    def __init__(self, backend=None, frame_source=None, max_perception_age=MAX_PERCEPTION_AGE, render=True,
+                 obs_mode="image", obs_size=(1280, 720), grayscale=False, frame_stack=1,
+                 obs_minimap=False, action_mode="full", action_grid=None, render_fps=DEBUG_FPS, render_video=None,
+                 tracker=None):
+        # backend=None plays the live game through frame_source (or the
+        # default game window); render=False never opens a debug window.
+        # render_video also (or, headless, only) writes the debug view to a file.
+        # tracker: an ObjectTracker, giving objects stable IDs so the macros
+        # keep using the same villager / Town Center
+        self.backend = backend if backend is not None else LiveGameBackend(frame_source)
+        self.observations = ObservationBuilder(obs_mode, obs_size, grayscale, frame_stack, minimap=obs_minimap)
+        # action_mode picks a smaller parameterization (see action_spaces.py);
+        # every mode decodes back to the 5-tuple below
+        self.action_mapper = make_action_mapper(action_mode, action_grid)
+        if hasattr(self.backend, "request"):
+            # The structured observation reads more of the HUD and more classes;
+            # object-relative actions need their anchor classes detected
+            classes = list(dict.fromkeys(list(self.observations.classes) + list(self.action_mapper.classes)))
+            self.backend.request(resources=self.observations.resource_keys, classes=classes, minimap=obs_minimap)
+        self.max_perception_age = max_perception_age
+        self.render_enabled = render
+        self.renderer = None
+        if (render and not is_headless()) or render_video:
+            self.renderer = DebugRenderer(RENDER_WINDOW, max_fps=render_fps, video_path=render_video,
+                                          show=render and not is_headless())
+
         # 🔥 Updated Action Space:
         # First value: Action type (macro or primitive)
         # Others: x1, y1, x2, y2 (used when needed)
-        self.action_space = gym.spaces.MultiDiscrete([14, SCREEN_W, SCREEN_H, SCREEN_W, SCREEN_H])
-        self.observation_space = gym.spaces.Box(low=0, high=255, shape=(720, 1280, 3), dtype=np.uint8)
+        self.action_space = self.action_mapper.space
+        self.last_action = None
+        self.observation_space = self.observations.observation_space
 
         self.last_food = 0
         self.last_wood = 0
@@ -31,9 +59,27 @@ class AOEEnv(gym.Env):
         self.latest_full_frame = None
         self.last_visible_units = 0
 
+        # Perception result of the latest observation, reused by the next action
+        self.last_info = None
+        self.last_info_time = 0.0
+        self.state = GameState(tracker=tracker)
+        self.perception_passes = 0
+        self.perception_reuses = 0
+        self.steps_per_sec = 0.0
+
+    def _perceive(self):
+        frame, info = self.backend.observe()
+        self.state.update(info)
+        self.perception_passes += 1
+        self.last_info = info
+        self.last_info_time = time.time()
+        return frame, info
+
     def reset(self):
-        frame, _ = capture_game_window()
-        info = extract_game_info(frame=frame)
+        self.backend.reset()
+        if self.state.tracker is not None:
+            self.state.tracker.reset()
+        frame, info = self._perceive()
 
         self.latest_full_frame = frame
         self.last_food = info.get("resources", {}).get("food", 0)
@@ -46,26 +92,41 @@ class AOEEnv(gym.Env):
         self.total_reward = 0
 
         print("\n🔄 Resetting environment")
-        return cv2.resize(frame, (1280, 720))
+        return self.observations.reset(frame, self.state)
 
     def step(self, action):
-        self._execute_action(action)
-        time.sleep(0.5)
-
-        frame, _ = capture_game_window()
-        info = extract_game_info(frame=frame)
+        step_start = time.time()
+        with profiler.span("env.action"):
+            reused = self._execute_action(action)
+        with profiler.span("env.settle"):
+            settle_time = self.backend.settle(self.last_action)
+
+        with profiler.span("env.perceive"):
+            frame, info = self._perceive()
         self.latest_full_frame = frame
-        resized = cv2.resize(frame, (1280, 720))
+        with profiler.span("env.observation"):
+            obs = self.observations.build(frame, self.state)
 
-        reward = self._calculate_reward(info)
+        with profiler.span("reward"):
+            reward = self._calculate_reward(info)
         done = self.no_progress_steps >= NO_PROGRESS_THRESHOLD
 
-        self._render_action(action, reward, self.no_progress_steps)
+        self._render_action(self.last_action, reward, self.no_progress_steps)
 
         if done:
             print(f"⚠️ No meaningful progress for {NO_PROGRESS_THRESHOLD} steps. Ending episode. Total reward: {self.total_reward}")
 
-        return resized, reward, done, {}
+        step_time = time.time() - step_start
+        profiler.record("env.step", step_time)
+        self.steps_per_sec = 0.9 * self.steps_per_sec + 0.1 / step_time if self.steps_per_sec else 1 / step_time
+        return obs, reward, done, {
+            "step_time": step_time,
+            "steps_per_sec": self.steps_per_sec,
+            "perception_reused": reused,
+            "settle_time": settle_time,
+            "obs_bytes": self.observations.nbytes,
+            "obs_time": self.observations.last_build_time,
+        }
 
     def _calculate_reward(self, info):
         # Extract resource values from the info dictionary
@@ -75,8 +136,7 @@ class AOEEnv(gym.Env):
         stone = info.get("resources", {}).get("stone", 0)
         idle = info.get("resources", {}).get("idle_villagers", 0)
         population = info.get("resources", {}).get("current_population", 0)
-        detections = info.get("detections", [])
-        visible_units = len([d for d in detections if d["class"] in ["Villager", "Scout", "TownCenter", "Sheep"]])
+        visible_units = self.state.count(VISIBLE_UNIT_CLASSES)
 
         # Reward based on resource changes
         reward = 0
@@ -111,51 +171,33 @@ class AOEEnv(gym.Env):
         return reward
 
     def _execute_action(self, action):
-        action_type, x1, y1, x2, y2 = map(int, action)
-
-        frame, _ = capture_game_window()
-        info = extract_game_info(frame=frame)
-        detections = info.get("detections", [])
-
-        # 📜 Macro actions (first 4)
-        if action_type == 0:
-            macro_actions.ungarrison_town_center(detections)
-        elif action_type == 1:
-            macro_actions.build_house(detections, target_x=x1, target_y=y1)
-        elif action_type == 2:
-            macro_actions.build_mill(detections, target_x=x1, target_y=y1)
-        elif action_type == 3:
-            macro_actions.queue_villager(detections)
-
-        # 🎯 Primitive actions (the rest)
+        # Act on the detections of the observation the policy just saw,
+        # unless they are too old to trust
+        reused = self.last_info is not None and time.time() - self.last_info_time <= self.max_perception_age
+        if reused:
+            self.perception_reuses += 1
         else:
-            match action_type:
-                case 4: actions.left_click(x1, y1)
-                case 5: actions.double_click(x1, y1)
-                case 6: actions.right_click(x1, y1)
-                case 7: actions.drag_from_to((x1, y1), (x2, y2))
-                case 8: actions.pan_by_mouse_edge("up")
-                case 9: actions.pan_by_mouse_edge("down")
-                case 10: actions.pan_by_mouse_edge("left")
-                case 11: actions.pan_by_mouse_edge("right")
-                case 12: actions.rotate_camera("left")
-                case 13: actions.rotate_camera("right")
-                case _: print("❓ Unknown action")
+            self._perceive()
+
+        # Object-relative actions resolve against those same detections
+        action_type, x1, y1, x2, y2 = self.last_action = self.action_mapper.decode(action, self.state)
+        self.backend.execute(action_type, x1, y1, x2, y2, self.state)
+
+        return reused
 
     def _render_action(self, action, reward, no_progress):
-        if self.latest_full_frame is None:
+        # Drawn on the renderer's own copy, on its thread; the observation frame is untouched
+        if self.renderer is None or self.latest_full_frame is None:
             return
-
-        img = self.latest_full_frame.copy()
-        cv2.putText(img, f"Action: {action}", (10, 30),
-                    cv2.FONT_HERSHEY_SIMPLEX, 1, (255, 255, 255), 2)
-        cv2.putText(img, f"Reward: {reward:.2f}", (10, 70),
-                    cv2.FONT_HERSHEY_SIMPLEX, 1, (0, 255, 0), 2)
+        text = [(f"Action: {action}", (255, 255, 255)), (f"Reward: {reward:.2f}", (0, 255, 0))]
         if no_progress:
-            cv2.putText(img, "⚠️ No progress!", (10, 110),
-                        cv2.FONT_HERSHEY_SIMPLEX, 1, (0, 0, 255), 2)
+            text.append(("No progress!", (0, 0, 255)))
+        self.renderer.submit(self.latest_full_frame, text=text)
+
+    def profile_summary(self):
+        return profiler.summary()
 
-        display = cv2.resize(img, (960, 540))
-        cv2.moveWindow("AOE4 RL Agent", -1500, 500)
-        cv2.imshow("AOE4 RL Agent", display)
-        cv2.waitKey(1)
+    def close(self):
+        self.backend.close()
+        if self.renderer is not None:
+            self.renderer.close()
@@ -0,0 +1,185 @@
+import time
+
+from .vision import capture_game_window, extract_game_info, get_frame_source, hud_regions_for_size
+from .roi_profile import from_base, merge_rects
+from .settle import SettleDetector, point_rects
+
+# ========================
+# 🎮 Game backends
+# ========================
+# AOEEnv talks to the game only through a backend:
+#   reset()    -> start a new episode (a no-op for the live game)
+#   observe()  -> (frame, info) with info shaped like extract_game_info()
+#   execute()  -> play one decoded action against the detections it was chosen on
+#   settle()   -> wait until the game has reacted to the action; returns seconds waited
+# Backends without a live game never import pyautogui, so they can run in
+# headless worker processes. simulation.SimulatedGameBackend follows the same
+# protocol.
+# execute() plays the whole action before returning. The env's next step needs
+# the frame the action produces, so there is nothing to overlap with queued
+# input here; input_backend.ActionExecutor is for callers that do have
+# independent work (ActionChain.execute(executor)).
+
+# Only what the reward and the macros read is ever computed
+REWARD_RESOURCES = ("food", "wood", "gold", "stone", "idle_villagers", "current_population")
+VISIBLE_UNIT_CLASSES = ["Villager", "Scout", "TownCenter", "Sheep"]  # Macros only need TownCenter / Villager
+
+ACTION_SETTLE_TIME = 0.5  # Fixed wait of settle_mode="fixed"
+SETTLE_TIMEOUT = 1.0  # Longest adaptive wait
+
+
+class PerceptionBackend:
+    # What every frame-source backend shares: perceiving frames. Actions are
+    # dropped and nothing is waited for; LiveGameBackend plays them.
+    live = False
+
+    def __init__(self, frame_source=None):
+        self.frame_source = frame_source
+        self._settled = None  # Full frame captured after settling, reused by observe()
+        self._frame_shape = None
+        self.resources = REWARD_RESOURCES
+        self.classes = VISIBLE_UNIT_CLASSES
+        self.minimap = False
+
+    def request(self, resources=(), classes=(), minimap=False):
+        # Widen what observe() computes beyond what the reward needs
+        self.resources = tuple(dict.fromkeys(self.resources + tuple(resources)))
+        self.classes = list(dict.fromkeys(self.classes + list(classes)))
+        self.minimap = self.minimap or minimap
+
+    def reset(self):
+        pass
+
+    def observe(self):
+        if self._settled is not None:
+            frame, self._settled = self._settled, None
+        else:
+            frame, _ = capture_game_window(source=self.frame_source)
+        if frame is None:
+            return None, {}
+        self._frame_shape = frame.shape[:2]
+        info = extract_game_info(frame=frame, lazy=True, resources=self.resources, classes=self.classes,
+                                 minimap=self.minimap)
+        return frame, info
+
+    def execute(self, action_type, x1, y1, x2, y2, detections):
+        pass
+
+    def settle(self, action=None):
+        return 0.0
+
+    def close(self):
+        if self.frame_source is not None:
+            self.frame_source.close()
+
+
+class LiveGameBackend(PerceptionBackend):
+    live = True
+
+    def __init__(self, frame_source=None, settle_time=ACTION_SETTLE_TIME, timing_profile=None,
+                 verbose=True, settle_mode="adaptive", settle_timeout=SETTLE_TIMEOUT):
+        # Imported here: pyautogui needs a display
+        from . import actions, macro_actions
+
+        super().__init__(frame_source)
+        self.actions = actions
+        self.macro_actions = macro_actions
+        self.settle_time = settle_time
+        self.settle_mode = settle_mode
+        self.settle_detector = SettleDetector(timeout=settle_timeout)
+        self._targets = []  # Screen points the last action clicked, watched while settling
+        self._poll_canvas = None
+        # Units the macros last used, passed back so they keep working with the
+        # same ones; resolved only when the env's GameState tracks objects
+        self.villager_id = None
+        self.town_center_id = None
+        actions.VERBOSE = verbose
+        if timing_profile is not None:
+            actions.set_timing_profile(timing_profile)
+
+    def execute(self, action_type, x1, y1, x2, y2, detections):
+        actions = self.actions
+        macro_actions = self.macro_actions
+        # Action coordinates are given at 2560x1440 whatever the real window size
+        x1, y1 = from_base(x1, y1)
+        x2, y2 = from_base(x2, y2)
+        actions.take_chain_targets()
+
+        # 📜 Macro actions (first 4)
+        if action_type == 0:
+            self.town_center_id = macro_actions.ungarrison_town_center(detections, self.town_center_id)
+        elif action_type == 1:
+            self.villager_id = macro_actions.build_house(detections, target_x=x1, target_y=y1, villager_id=self.villager_id)
+        elif action_type == 2:
+            self.villager_id = macro_actions.build_mill(detections, target_x=x1, target_y=y1, villager_id=self.villager_id)
+        elif action_type == 3:
+            self.town_center_id = macro_actions.queue_villager(detections, self.town_center_id)
+
+        # 🎯 Primitive actions (the rest)
+        else:
+            match action_type:
+                case 4: actions.left_click(x1, y1)
+                case 5: actions.double_click(x1, y1)
+                case 6: actions.right_click(x1, y1)
+                case 7: actions.drag_from_to((x1, y1), (x2, y2))
+                case 8: actions.pan_by_mouse_edge("up")
+                case 9: actions.pan_by_mouse_edge("down")
+                case 10: actions.pan_by_mouse_edge("left")
+                case 11: actions.pan_by_mouse_edge("right")
+                case 12: actions.rotate_camera("left")
+                case 13: actions.rotate_camera("right")
+                case _: print("❓ Unknown action")
+
+        # What settle() watches: the points the macro's chain clicked (its
+        # target unit / placement), the clicked point(s), nothing for pans
+        if action_type <= 3:
+            self._targets = actions.take_chain_targets()
+        elif action_type <= 6:
+            self._targets = [(x1, y1)]
+        elif action_type == 7:
+            self._targets = [(x1, y1), (x2, y2)]
+        else:
+            self._targets = []
+
+    def settle(self, action=None):
+        if self.settle_mode == "fixed" or action is None or self._frame_shape is None:
+            time.sleep(self.settle_time)
+            return self.settle_time
+
+        # Watch the HUD counters and the area around what the action clicked;
+        # pans and rotations move the whole view, so the screen center will do
+        h, w = self._frame_shape
+        points = self._targets or [(w // 2, h // 2)]
+        rects = [region for _, region, _ in hud_regions_for_size(w, h)] + point_rects(points, w, h)
+        source = self.frame_source if self.frame_source is not None else get_frame_source()
+        if hasattr(source, "read_regions"):
+            # Polls grab only the watched rectangles; one full capture at the end
+            grabs = merge_rects(rects, gap=32)
+            _, _, waited = self.settle_detector.wait(lambda: self._poll_regions(source, grabs), rects)
+            self._settled, _ = capture_game_window(source=source)
+        else:
+            self._settled, _, waited = self.settle_detector.wait(lambda: capture_game_window(source=source), rects)
+        return waited
+
+    def _poll_regions(self, source, rects):
+        self._poll_canvas, region = source.read_regions(rects, self._poll_canvas)
+        return self._poll_canvas, region
+
+
+class ReplayBackend(PerceptionBackend):
+    # Perceives recorded frames (a replay FrameSource) and drops every action.
+    # Useful to exercise perception, rewards and training throughput offline.
+
+    def __init__(self, frame_source, skip=0):
+        super().__init__(frame_source)
+        # Lets parallel workers start at different points of the same recording
+        for _ in range(skip):
+            self.frame_source.read()
+
+    def observe(self):
+        frame, info = super().observe()
+        if frame is None and hasattr(self.frame_source, "position"):
+            # Recording exhausted: start over
+            self.frame_source.position = 0
+            frame, info = super().observe()
+        return frame, info
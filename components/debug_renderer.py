@@ -0,0 +1,154 @@
+import threading
+import time
+
+import cv2
+
+from .roi_profile import HUD_NAMES, get_roi_profile
+
+# ========================
+# 🖥️ Debug renderer
+# ========================
+# Draws debug overlays (detection boxes, HUD regions, status text) on a
+# worker thread, away from perception and training. submit() is the only
+# call on the hot path. It drops the frame when the last accepted one is
+# less than 1 / max_fps old. Otherwise it takes the renderer's own copy,
+# already downscaled to the display size, so the caller's frame is never
+# drawn on. The thread only ever renders the newest submitted frame. It
+# shows it in a window and/or appends it to a video file. A renderer with
+# neither costs nothing; callers that never create one pay nothing either.
+
+DEBUG_FPS = 10
+DISPLAY_SIZE = (960, 540)
+WINDOW_POSITION = (-1500, 500)
+BOX_COLOR = (0, 255, 0)
+REGION_COLOR = (255, 255, 0)
+
+
+class DebugRenderer:
+    def __init__(self, window="AOE4 Game View", max_fps=DEBUG_FPS, size=DISPLAY_SIZE, video_path=None, show=True,
+                 hud_regions=False):
+        self.window = window
+        self.max_fps = max_fps
+        self.size = tuple(size)  # (width, height) of the rendered image
+        self.video_path = video_path
+        self.show = show
+        self.hud_regions = hud_regions
+        self.submitted = 0
+        self.dropped = 0
+        self.rendered = 0
+        self._pending = None
+        self._lock = threading.Lock()
+        self._ready = threading.Event()
+        self._stop = threading.Event()
+        self._thread = None
+        self._writer = None
+        self._window_created = False
+        self._last_submit = 0.0
+
+    @property
+    def enabled(self):
+        return self.show or self.video_path is not None
+
+    def submit(self, frame, detections=(), text=()):
+        # text: (line, BGR color) pairs drawn top-left. Returns whether the frame was taken.
+        if frame is None or not self.enabled:
+            return False
+        now = time.perf_counter()
+        if self.max_fps and now - self._last_submit < 1 / self.max_fps:
+            self.dropped += 1
+            return False
+        self._last_submit = now
+
+        pending = self._snapshot(frame, detections, text)
+        with self._lock:
+            self._pending = pending
+        self.submitted += 1
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._loop, name="debug-renderer", daemon=True)
+            self._thread.start()
+        self._ready.set()
+        return True
+
+    def _snapshot(self, frame, detections, text):
+        # The resize is the renderer's private copy; labels are snapshotted too
+        h, w = frame.shape[:2]
+        image = cv2.resize(frame, self.size, interpolation=cv2.INTER_AREA)
+        boxes = []
+        for obj in detections:
+            label = f"{obj['class']} {obj['conf']:.2f}"
+            if obj.get("id") is not None:
+                label = f"#{obj['id']} {label}"
+            boxes.append((obj["box"], label))
+        return image, (w, h), boxes, list(text)
+
+    def render(self, frame, detections=(), text=()):
+        # The overlay image submit() would produce, drawn on the calling
+        # thread and not rate-limited (benchmarks, one-off snapshots)
+        return self._draw(*self._snapshot(frame, detections, text))
+
+    def _loop(self):
+        while True:
+            if not self._ready.wait(0.1):
+                if self._stop.is_set():
+                    break
+                if self._window_created:
+                    cv2.waitKey(1)  # Keep the window responsive between frames
+                continue
+            with self._lock:
+                pending, self._pending = self._pending, None
+                self._ready.clear()
+            if pending is not None:
+                self._output(self._draw(*pending))
+        self._release()
+
+    def _draw(self, image, frame_size, boxes, text):
+        sx, sy = self.size[0] / frame_size[0], self.size[1] / frame_size[1]
+        if self.hud_regions:
+            profile = get_roi_profile().scaled(*frame_size)
+            for name in HUD_NAMES:
+                x, y, w, h = profile[name]
+                p1 = (int(x * sx), int(y * sy))
+                cv2.rectangle(image, p1, (int((x + w) * sx), int((y + h) * sy)), REGION_COLOR, 1)
+                cv2.putText(image, name, (p1[0], p1[1] - 4), cv2.FONT_HERSHEY_SIMPLEX, 0.35, REGION_COLOR, 1)
+        for (x1, y1, x2, y2), label in boxes:
+            p1 = (int(x1 * sx), int(y1 * sy))
+            cv2.rectangle(image, p1, (int(x2 * sx), int(y2 * sy)), BOX_COLOR, 1)
+            cv2.putText(image, label, (p1[0], p1[1] - 4), cv2.FONT_HERSHEY_SIMPLEX, 0.4, BOX_COLOR, 1)
+        for i, (line, color) in enumerate(text):
+            cv2.putText(image, line, (10, 25 + 30 * i), cv2.FONT_HERSHEY_SIMPLEX, 0.7, color, 2)
+        return image
+
+    def _output(self, image):
+        if self.video_path is not None:
+            if self._writer is None:
+                fourcc = cv2.VideoWriter_fourcc(*"mp4v")
+                self._writer = cv2.VideoWriter(self.video_path, fourcc, self.max_fps or DEBUG_FPS, self.size)
+            self._writer.write(image)
+        if self.show:
+            if not self._window_created:
+                cv2.namedWindow(self.window, cv2.WINDOW_NORMAL)
+                cv2.resizeWindow(self.window, *self.size)
+                cv2.moveWindow(self.window, *WINDOW_POSITION)
+                self._window_created = True
+            cv2.imshow(self.window, image)
+            cv2.waitKey(1)
+        self.rendered += 1
+
+    def _release(self):
+        if self._writer is not None:
+            self._writer.release()
+            self._writer = None
+        if self._window_created:
+            cv2.destroyWindow(self.window)
+            self._window_created = False
+
+    def stats(self):
+        return {"submitted": self.submitted, "dropped": self.dropped, "rendered": self.rendered}
+
+    def close(self):
+        # Renders whatever is still pending, then releases the window / video file
+        if self._thread is not None:
+            self._stop.set()
+            self._thread.join()
+            self._thread = None
+            self._stop.clear()
@@ -0,0 +1,184 @@
+import cv2
+import numpy as np
+
+from .detections import Detections
+
+# ========================
+# 🚦 Detection gating
+# ========================
+# With the camera still, consecutive frames are nearly identical. The gate
+# keeps a downsampled grayscale copy of the last frame YOLO actually saw and
+# compares each new frame against it, split into tiles:
+#   no tile changed      -> reuse the previous detections
+#   a few tiles changed  -> run YOLO on just those areas, keep the previous
+#                           detections everywhere else
+#   many tiles changed   -> full inference
+# Detections are assigned to areas by box center, so a box is never both kept
+# and re-detected.
+# Crops are inferred at an input size scaled down with them (crop long side
+# x imgsz / frame long side), so objects appear at the same scale as on full
+# frames and a crop costs its share of a full pass. When the crops together
+# would cost as much as the full frame, the full frame is inferred instead.
+# Costs are counted in network input pixels; stats() reports them relative
+# to running every frame through YOLO.
+
+class DetectionGate:
+    def __init__(self, downscale=16, tiles=(8, 6), tile_threshold=6.0, max_changed=0.4, max_reuse=30, pad=48,
+                 imgsz=640, stride=32):
+        self.downscale = downscale
+        self.tiles = tiles                    # (columns, rows)
+        self.tile_threshold = tile_threshold  # Mean absolute gray-level change that marks a tile as changed
+        self.max_changed = max_changed        # Fraction of changed tiles above which the whole frame is inferred
+        self.max_reuse = max_reuse            # Force a full inference after this many gated frames (bounds drift)
+        self.pad = pad                        # Context added around changed areas before cropping, in pixels
+        self.imgsz = imgsz                    # The detector's input size for full frames
+        self.stride = stride                  # Input sizes are rounded up to a multiple of this
+        self.reset()
+
+    def reset(self):
+        self._reference = None
+        self._detections = None
+        self._key = None
+        self._since_full = 0
+        self.frames = 0
+        self.full = 0
+        self.reused = 0
+        self.partial = 0
+        self.tiles_inferred = 0
+        self.pixels_inferred = 0  # Network input pixels actually run
+        self.pixels_full = 0  # ... had every frame been a full pass
+
+    def signature(self, frame):
+        h, w = frame.shape[:2]
+        # Striding first halves the cost of the area resize on full-res frames
+        step = max(1, self.downscale // 4)
+        small = cv2.resize(frame[::step, ::step], (max(1, w // self.downscale), max(1, h // self.downscale)), interpolation=cv2.INTER_AREA)
+        if small.ndim == 3:
+            small = cv2.cvtColor(small, cv2.COLOR_BGR2GRAY)
+        return small.astype(np.int16)
+
+    def _tile_edges(self, shape):
+        rows = np.linspace(0, shape[0], self.tiles[1] + 1).astype(int)
+        cols = np.linspace(0, shape[1], self.tiles[0] + 1).astype(int)
+        return rows, cols
+
+    def changed_tiles(self, signature):
+        # Boolean (rows, columns) mask of tiles that differ from the reference
+        diff = np.abs(signature - self._reference).astype(np.float32)
+        rows, cols = self._tile_edges(diff.shape)
+        # Per-tile mean via an integral image
+        integral = cv2.integral(diff)
+        sums = integral[np.ix_(rows[1:], cols[1:])] - integral[np.ix_(rows[:-1], cols[1:])] \
+            - integral[np.ix_(rows[1:], cols[:-1])] + integral[np.ix_(rows[:-1], cols[:-1])]
+        areas = np.outer(np.diff(rows), np.diff(cols))
+        return sums / np.maximum(areas, 1) > self.tile_threshold
+
+    def _changed_rects(self, mask, frame_shape):
+        # Groups of touching changed tiles -> (x1, y1, x2, y2) in frame pixels
+        rows, cols = self._tile_edges(self._reference.shape)
+        n, labels, stats, _ = cv2.connectedComponentsWithStats(mask.astype(np.uint8), connectivity=8)
+        h, w = frame_shape[:2]
+        sy, sx = h / self._reference.shape[0], w / self._reference.shape[1]
+        rects = []
+        for tx, ty, tw, th, _ in stats[1:]:
+            rects.append((
+                int(cols[tx] * sx), int(rows[ty] * sy),
+                min(w, int(cols[tx + tw] * sx)), min(h, int(rows[ty + th] * sy)),
+            ))
+        return rects
+
+    def _round(self, size):
+        return max(self.stride, int(np.ceil(size / self.stride)) * self.stride)
+
+    def input_size(self, width, height, imgsz):
+        # Letterboxed (width, height) the detector runs an image at
+        scale = imgsz / max(width, height)
+        return self._round(width * scale), self._round(height * scale)
+
+    def crop_imgsz(self, crop_shape, frame_shape):
+        # Input size that keeps the crop at the full-frame scale
+        return self._round(max(crop_shape[:2]) * self.imgsz / max(frame_shape[:2]))
+
+    @staticmethod
+    def _centers_in(detections, rects):
+        centers = detections.centers()
+        inside = np.zeros(len(detections), dtype=bool)
+        for x1, y1, x2, y2 in rects:
+            inside |= (centers[:, 0] >= x1) & (centers[:, 0] < x2) & (centers[:, 1] >= y1) & (centers[:, 1] < y2)
+        return inside
+
+    def _infer_full(self, frame, signature, detect, key, full_cost):
+        self.full += 1
+        self.pixels_inferred += full_cost
+        self._detections = detect(frame, None)
+        self._reference = signature
+        self._key = key
+        self._since_full = 0
+        return self._detections
+
+    def run(self, frame, detect, key=None):
+        # detect(image, imgsz) -> Detections, imgsz=None meaning the detector's
+        # own; key identifies the detect settings (classes, confidence), and a
+        # different key never reuses results
+        self.frames += 1
+        h, w = frame.shape[:2]
+        full_w, full_h = self.input_size(w, h, self.imgsz)
+        full_cost = full_w * full_h
+        self.pixels_full += full_cost
+        signature = self.signature(frame)
+        if (self._detections is None or key != self._key or signature.shape != self._reference.shape
+                or self._since_full >= self.max_reuse):
+            return self._infer_full(frame, signature, detect, key, full_cost)
+
+        mask = self.changed_tiles(signature)
+        changed = mask.mean()
+        if changed > self.max_changed:
+            return self._infer_full(frame, signature, detect, key, full_cost)
+
+        self._since_full += 1
+        if not mask.any():
+            self.reused += 1
+            return self._detections
+
+        rects = self._changed_rects(mask, frame.shape)
+        crops = []
+        for x1, y1, x2, y2 in rects:
+            cx1, cy1 = max(0, x1 - self.pad), max(0, y1 - self.pad)
+            cx2, cy2 = min(w, x2 + self.pad), min(h, y2 + self.pad)
+            imgsz = self.crop_imgsz((cy2 - cy1, cx2 - cx1), frame.shape)
+            crop_w, crop_h = self.input_size(cx2 - cx1, cy2 - cy1, imgsz)
+            crops.append(((cx1, cy1, cx2, cy2), imgsz, crop_w * crop_h))
+        crop_cost = sum(cost for _, _, cost in crops)
+        if crop_cost >= full_cost:
+            # Stride padding on several crops can add up to more than one full pass
+            return self._infer_full(frame, signature, detect, key, full_cost)
+
+        self.partial += 1
+        self.pixels_inferred += crop_cost
+        parts = [self._detections.select(~self._centers_in(self._detections, rects))]
+        for (x1, y1, x2, y2), ((cx1, cy1, cx2, cy2), imgsz, _) in zip(rects, crops):
+            found = detect(frame[cy1:cy2, cx1:cx2], imgsz).shifted(cx1, cy1)
+            parts.append(found.select(self._centers_in(found, [(x1, y1, x2, y2)])))
+        self.tiles_inferred += int(mask.sum())
+        self._detections = Detections.concatenate(parts, self._detections.names)
+
+        # Only the re-inferred tiles move the reference; untouched tiles keep
+        # being compared against what YOLO last saw there
+        rows, cols = self._tile_edges(signature.shape)
+        for ty, tx in zip(*np.nonzero(mask)):
+            self._reference[rows[ty]:rows[ty + 1], cols[tx]:cols[tx + 1]] = signature[rows[ty]:rows[ty + 1], cols[tx]:cols[tx + 1]]
+        return self._detections
+
+    def stats(self):
+        frames = max(self.frames, 1)
+        return {
+            "frames": self.frames,
+            "full": self.full,
+            "partial": self.partial,
+            "reused": self.reused,
+            "skip_rate": self.reused / frames,
+            "full_rate": self.full / frames,
+            "tiles_inferred": self.tiles_inferred,
+            # YOLO compute actually spent, as a share of a full pass on every frame
+            "relative_cost": self.pixels_inferred / max(self.pixels_full, 1),
+        }
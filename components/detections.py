@@ -0,0 +1,134 @@
+from collections.abc import Sequence
+
+import numpy as np
+
+# ========================
+# 📦 Columnar detections
+# ========================
+# YOLO results converted in one bulk transfer per column instead of a Python
+# loop over boxes. Filtering is vectorized, and indexing / iterating yields
+# the {"class", "box", "conf"} dicts the rest of the code has always used
+# (plus "id" when the boxes come from the tracker).
+
+class Detections(Sequence):
+    def __init__(self, boxes, class_ids, conf, names, ids=None):
+        self.boxes = np.asarray(boxes, dtype=np.int32).reshape(-1, 4)
+        self.class_ids = np.asarray(class_ids, dtype=np.int32).reshape(-1)
+        self.conf = np.asarray(conf, dtype=np.float32).reshape(-1)
+        self.names = names  # {class id: class name}, as on the YOLO model
+        self.ids = None if ids is None else np.asarray(ids, dtype=np.int64).reshape(-1)  # Track IDs
+        self._lookup = None
+
+    @classmethod
+    def empty(cls, names=None):
+        return cls(np.empty((0, 4)), np.empty(0), np.empty(0), names or {})
+
+    @classmethod
+    def from_yolo(cls, result, names=None):
+        boxes = result.boxes
+        return cls(
+            boxes.xyxy.cpu().numpy(),
+            boxes.cls.cpu().numpy(),
+            boxes.conf.cpu().numpy(),
+            names if names is not None else result.names,
+        )
+
+    @classmethod
+    def from_dicts(cls, detections, names=None):
+        if names is None:
+            names = dict(enumerate(sorted({d["class"] for d in detections})))
+        class_ids = {name: i for i, name in names.items()}
+        tracked = bool(detections) and all("id" in d for d in detections)
+        return cls(
+            [d["box"] for d in detections],
+            [class_ids[d["class"]] for d in detections],
+            [d["conf"] for d in detections],
+            names,
+            [d["id"] for d in detections] if tracked else None,
+        )
+
+    @classmethod
+    def concatenate(cls, parts, names=None):
+        parts = list(parts)
+        if names is None:
+            names = parts[0].names if parts else {}
+        if not parts:
+            return cls.empty(names)
+        tracked = all(p.ids is not None for p in parts)
+        return cls(
+            np.concatenate([p.boxes for p in parts]),
+            np.concatenate([p.class_ids for p in parts]),
+            np.concatenate([p.conf for p in parts]),
+            names,
+            np.concatenate([p.ids for p in parts]) if tracked else None,
+        )
+
+    def shifted(self, dx, dy):
+        # Boxes found on a crop, moved back into full-frame coordinates
+        return Detections(self.boxes + (dx, dy, dx, dy), self.class_ids, self.conf, self.names, self.ids)
+
+    # ---- columns ----
+
+    @property
+    def classes(self):
+        # Class name per detection
+        if self._lookup is None:
+            size = max(self.names, default=-1) + 1
+            self._lookup = np.array([self.names.get(i, "") for i in range(size)], dtype=object)
+        return self._lookup[self.class_ids]
+
+    def centers(self):
+        return (self.boxes[:, :2] + self.boxes[:, 2:]) / 2
+
+    # ---- vectorized filters ----
+
+    def _ids_for(self, class_names):
+        return [i for i, name in self.names.items() if name in class_names]
+
+    def class_mask(self, class_names):
+        return np.isin(self.class_ids, self._ids_for(class_names))
+
+    def select(self, mask):
+        ids = None if self.ids is None else self.ids[mask]
+        return Detections(self.boxes[mask], self.class_ids[mask], self.conf[mask], self.names, ids)
+
+    def filter_classes(self, class_names):
+        return self.select(self.class_mask(class_names))
+
+    def above(self, conf_threshold):
+        return self.select(self.conf >= conf_threshold)
+
+    def count(self, class_names):
+        return int(self.class_mask(class_names).sum())
+
+    # ---- dict-compatible view ----
+
+    def __len__(self):
+        return len(self.class_ids)
+
+    def __getitem__(self, i):
+        if isinstance(i, slice) or isinstance(i, np.ndarray):
+            return self.select(i)
+        obj = {
+            "class": self.names[int(self.class_ids[i])],
+            "box": self.boxes[i].tolist(),
+            "conf": float(self.conf[i]),
+        }
+        if self.ids is not None:
+            obj["id"] = int(self.ids[i])
+        return obj
+
+    def __iter__(self):
+        names = self.names
+        if self.ids is None:
+            for box, cls_id, conf in zip(self.boxes.tolist(), self.class_ids.tolist(), self.conf.tolist()):
+                yield {"class": names[cls_id], "box": box, "conf": conf}
+            return
+        for box, cls_id, conf, track_id in zip(self.boxes.tolist(), self.class_ids.tolist(), self.conf.tolist(), self.ids.tolist()):
+            yield {"class": names[cls_id], "box": box, "conf": conf, "id": track_id}
+
+    def to_dicts(self):
+        return list(self)
+
+    def __repr__(self):
+        return f"Detections({len(self)} boxes)"
@@ -0,0 +1,181 @@
+import os
+
+import cv2
+import numpy as np
+
+# ========================
+# 🔢 Template digit recognizer
+# ========================
+# The HUD counters use one fixed font on fixed ROIs, so instead of shelling
+# out to Tesseract for every region we split each thresholded crop into glyphs
+# by column projection, normalise every glyph to GLYPH_SIZE and classify all
+# glyphs of all regions with a single nearest-template matrix product.
+
+GLYPHS = "0123456789/"
+GLYPH_SIZE = (16, 10)  # (height, width) every glyph is resized to
+DIGIT_TEMPLATE_PATH = "data/models/digit_templates.npz"
+THRESHOLD = 180
+
+
+def binarize(crop):
+    if crop.ndim == 3:
+        crop = cv2.cvtColor(crop, cv2.COLOR_BGR2GRAY)
+    _, thresh = cv2.threshold(crop, THRESHOLD, 255, cv2.THRESH_BINARY)
+    return thresh
+
+
+def _split_touching(ink, start, end, glyph_width):
+    # Split a run of columns that holds several touching glyphs at the
+    # lowest-ink column near each evenly spaced cut point
+    n = int(round((end - start) / glyph_width))
+    if n <= 1:
+        return [(start, end)]
+    profile = ink[:, start:end].sum(axis=0)
+    step = (end - start) / n
+    window = max(1, int(step / 3))
+    cuts = [start]
+    for k in range(1, n):
+        centre = int(k * step)
+        lo, hi = max(1, centre - window), min(end - start - 1, centre + window)
+        cuts.append(start + lo + int(profile[lo:hi + 1].argmin()))
+    cuts.append(end)
+    return list(zip(cuts[:-1], cuts[1:]))
+
+
+def segment_glyphs(thresh, min_width=1, min_height_ratio=0.4, glyph_aspect=0.6):
+    ink = thresh > 0
+    cols = ink.any(axis=0)
+    if not cols.any():
+        return []
+
+    # Runs of inked columns are glyph candidates
+    edges = np.flatnonzero(np.diff(np.concatenate(([0], cols.view(np.int8), [0]))))
+    spans = [(start, end) for start, end in edges.reshape(-1, 2) if end - start >= min_width]
+
+    rows = np.flatnonzero(ink.any(axis=1))
+    glyph_width = max(1.0, glyph_aspect * (rows[-1] + 1 - rows[0]))
+    spans = [part for start, end in spans for part in _split_touching(ink, start, end, glyph_width)]
+
+    glyphs = []
+    heights = []
+    for start, end in spans:
+        rows = np.flatnonzero(ink[:, start:end].any(axis=1))
+        if len(rows) == 0:
+            continue
+        glyphs.append(thresh[rows[0]:rows[-1] + 1, start:end])
+        heights.append(rows[-1] + 1 - rows[0])
+
+    # Drop specks that are much shorter than the tallest glyph
+    if heights:
+        tallest = max(heights)
+        glyphs = [g for g, h in zip(glyphs, heights) if h >= tallest * min_height_ratio]
+    return glyphs
+
+
+def glyph_vectors(glyphs):
+    h, w = GLYPH_SIZE
+    out = np.empty((len(glyphs), h * w), dtype=np.float32)
+    for i, glyph in enumerate(glyphs):
+        out[i] = cv2.resize(glyph, (w, h), interpolation=cv2.INTER_AREA).reshape(-1)
+    out *= 1.0 / 255.0
+    return out
+
+
+class DigitRecognizer:
+    def __init__(self, templates, labels, max_distance=None):
+        self.templates = np.asarray(templates, dtype=np.float32)
+        self.labels = np.array(list(labels))
+        self.max_distance = max_distance
+        self._template_norms = (self.templates ** 2).sum(axis=1)
+
+    # ---- construction ----
+
+    @classmethod
+    def from_font(cls, font=cv2.FONT_HERSHEY_SIMPLEX, scale=1.0, thickness=2):
+        # Bootstrap templates rendered with an OpenCV font; fit() on real HUD
+        # crops gives far better accuracy
+        templates = []
+        for ch in GLYPHS:
+            # Rendered one glyph at a time so none of them touch
+            canvas = np.zeros((48, 48), dtype=np.uint8)
+            cv2.putText(canvas, ch, (8, 36), font, scale, 255, thickness)
+            glyphs = segment_glyphs(canvas)
+            templates.append(glyph_vectors(glyphs[:1])[0])
+        return cls(templates, GLYPHS)
+
+    @classmethod
+    def fit(cls, thresh_crops, texts):
+        # Average the glyph vectors of labeled crops; crops whose glyph count
+        # doesn't match the label length are skipped
+        sums = {}
+        counts = {}
+        skipped = 0
+        for thresh, text in zip(thresh_crops, texts):
+            glyphs = segment_glyphs(thresh)
+            if len(glyphs) != len(text):
+                skipped += 1
+                continue
+            for ch, vec in zip(text, glyph_vectors(glyphs)):
+                sums[ch] = sums.get(ch, 0) + vec
+                counts[ch] = counts.get(ch, 0) + 1
+        if skipped:
+            print(f"[OCR] Skipped {skipped} crops whose segmentation didn't match the label")
+        labels = "".join(ch for ch in GLYPHS if ch in sums)
+        if not labels:
+            raise ValueError("No usable labeled crops to fit digit templates")
+        templates = [sums[ch] / counts[ch] for ch in labels]
+        return cls(templates, labels)
+
+    @classmethod
+    def load(cls, path=DIGIT_TEMPLATE_PATH):
+        data = np.load(path)
+        max_distance = float(data["max_distance"]) if "max_distance" in data else None
+        return cls(data["templates"], str(data["labels"]), max_distance)
+
+    def save(self, path=DIGIT_TEMPLATE_PATH):
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        arrays = {"templates": self.templates, "labels": np.array("".join(self.labels))}
+        if self.max_distance is not None:
+            arrays["max_distance"] = np.array(self.max_distance)
+        np.savez(path, **arrays)
+
+    # ---- recognition ----
+
+    def classify(self, vectors):
+        if len(vectors) == 0:
+            return np.empty(0, dtype=self.labels.dtype), np.empty(0, dtype=np.float32)
+        # Squared euclidean distance to every template in one matmul
+        dist = (vectors ** 2).sum(axis=1)[:, None] - 2.0 * vectors @ self.templates.T + self._template_norms[None, :]
+        best = dist.argmin(axis=1)
+        return self.labels[best], dist[np.arange(len(best)), best]
+
+    def read_many(self, thresh_crops):
+        per_crop = [segment_glyphs(t) for t in thresh_crops]
+        all_glyphs = [g for glyphs in per_crop for g in glyphs]
+        chars, dist = self.classify(glyph_vectors(all_glyphs))
+        if self.max_distance is not None:
+            chars = np.where(dist <= self.max_distance, chars, "")
+
+        texts = []
+        i = 0
+        for glyphs in per_crop:
+            texts.append("".join(chars[i:i + len(glyphs)]))
+            i += len(glyphs)
+        return texts
+
+    def read(self, thresh):
+        return self.read_many([thresh])[0]
+
+
+_recognizer = None
+
+def get_recognizer(path=DIGIT_TEMPLATE_PATH):
+    # Cached; returns None when no fitted templates exist yet
+    global _recognizer
+    if _recognizer is None and os.path.exists(path):
+        _recognizer = DigitRecognizer.load(path)
+    return _recognizer
+
+def set_recognizer(recognizer):
+    global _recognizer
+    _recognizer = recognizer
@@ -0,0 +1,422 @@
+import glob
+import json
+import os
+import time
+
+import cv2
+import numpy as np
+
+from .roi_profile import HUD_NAMES, get_roi_profile, set_screen_size
+
+# ========================
+# 🎞️ Frame sources
+# ========================
+# Every source returns (frame, region) from read(), exactly like
+# capture_game_window() always has. frame is a BGR uint8 array (or None when
+# nothing could be read) and region is (left, top, width, height).
+
+INDEX_DTYPE = np.dtype([
+    ("offset", np.int64),
+    ("height", np.int32),
+    ("width", np.int32),
+    ("channels", np.int32),
+    ("timestamp", np.float64),
+])
+
+
+class FrameSource:
+    live = False  # Reads the running game (a missing frame is transient, not the end)
+    reuses_buffer = False  # read() returns the same array every time, overwritten in place
+
+    def read(self):
+        raise NotImplementedError
+
+    def close(self):
+        pass
+
+    def __iter__(self):
+        while True:
+            frame, region = self.read()
+            if frame is None:
+                return
+            yield frame, region
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class LiveWindowSource(FrameSource):
+    live = True
+
+    def __init__(self, title_keyword="Age of Empires IV "):
+        # Imported here so replay sources work on machines without a display
+        import pyautogui
+        import pygetwindow as gw
+
+        self._pyautogui = pyautogui
+        self._gw = gw
+        self.title_keyword = title_keyword
+
+    def find_window(self):
+        windows = self._gw.getWindowsWithTitle(self.title_keyword)
+        if not windows:
+            print("[Vision] Game window not found.")
+            return None
+        win = windows[0]
+        if win.isMinimized:
+            win.restore()
+        return win
+
+    def read(self):
+        win = self.find_window()
+        if win is None:
+            return None, None
+        region = (win.left, win.top, win.width, win.height)
+        set_screen_size(win.width, win.height)
+        screenshot = self._pyautogui.screenshot(region=region)
+        frame = cv2.cvtColor(np.asarray(screenshot), cv2.COLOR_RGB2BGR)
+        return frame, region
+
+    def read_regions(self, rects, canvas=None):
+        # Grabs only `rects` (window coordinates) into a window-sized canvas,
+        # allocated on first use / resize and reused; the rest stays black
+        win = self.find_window()
+        if win is None:
+            return None, None
+        if canvas is None or canvas.shape[:2] != (win.height, win.width):
+            canvas = np.zeros((win.height, win.width, 3), dtype=np.uint8)
+        for x, y, w, h in rects:
+            w, h = min(w, win.width - x), min(h, win.height - y)
+            if w <= 0 or h <= 0:
+                continue
+            shot = self._pyautogui.screenshot(region=(win.left + x, win.top + y, w, h))
+            cv2.cvtColor(np.asarray(shot), cv2.COLOR_RGB2BGR, dst=canvas[y:y + h, x:x + w])
+        return canvas, (win.left, win.top, win.width, win.height)
+
+
+class HudRegionSource(LiveWindowSource):
+    # Grabs only the ROI profile regions that are needed (the HUD counters by
+    # default) instead of the whole window. Nearby regions are grabbed as one
+    # rectangle. Each grab is written into a window-sized canvas that is
+    # allocated once and reused, so downstream code keeps full-window
+    # coordinates. Everything outside the regions stays black, and the
+    # returned frame is overwritten by the next read().
+    reuses_buffer = True
+
+    def __init__(self, title_keyword="Age of Empires IV ", names=HUD_NAMES, gap=32):
+        super().__init__(title_keyword)
+        self.names = tuple(names)
+        self.gap = gap
+        self._canvas = None
+        self._rects = None
+        self._size = None
+
+    def read(self):
+        win = self.find_window()
+        if win is None:
+            return None, None
+        size = (win.width, win.height)
+        if size != self._size:
+            set_screen_size(*size)
+            self._size = size
+            self._canvas = np.zeros((win.height, win.width, 3), dtype=np.uint8)
+            self._rects = get_roi_profile().scaled(*size).capture_rects(self.names, self.gap)
+        for x, y, w, h in self._rects:
+            shot = self._pyautogui.screenshot(region=(win.left + x, win.top + y, w, h))
+            cv2.cvtColor(np.asarray(shot), cv2.COLOR_RGB2BGR, dst=self._canvas[y:y + h, x:x + w])
+        return self._canvas, (win.left, win.top, win.width, win.height)
+
+
+class ImageDirectorySource(FrameSource):
+    def __init__(self, directory, pattern="*.png", loop=False):
+        self.paths = sorted(glob.glob(os.path.join(directory, pattern)))
+        self.loop = loop
+        self.position = 0
+        if not self.paths:
+            print(f"[Vision] No images matching {pattern} in {directory}")
+
+    def __len__(self):
+        return len(self.paths)
+
+    def read(self):
+        if self.position >= len(self.paths):
+            if not self.loop or not self.paths:
+                return None, None
+            self.position = 0
+        path = self.paths[self.position]
+        self.position += 1
+        frame = cv2.imread(path, cv2.IMREAD_COLOR)
+        if frame is None:
+            print(f"[Vision] Could not read {path}")
+            return None, None
+        h, w = frame.shape[:2]
+        return frame, (0, 0, w, h)
+
+
+# ========================
+# 📼 Raw frame archives
+# ========================
+# An archive is a directory holding frames.bin (raw uint8 frames written back
+# to back) and index.npy (one INDEX_DTYPE row per frame). Replaying memory-maps
+# frames.bin once and hands out read-only views into it, so no frame is ever
+# decoded or copied.
+
+class FrameArchiveWriter:
+    def __init__(self, directory):
+        os.makedirs(directory, exist_ok=True)
+        self.directory = directory
+        self._data = open(os.path.join(directory, "frames.bin"), "wb")
+        self._rows = []
+        self._offset = 0
+
+    def write(self, frame, timestamp=None):
+        frame = np.ascontiguousarray(frame, dtype=np.uint8)
+        if frame.ndim == 2:
+            frame = frame[:, :, None]
+        h, w, c = frame.shape
+        self._data.write(frame.data)
+        self._rows.append((self._offset, h, w, c, time.time() if timestamp is None else timestamp))
+        self._offset += frame.nbytes
+
+    def close(self):
+        if self._data.closed:
+            return
+        self._data.close()
+        np.save(os.path.join(self.directory, "index.npy"), np.array(self._rows, dtype=INDEX_DTYPE))
+        with open(os.path.join(self.directory, "meta.json"), "w") as f:
+            json.dump({"frames": len(self._rows), "bytes": self._offset}, f)
+
+    def __len__(self):
+        return len(self._rows)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class MemmapReplaySource(FrameSource):
+    def __init__(self, directory, loop=False, realtime=False):
+        self.index = np.load(os.path.join(directory, "index.npy"))
+        data_path = os.path.join(directory, "frames.bin")
+        if os.path.getsize(data_path) > 0:
+            self.data = np.memmap(data_path, dtype=np.uint8, mode="r")
+        else:
+            self.data = np.zeros(0, dtype=np.uint8)
+        self.loop = loop
+        self.realtime = realtime
+        self.position = 0
+        self._started = None
+
+    def __len__(self):
+        return len(self.index)
+
+    def frame_at(self, i):
+        offset, h, w, c, _ = self.index[i]
+        frame = self.data[offset:offset + h * w * c].reshape(h, w, c)
+        return frame if c > 1 else frame[:, :, 0]
+
+    def timestamp_at(self, i):
+        return float(self.index["timestamp"][i])
+
+    def read(self):
+        if self.position >= len(self.index):
+            if not self.loop or len(self.index) == 0:
+                return None, None
+            self.position = 0
+            self._started = None
+        i = self.position
+        self.position += 1
+
+        # Optionally pace playback at the recorded frame rate
+        if self.realtime:
+            now = time.time()
+            if self._started is None:
+                self._started = now - (self.timestamp_at(i) - self.timestamp_at(0))
+            delay = self._started + (self.timestamp_at(i) - self.timestamp_at(0)) - now
+            if delay > 0:
+                time.sleep(delay)
+
+        frame = self.frame_at(i)
+        return frame, (0, 0, frame.shape[1], frame.shape[0])
+
+    def close(self):
+        # Drop the mapping; frames handed out keep it alive until released
+        self.data = None
+
+
+class RecordingSource(FrameSource):
+    def __init__(self, source, directory):
+        self.source = source
+        self.writer = FrameArchiveWriter(directory)
+
+    @property
+    def live(self):
+        return self.source.live
+
+    @property
+    def reuses_buffer(self):
+        return self.source.reuses_buffer
+
+    def read(self):
+        frame, region = self.source.read()
+        if frame is not None:
+            self.writer.write(frame)
+        return frame, region
+
+    def close(self):
+        self.writer.close()
+        self.source.close()
+
+
+# ========================
+# 🗜️ Compressed shard archives
+# ========================
+# For datasets, where raw frames would be far too large: every frame is
+# encoded on its own (PNG or JPEG) and appended to shard_NNNNN.bin, a new
+# shard starting every shard_size frames. shards.npy indexes every frame, so
+# any frame can be decoded without touching the others.
+
+SHARD_INDEX_DTYPE = np.dtype([
+    ("shard", np.int32),
+    ("offset", np.int64),
+    ("length", np.int64),
+    ("height", np.int32),
+    ("width", np.int32),
+    ("channels", np.int32),
+    ("timestamp", np.float64),
+])
+
+SHARD_CODECS = {
+    "png": (".png", cv2.IMWRITE_PNG_COMPRESSION),   # lossless; param = 0..9
+    "jpg": (".jpg", cv2.IMWRITE_JPEG_QUALITY),      # lossy; param = 0..100
+}
+
+
+def encode_frame(frame, codec="png", param=None):
+    ext, flag = SHARD_CODECS[codec]
+    if param is None:
+        param = 1 if codec == "png" else 95
+    ok, buf = cv2.imencode(ext, frame, [flag, param])
+    if not ok:
+        raise ValueError(f"Could not encode frame as {codec}")
+    return buf
+
+
+class ShardedArchiveWriter:
+    def __init__(self, directory, shard_size=256, codec="png", param=None, meta=None):
+        if codec not in SHARD_CODECS:
+            raise ValueError(f"Unknown codec: {codec}")
+        os.makedirs(directory, exist_ok=True)
+        self.directory = directory
+        self.shard_size = shard_size
+        self.codec = codec
+        self.param = param
+        self.meta = meta or {}
+        self._rows = []
+        self._shard = None
+        self._shard_id = -1
+        self._offset = 0
+
+    def _roll_shard(self):
+        if self._shard is not None:
+            self._shard.close()
+        self._shard_id += 1
+        self._shard = open(os.path.join(self.directory, f"shard_{self._shard_id:05d}.bin"), "wb")
+        self._offset = 0
+
+    def write_encoded(self, buf, shape, timestamp=None):
+        # buf from encode_frame(); lets callers encode on other threads
+        if self._shard is None or len(self._rows) % self.shard_size == 0:
+            self._roll_shard()
+        data = memoryview(buf).cast("B")
+        self._shard.write(data)
+        h, w = shape[:2]
+        c = shape[2] if len(shape) == 3 else 1
+        self._rows.append((self._shard_id, self._offset, len(data), h, w, c, time.time() if timestamp is None else timestamp))
+        self._offset += len(data)
+
+    def write(self, frame, timestamp=None):
+        self.write_encoded(encode_frame(frame, self.codec, self.param), frame.shape, timestamp)
+
+    def flush_index(self):
+        # Rewritten as it grows, so a crashed session still leaves a readable archive
+        np.save(os.path.join(self.directory, "shards.npy"), np.array(self._rows, dtype=SHARD_INDEX_DTYPE))
+        with open(os.path.join(self.directory, "meta.json"), "w") as f:
+            json.dump({**self.meta, "format": "shards", "codec": self.codec, "frames": len(self._rows),
+                       "shards": self._shard_id + 1, "shard_size": self.shard_size}, f, indent=2)
+
+    def close(self):
+        if self._shard is not None and not self._shard.closed:
+            self._shard.close()
+        self.flush_index()
+
+    def __len__(self):
+        return len(self._rows)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class ShardReplaySource(FrameSource):
+    def __init__(self, directory, loop=False):
+        self.directory = directory
+        self.index = np.load(os.path.join(directory, "shards.npy"))
+        self.loop = loop
+        self.position = 0
+        self._shards = {}
+
+    def __len__(self):
+        return len(self.index)
+
+    def _shard(self, shard_id):
+        data = self._shards.get(shard_id)
+        if data is None:
+            path = os.path.join(self.directory, f"shard_{shard_id:05d}.bin")
+            data = np.memmap(path, dtype=np.uint8, mode="r") if os.path.getsize(path) else np.zeros(0, dtype=np.uint8)
+            self._shards[shard_id] = data
+        return data
+
+    def frame_at(self, i):
+        shard_id, offset, length, _, _, c, _ = self.index[i]
+        buf = self._shard(int(shard_id))[offset:offset + length]
+        return cv2.imdecode(buf, cv2.IMREAD_COLOR if c > 1 else cv2.IMREAD_GRAYSCALE)
+
+    def timestamp_at(self, i):
+        return float(self.index["timestamp"][i])
+
+    def read(self):
+        if self.position >= len(self.index):
+            if not self.loop or len(self.index) == 0:
+                return None, None
+            self.position = 0
+        frame = self.frame_at(self.position)
+        self.position += 1
+        return frame, (0, 0, frame.shape[1], frame.shape[0])
+
+    def close(self):
+        self._shards.clear()
+
+
+def open_frame_source(spec=None, loop=False):
+    # None / "live" -> game window, "hud" -> HUD regions of the game window
+    # only, a directory with index.npy -> raw archive, shards.npy -> compressed
+    # shard archive, any other directory -> PNG screenshots
+    if spec is None or spec == "live":
+        return LiveWindowSource()
+    if spec == "hud":
+        return HudRegionSource()
+    if os.path.isfile(os.path.join(spec, "index.npy")):
+        return MemmapReplaySource(spec, loop=loop)
+    if os.path.isfile(os.path.join(spec, "shards.npy")):
+        return ShardReplaySource(spec, loop=loop)
+    if os.path.isdir(spec):
+        return ImageDirectorySource(spec, loop=loop)
+    raise ValueError(f"Unknown frame source: {spec}")
@@ -1,20 +1,133 @@
 from dataclasses import dataclass, field
-from typing import Dict, List
+from typing import Any, Dict, Iterable, List, Optional, Tuple
 import time
 
+import numpy as np
+
+from .detections import Detections
+from .minimap import MINIMAP_CHANNELS
+
+GRID_CELL = 256  # Spatial index cell size in screen pixels
+
 @dataclass
 class GameState:
     timestamp: float = field(default_factory=time.time)
     resources: Dict[str, int] = field(default_factory=dict)
     objects: List[Dict[str, object]] = field(default_factory=list)
+    # Optional ObjectTracker: objects then carry stable "id"s, and updates
+    # without detections propagate the tracked boxes instead of clearing them
+    tracker: Optional[Any] = field(default=None, repr=False)
+    # (channels, rows, columns) minimap occupancy grid, when perception provides one
+    minimap: Optional[np.ndarray] = field(default=None, repr=False)
+
+    # Rebuilt once per update(): per-class buckets and a uniform grid over box centers
+    _by_class: Dict[str, List[int]] = field(default_factory=dict, init=False, repr=False)
+    _centers: np.ndarray = field(default_factory=lambda: np.empty((0, 2)), init=False, repr=False)
+    _grid: Dict[Tuple[int, int], List[int]] = field(default_factory=dict, init=False, repr=False)
+    _by_id: Dict[int, int] = field(default_factory=dict, init=False, repr=False)
+
+    def __post_init__(self):
+        self._build_index()
+
+    @classmethod
+    def from_detections(cls, detections: Iterable[Dict[str, object]]) -> "GameState":
+        return cls(objects=list(detections))
 
     def update(self, info: Dict):
         self.timestamp = time.time()
         self.resources = info.get("resources", {})
-        self.objects = info.get("detections", [])
+        self.minimap = info.get("minimap")
+        detections = info.get("detections")
+        if self.tracker is None:
+            self.objects = detections if detections is not None else []
+        elif detections is None:
+            # No YOLO pass this frame: serve the propagated positions
+            self.objects = self.tracker.predict(self.timestamp, frame=info.get("frame"))
+        else:
+            self.objects = self.tracker.update(detections, self.timestamp, frame=info.get("frame"))
+        self._build_index()
+
+    def _build_index(self):
+        self._by_class = {}
+        self._grid = {}
+        self._by_id = {}
+        if not self.objects:
+            self._centers = np.empty((0, 2))
+            return
+        if isinstance(self.objects, Detections):
+            # Columns are already arrays; no per-box dicts needed
+            boxes = self.objects.boxes.astype(np.float64)
+            classes = self.objects.classes
+            ids = self.objects.ids.tolist() if self.objects.ids is not None else ()
+        else:
+            boxes = np.array([obj["box"] for obj in self.objects], dtype=np.float64)
+            classes = [obj["class"] for obj in self.objects]
+            ids = [obj["id"] for obj in self.objects if "id" in obj]
+            if len(ids) != len(self.objects):
+                ids = ()
+        self._by_id = {track_id: i for i, track_id in enumerate(ids)}
+        self._centers = (boxes[:, :2] + boxes[:, 2:]) / 2
+        cells = (self._centers // GRID_CELL).astype(int).tolist()
+        for i, (class_name, cell) in enumerate(zip(classes, cells)):
+            self._by_class.setdefault(class_name, []).append(i)
+            self._grid.setdefault(tuple(cell), []).append(i)
+
+    # ---- class queries ----
 
     def get_objects_by_class(self, class_name: str) -> List[Dict[str, object]]:
-        return [obj for obj in self.objects if obj["class"] == class_name]
+        return [self.objects[i] for i in self._by_class.get(class_name, [])]
+
+    def count(self, class_names: Iterable[str]) -> int:
+        return sum(len(self._by_class.get(name, [])) for name in class_names)
+
+    def get_by_id(self, track_id: int) -> Optional[Dict[str, object]]:
+        i = self._by_id.get(track_id)
+        return self.objects[i] if i is not None else None
+
+    # ---- minimap ----
+
+    def minimap_channel(self, name: str) -> Optional[np.ndarray]:
+        if self.minimap is None:
+            return None
+        return self.minimap[MINIMAP_CHANNELS.index(name)]
+
+    def minimap_hotspot(self, name: str, min_share: float = 0.05) -> Optional[Tuple[float, float]]:
+        # (x, y) in 0..1 minimap coordinates of the cell most covered by a
+        # channel, e.g. where to look for enemies; None when nothing is there
+        channel = self.minimap_channel(name)
+        if channel is None or channel.max() < min_share:
+            return None
+        row, col = np.unravel_index(int(channel.argmax()), channel.shape)
+        return (col + 0.5) / channel.shape[1], (row + 0.5) / channel.shape[0]
+
+    # ---- spatial queries ----
+
+    def _filter(self, indices, class_name):
+        if class_name is None:
+            return indices
+        in_class = set(self._by_class.get(class_name, ()))
+        return [i for i in indices if i in in_class]
+
+    def _cells_in(self, x1, y1, x2, y2):
+        found = []
+        for cx in range(int(x1 // GRID_CELL), int(x2 // GRID_CELL) + 1):
+            for cy in range(int(y1 // GRID_CELL), int(y2 // GRID_CELL) + 1):
+                found.extend(self._grid.get((cx, cy), ()))
+        return found
+
+    def nearest(self, class_name: str, x: float, y: float) -> Optional[Dict[str, object]]:
+        indices = self._by_class.get(class_name)
+        if not indices:
+            return None
+        d2 = ((self._centers[indices] - (x, y)) ** 2).sum(axis=1)
+        return self.objects[indices[int(d2.argmin())]]
+
+    def within_radius(self, x: float, y: float, radius: float, class_name: Optional[str] = None) -> List[Dict[str, object]]:
+        candidates = self._filter(self._cells_in(x - radius, y - radius, x + radius, y + radius), class_name)
+        if not candidates:
+            return []
+        d2 = ((self._centers[candidates] - (x, y)) ** 2).sum(axis=1)
+        return [self.objects[candidates[i]] for i in np.flatnonzero(d2 <= radius * radius)]
 
     def __str__(self):
         #detected_classes = [obj["class"] for obj in self.objects]
@@ -31,4 +144,4 @@ class GameState:
             f"| stone: {self.resources.get('stone', '?')} "
             f"| stone_villagers: {self.resources.get('stone_villagers', '?')} "
             #f"| Detected: {detected_classes}"
-        )
\ No newline at end of file
+        )
@@ -0,0 +1,188 @@
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from dataclasses import dataclass, replace
+
+# ========================
+# ⏱️ Timing profiles
+# ========================
+
+@dataclass(frozen=True)
+class TimingProfile:
+    move_duration: float = 0.1    # mouse travel before a click
+    click_interval: float = 0.2   # between clicks of a multi-click
+    drag_duration: float = 0.5
+    key_hold: float = 0.05        # modifier held before a camera rotation
+    rotate_duration: float = 0.3
+    pan_hold: float = 0.01        # time the cursor rests on a screen edge
+    pause: float = 0.1            # pyautogui.PAUSE after every call
+
+TIMING_PROFILES = {
+    "human": TimingProfile(),
+    "fast": TimingProfile(move_duration=0.02, click_interval=0.05, drag_duration=0.1,
+                          key_hold=0.02, rotate_duration=0.08, pan_hold=0.01, pause=0.01),
+    "instant": TimingProfile(move_duration=0, click_interval=0, drag_duration=0,
+                             key_hold=0, rotate_duration=0, pan_hold=0, pause=0),
+}
+
+def get_timing_profile(profile):
+    if isinstance(profile, TimingProfile):
+        return profile
+    if profile not in TIMING_PROFILES:
+        raise ValueError(f"Unknown timing profile: {profile}")
+    return TIMING_PROFILES[profile]
+
+
+# ========================
+# 🖱️ Input backends
+# ========================
+
+class InputBackend:
+    def move_to(self, x, y, duration=0.0): raise NotImplementedError
+    def click(self, clicks=1, interval=0.0, button="left"): raise NotImplementedError
+    def drag_to(self, x, y, duration=0.0, button="left"): raise NotImplementedError
+    def key_down(self, key): raise NotImplementedError
+    def key_up(self, key): raise NotImplementedError
+    def press(self, key): raise NotImplementedError
+    def position(self): raise NotImplementedError
+
+    def sleep(self, seconds):
+        if seconds > 0:
+            time.sleep(seconds)
+
+    def apply_profile(self, profile):
+        pass
+
+
+class PyAutoGuiBackend(InputBackend):
+    def __init__(self):
+        # Imported here: pyautogui needs a display
+        import pyautogui
+        self._pg = pyautogui
+
+    def apply_profile(self, profile):
+        self._pg.PAUSE = profile.pause
+
+    def move_to(self, x, y, duration=0.0):
+        self._pg.moveTo(x, y, duration=duration)
+
+    def click(self, clicks=1, interval=0.0, button="left"):
+        self._pg.click(clicks=clicks, interval=interval, button=button)
+
+    def drag_to(self, x, y, duration=0.0, button="left"):
+        self._pg.dragTo(x, y, duration=duration, button=button)
+
+    def key_down(self, key):
+        self._pg.keyDown(key)
+
+    def key_up(self, key):
+        self._pg.keyUp(key)
+
+    def press(self, key):
+        self._pg.press(key)
+
+    def position(self):
+        return tuple(self._pg.position())
+
+
+class RecordingBackend(InputBackend):
+    # Records every input event instead of sending it. Durations advance a
+    # virtual clock rather than sleeping (unless realtime=True), so ordering
+    # and the latency a chain *would* take can be checked without a display.
+    def __init__(self, realtime=False):
+        self.realtime = realtime
+        self.events = []
+        self.clock = 0.0
+        self.pause = 0.0
+        self._pos = (0, 0)
+        self._lock = threading.Lock()
+
+    def apply_profile(self, profile):
+        self.pause = profile.pause
+
+    def _record(self, event, *args, duration=0.0):
+        with self._lock:
+            self.events.append((self.clock, event, args))
+            self.clock += duration + self.pause
+        if self.realtime:
+            time.sleep(duration + self.pause)
+
+    def move_to(self, x, y, duration=0.0):
+        self._record("move_to", x, y, duration=duration)
+        self._pos = (x, y)
+
+    def click(self, clicks=1, interval=0.0, button="left"):
+        self._record("click", clicks, button, duration=interval * (clicks - 1))
+
+    def drag_to(self, x, y, duration=0.0, button="left"):
+        self._record("drag_to", x, y, button, duration=duration)
+        self._pos = (x, y)
+
+    def key_down(self, key):
+        self._record("key_down", key)
+
+    def key_up(self, key):
+        self._record("key_up", key)
+
+    def press(self, key):
+        self._record("press", key)
+
+    def position(self):
+        return self._pos
+
+    def sleep(self, seconds):
+        self._record("sleep", seconds, duration=seconds)
+
+    def clear(self):
+        with self._lock:
+            self.events.clear()
+            self.clock = 0.0
+
+
+# ========================
+# 📬 Queued executor
+# ========================
+
+class ActionExecutor:
+    # Runs submitted callables one at a time, in order, on a worker thread so
+    # the caller (the env loop) is not blocked by input timings
+    def __init__(self):
+        self._queue = queue.Queue()
+        self._thread = threading.Thread(target=self._run, name="actions", daemon=True)
+        self._thread.start()
+
+    def _run(self):
+        while True:
+            item = self._queue.get()
+            if item is None:
+                self._queue.task_done()
+                return
+            future, fn, args, kwargs = item
+            if future.set_running_or_notify_cancel():
+                try:
+                    future.set_result(fn(*args, **kwargs))
+                except Exception as e:
+                    future.set_exception(e)
+            self._queue.task_done()
+
+    def submit(self, fn, *args, **kwargs):
+        future = Future()
+        self._queue.put((future, fn, args, kwargs))
+        return future
+
+    @property
+    def pending(self):
+        return self._queue.unfinished_tasks
+
+    def wait(self):
+        # Block until everything submitted so far has run
+        self._queue.join()
+
+    def shutdown(self):
+        self._queue.put(None)
+        self._thread.join()
+
+
+def with_profile(profile, **overrides):
+    return replace(get_timing_profile(profile), **overrides)
@@ -1,29 +1,53 @@
 import numpy as np
 from env.actions import ActionChain, get_box_center
+from env.game_state import GameState
+
+BUILDER_REACH = 600  # Screen pixels around a build site within which a villager counts as close
+
+# Macros take a GameState (its per-class buckets make lookups O(1)) or a plain
+# detection list, which is indexed on the spot. With a tracking GameState they
+# return the ID of the object they used, which can be passed back in to keep
+# working with the same unit.
+def _as_state(detections):
+    return detections if isinstance(detections, GameState) else GameState.from_detections(detections)
+
+def _pick(state, class_name, object_id=None, near=None):
+    # The tracked object with object_id if it is still on screen, else a random
+    # one; with near=(x, y), one close to that point (the nearest if none is)
+    if object_id is not None:
+        obj = state.get_by_id(object_id)
+        if obj is not None and obj["class"] == class_name:
+            return obj
+    if near is not None:
+        nearby = state.within_radius(near[0], near[1], BUILDER_REACH, class_name)
+        if nearby:
+            return nearby[np.random.randint(len(nearby))]
+        return state.nearest(class_name, *near)
+    candidates = state.get_objects_by_class(class_name)
+    return candidates[np.random.randint(len(candidates))] if candidates else None
 
 # 🛡️ Macro 1: Ungarrison All from Town Center
-def ungarrison_town_center(detections):
-    town_centers = [d for d in detections if d["class"] == "TownCenter"]
-    if not town_centers:
+def ungarrison_town_center(detections, town_center_id=None):
+    tc = _pick(_as_state(detections), "TownCenter", town_center_id)
+    if tc is None:
         print("❌ No Town Center detected.")
         return
 
-    tc = np.random.choice(town_centers)
     tc_x, tc_y = get_box_center(tc["box"])
 
     chain = ActionChain()
     chain.add_move_click(tc_x, tc_y) # Click Town Center   
     chain.add_keypress('f') # Press F to ungarrison
     chain.execute()
+    return tc.get("id")
 
 # 🏠 Macro 2: Build House
-def build_house(detections, target_x, target_y):
-    villagers = [d for d in detections if d["class"] == "Villager"]
-    if not villagers:
+def build_house(detections, target_x, target_y, villager_id=None):
+    villager = _pick(_as_state(detections), "Villager", villager_id, near=(target_x, target_y))
+    if villager is None:
         print("❌ No Villager detected.")
         return
 
-    villager = np.random.choice(villagers)
     v_x, v_y = get_box_center(villager["box"])
 
     chain = ActionChain()
@@ -32,15 +56,15 @@ def build_house(detections, target_x, target_y):
     chain.add_keypress('q') # Select House
     chain.add_move_click(target_x, target_y) # Place Building
     chain.execute()
+    return villager.get("id")  # Pass back as villager_id to keep using the same villager
 
 # 🌾 Macro 3: Build Mill
-def build_mill(detections, target_x, target_y):
-    villagers = [d for d in detections if d["class"] == "Villager"]
-    if not villagers:
+def build_mill(detections, target_x, target_y, villager_id=None):
+    villager = _pick(_as_state(detections), "Villager", villager_id, near=(target_x, target_y))
+    if villager is None:
         print("❌ No Villager detected.")
         return
 
-    villager = np.random.choice(villagers)
     v_x, v_y = get_box_center(villager["box"])
 
     chain = ActionChain()
@@ -49,18 +73,19 @@ def build_mill(detections, target_x, target_y):
     chain.add_keypress('w') # Select Mill
     chain.add_move_click(target_x, target_y) # Place Building
     chain.execute()
+    return villager.get("id")
 
 # 👷 Macro 4: Queue New Villager from Town Center
-def queue_villager(detections):
-    town_centers = [d for d in detections if d["class"] == "TownCenter"]
-    if not town_centers:
+def queue_villager(detections, town_center_id=None):
+    tc = _pick(_as_state(detections), "TownCenter", town_center_id)
+    if tc is None:
         print("❌ No Town Center detected.")
         return
 
-    tc = np.random.choice(town_centers)
     tc_x, tc_y = get_box_center(tc["box"])
 
     chain = ActionChain()
     chain.add_move_click(tc_x, tc_y) # Select Town Center
     chain.add_keypress('q') # Queue new villager
     chain.execute()
+    return tc.get("id")
@@ -0,0 +1,100 @@
+import cv2
+import numpy as np
+
+from .roi_profile import get_roi_profile
+
+# ========================
+# 🗺️ Minimap occupancy grid
+# ========================
+# Turns the minimap crop into a small (channels, rows, columns) float32 grid.
+# Each cell holds the fraction of its pixels that match one color class:
+#   own       -> our player color
+#   enemy     -> any enemy player color
+#   resources -> gold, stone, berry and forest markers
+#   fog       -> unexplored (near-black) terrain
+# The crop is nearest-sampled down to `sample` pixels per cell (area
+# averaging would blend marker colors into the terrain), converted to HSV once,
+# thresholded with cv2.inRange per color and pooled per cell with a reshape.
+# That is well under a millisecond, so it can run on every frame.
+
+MINIMAP_CHANNELS = ("own", "enemy", "resources", "fog")
+MINIMAP_GRID = (24, 24)  # (rows, columns)
+
+# OpenCV HSV: H 0-179, S and V 0-255. Player colors are saturated and bright.
+PLAYER_COLORS = {
+    "blue": [((100, 150, 120), (125, 255, 255))],
+    "red": [((0, 150, 120), (6, 255, 255)), ((172, 150, 120), (179, 255, 255))],
+    "yellow": [((24, 150, 150), (34, 255, 255))],
+    "green": [((50, 150, 120), (70, 255, 255))],
+    "cyan": [((85, 150, 120), (98, 255, 255))],
+    "purple": [((130, 120, 100), (150, 255, 255))],
+    "orange": [((10, 150, 150), (20, 255, 255))],
+    "pink": [((155, 80, 150), (170, 255, 255))],
+}
+RESOURCE_COLORS = [
+    ((20, 80, 180), (30, 200, 255)),   # gold: pale yellow, less saturated than the yellow player
+    ((0, 0, 150), (179, 30, 230)),     # stone: light grey
+    ((135, 60, 60), (160, 200, 200)),  # berries: muted magenta
+    ((45, 60, 30), (85, 255, 110)),    # forest: dark green
+]
+FOG_COLOR = [((0, 0, 0), (179, 255, 22))]
+
+
+class MinimapParser:
+    def __init__(self, grid=MINIMAP_GRID, own_color="blue", enemy_colors=("red",), sample=4):
+        self.grid = tuple(grid)
+        self.sample = sample
+        self.ranges = (
+            PLAYER_COLORS[own_color],
+            [r for color in enemy_colors for r in PLAYER_COLORS[color]],
+            RESOURCE_COLORS,
+            FOG_COLOR,
+        )
+        rows, cols = self.grid
+        self._out = np.zeros((len(MINIMAP_CHANNELS), rows, cols), dtype=np.float32)
+        self._mask = np.zeros((rows * sample, cols * sample), dtype=np.uint8)
+        self._any = np.zeros_like(self._mask)
+
+    @property
+    def shape(self):
+        return self._out.shape
+
+    def crop(self, frame):
+        return get_roi_profile().for_frame(frame).crop(frame, "Minimap")
+
+    def parse(self, frame, copy=True):
+        # frame: full game frame; the grid buffer is reused unless copy=True
+        return self.parse_crop(self.crop(frame), copy)
+
+    def parse_crop(self, minimap, copy=True):
+        rows, cols = self.grid
+        s = self.sample
+        small = cv2.resize(minimap, (cols * s, rows * s), interpolation=cv2.INTER_NEAREST)
+        hsv = cv2.cvtColor(small, cv2.COLOR_BGR2HSV)
+        for c, ranges in enumerate(self.ranges):
+            self._any[:] = 0
+            for lower, upper in ranges:
+                cv2.inRange(hsv, lower, upper, dst=self._mask)
+                cv2.bitwise_or(self._any, self._mask, dst=self._any)
+            # Mask is 0/255: per-cell mean / 255 = share of matching pixels
+            self._out[c] = self._any.reshape(rows, s, cols, s).mean(axis=(1, 3)) / 255.0
+        return self._out.copy() if copy else self._out
+
+
+_parser = None
+
+
+def get_minimap_parser():
+    global _parser
+    if _parser is None:
+        _parser = MinimapParser()
+    return _parser
+
+
+def set_minimap_parser(parser):
+    global _parser
+    _parser = parser
+
+
+def parse_minimap(frame):
+    return get_minimap_parser().parse(frame)
@@ -0,0 +1,146 @@
+import time
+
+import cv2
+import gym
+import numpy as np
+
+from .minimap import get_minimap_parser
+
+# ========================
+# 🖼️ Observation builders
+# ========================
+# Turns a captured frame (+ the GameState of the same step) into what the
+# policy sees:
+#   "image"      -> uint8 (H, W, C * frame_stack), C = 1 when grayscale
+#   "structured" -> {"image": the above, "vector": float32 resources + class counts}
+#                   (+ "minimap": float32 (channels, rows, cols) occupancy grid
+#                   when minimap=True, see minimap.py)
+# All buffers are allocated once; the returned image is overwritten by the
+# next build(), so keep a copy if you need it past the next step.
+
+OBS_MODES = ("image", "structured")
+
+# (resource key, scale) for the structured vector
+VECTOR_RESOURCES = (
+    ("current_population", 200.0),
+    ("max_population", 200.0),
+    ("idle_villagers", 50.0),
+    ("food", 1000.0),
+    ("wood", 1000.0),
+    ("gold", 1000.0),
+    ("stone", 1000.0),
+)
+VECTOR_CLASSES = ("Villager", "Scout", "TownCenter", "Sheep", "House", "Mill", "Berry", "Deer", "Boar", "Forest", "Tree", "Gold", "Stone")
+
+
+class ObservationBuilder:
+    def __init__(self, mode="image", size=(1280, 720), grayscale=False, frame_stack=1, minimap=False):
+        if mode not in OBS_MODES:
+            raise ValueError(f"Unknown observation mode: {mode}")
+        if minimap and mode != "structured":
+            raise ValueError("The minimap grid needs the structured observation mode")
+        self.mode = mode
+        self.size = tuple(size)  # (width, height), as cv2.resize takes it
+        self.grayscale = grayscale
+        self.frame_stack = max(1, frame_stack)
+        self.minimap = minimap
+
+        w, h = self.size
+        self.channels = 1 if grayscale else 3
+        self._ring = np.zeros((self.frame_stack, h, w, self.channels), dtype=np.uint8)
+        self._head = 0
+        if self.frame_stack == 1:
+            self._image = self._ring[0]  # Nothing to stack: the ring slot is the observation
+        else:
+            self._image = np.zeros((h, w, self.channels * self.frame_stack), dtype=np.uint8)
+        self._vector = np.zeros(len(VECTOR_RESOURCES) + len(VECTOR_CLASSES), dtype=np.float32)
+        self._minimap = np.zeros(get_minimap_parser().shape if minimap else (0,), dtype=np.float32)
+        self.last_build_time = 0.0
+
+        image_space = gym.spaces.Box(low=0, high=255, shape=self._image.shape, dtype=np.uint8)
+        if mode == "structured":
+            self.observation_space = gym.spaces.Dict({
+                "image": image_space,
+                "vector": gym.spaces.Box(low=0, high=np.inf, shape=self._vector.shape, dtype=np.float32),
+            })
+            if minimap:
+                self.observation_space.spaces["minimap"] = gym.spaces.Box(low=0, high=1, shape=self._minimap.shape, dtype=np.float32)
+        else:
+            self.observation_space = image_space
+
+    @property
+    def resource_keys(self):
+        return tuple(k for k, _ in VECTOR_RESOURCES) if self.mode == "structured" else ()
+
+    @property
+    def classes(self):
+        return VECTOR_CLASSES if self.mode == "structured" else ()
+
+    @property
+    def nbytes(self):
+        # Size of one observation as stored in a rollout buffer
+        return self._image.nbytes + (self._vector.nbytes + self._minimap.nbytes if self.mode == "structured" else 0)
+
+    def _preprocess(self, frame, out):
+        w, h = self.size
+        resize = frame.shape[1] != w or frame.shape[0] != h
+        if self.grayscale:
+            if resize:
+                frame = cv2.resize(frame, (w, h), interpolation=cv2.INTER_AREA)
+            cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY, dst=out[:, :, 0])
+        elif resize:
+            cv2.resize(frame, (w, h), dst=out, interpolation=cv2.INTER_AREA)
+        else:
+            out[:] = frame
+
+    def _stack(self):
+        if self.frame_stack == 1:
+            return
+        c = self.channels
+        for j in range(self.frame_stack):
+            self._image[:, :, j * c:(j + 1) * c] = self._ring[(self._head + 1 + j) % self.frame_stack]
+
+    def _fill_vector(self, state):
+        if state is None:
+            self._vector[:] = 0
+            return
+        n = len(VECTOR_RESOURCES)
+        for i, (key, scale) in enumerate(VECTOR_RESOURCES):
+            self._vector[i] = (state.resources.get(key, 0) or 0) / scale
+        for i, name in enumerate(VECTOR_CLASSES):
+            self._vector[n + i] = state.count((name,))
+
+    def _fill_minimap(self, state):
+        grid = getattr(state, "minimap", None)
+        if grid is None or grid.shape != self._minimap.shape:
+            self._minimap[:] = 0
+        else:
+            self._minimap[:] = grid
+
+    def _output(self, state):
+        if self.mode == "structured":
+            self._fill_vector(state)
+            if self.minimap:
+                self._fill_minimap(state)
+                return {"image": self._image, "vector": self._vector, "minimap": self._minimap}
+            return {"image": self._image, "vector": self._vector}
+        return self._image
+
+    def reset(self, frame, state=None):
+        start = time.perf_counter()
+        self._preprocess(frame, self._ring[0])
+        self._ring[1:] = self._ring[0]
+        self._head = 0
+        self._stack()
+        obs = self._output(state)
+        self.last_build_time = time.perf_counter() - start
+        return obs
+
+    def build(self, frame, state=None):
+        start = time.perf_counter()
+        self._head = (self._head + 1) % self.frame_stack
+        self._preprocess(frame, self._ring[self._head])
+        self._stack()
+        obs = self._output(state)
+        self.last_build_time = time.perf_counter() - start
+        return obs
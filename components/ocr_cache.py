@@ -0,0 +1,65 @@
+import hashlib
+from collections import OrderedDict
+
+import numpy as np
+
+# ========================
+# 🗃️ OCR result cache
+# ========================
+# HUD counters rarely change between frames, so every parsed value is kept
+# per ROI under a fingerprint of its thresholded crop. A crop whose pixels
+# are identical to one seen recently returns the stored value without OCR.
+
+class OCRCache:
+    def __init__(self, max_entries=64):
+        self.max_entries = max_entries  # per ROI
+        self._entries = {}
+        self._stats = {}
+
+    @staticmethod
+    def fingerprint(thresh):
+        # 1 bit per pixel, then a short hash; the shape guards against
+        # differently sized crops packing to the same bytes
+        bits = np.packbits(thresh > 0)
+        digest = hashlib.blake2b(bits.tobytes(), digest_size=8)
+        digest.update(np.asarray(thresh.shape, dtype=np.int32).tobytes())
+        return digest.digest()
+
+    def get(self, roi, key):
+        entries = self._entries.get(roi)
+        stats = self._stats.setdefault(roi, [0, 0])
+        if entries is not None and key in entries:
+            entries.move_to_end(key)
+            stats[0] += 1
+            return True, entries[key]
+        stats[1] += 1
+        return False, None
+
+    def put(self, roi, key, value):
+        entries = self._entries.setdefault(roi, OrderedDict())
+        entries[key] = value
+        entries.move_to_end(key)
+        while len(entries) > self.max_entries:
+            entries.popitem(last=False)
+
+    def clear(self):
+        self._entries.clear()
+        self._stats.clear()
+
+    @property
+    def hits(self):
+        return sum(s[0] for s in self._stats.values())
+
+    @property
+    def misses(self):
+        return sum(s[1] for s in self._stats.values())
+
+    def stats(self):
+        total = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / total if total else 0.0,
+            "entries": sum(len(e) for e in self._entries.values()),
+            "per_roi": {str(roi): {"hits": h, "misses": m} for roi, (h, m) in self._stats.items()},
+        }
@@ -0,0 +1,180 @@
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+from .vision import detect_objects_with_yolo, get_frame_source, read_hud
+
+# ========================
+# 🧵 Pipelined perception
+# ========================
+# A capture thread keeps a small ring buffer of the newest frames. A
+# processing thread always takes the freshest one (older frames are dropped)
+# and runs YOLO and the HUD read concurrently on a thread pool; torch, OpenCV
+# and NumPy release the GIL so the two overlap. Consumers get one merged,
+# timestamped result per processed frame. With yolo_every=N only every Nth
+# processed frame gets a detection pass; the others carry detections=None
+# (GameState with a tracker then propagates the previous boxes).
+# If perception raises, processing stops and the error is re-raised to the
+# consumer from wait_for_result() / results().
+
+class PerceptionPipeline:
+    def __init__(self, source=None, buffer_size=2, workers=2, capture_fps=0, stop_when_exhausted=False, yolo_every=1):
+        self.source = source if source is not None else get_frame_source()
+        self.capture_interval = 1 / capture_fps if capture_fps > 0 else 0
+        self.stop_when_exhausted = stop_when_exhausted
+        self.yolo_every = max(1, yolo_every)
+
+        self._frames = deque(maxlen=buffer_size)
+        self._frame_ready = threading.Condition()
+        self._result_ready = threading.Condition()
+        self._pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="perception")
+        self._stop = threading.Event()
+        self._threads = []
+
+        self._latest = None
+        self._capture_done = False
+        self._processing_done = False
+        self.error = None
+        self.captured = 0
+        self.processed = 0
+        self.dropped = 0
+
+    # ---- lifecycle ----
+
+    def start(self):
+        self._stop.clear()
+        self._threads = [
+            threading.Thread(target=self._capture_loop, name="capture", daemon=True),
+            threading.Thread(target=self._process_loop, name="process", daemon=True),
+        ]
+        for t in self._threads:
+            t.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        with self._frame_ready:
+            self._frame_ready.notify_all()
+        with self._result_ready:
+            self._result_ready.notify_all()
+        for t in self._threads:
+            t.join(timeout=2)
+        self._pool.shutdown(wait=True)
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    # ---- producer ----
+
+    def _capture_loop(self):
+        frame_id = 0
+        while not self._stop.is_set():
+            start = time.time()
+            frame, region = self.source.read()
+            if frame is None:
+                if self.stop_when_exhausted:
+                    break
+                time.sleep(0.1)
+                continue
+            if getattr(self.source, "reuses_buffer", False):
+                # The next read() overwrites it while YOLO / OCR still read this one
+                frame = frame.copy()
+
+            with self._frame_ready:
+                if len(self._frames) == self._frames.maxlen:
+                    self.dropped += 1
+                self._frames.append((frame_id, start, frame, region))
+                self.captured += 1
+                self._frame_ready.notify()
+            frame_id += 1
+
+            if self.capture_interval:
+                time.sleep(max(0, self.capture_interval - (time.time() - start)))
+
+        with self._frame_ready:
+            self._capture_done = True
+            self._frame_ready.notify_all()
+
+    # ---- worker ----
+
+    def _process_loop(self):
+        try:
+            self._process_frames()
+        except Exception as e:
+            print(f"🛑 Perception failed: {e!r}")
+            self.error = e
+        finally:
+            with self._result_ready:
+                self._processing_done = True
+                self._result_ready.notify_all()
+
+    def _process_frames(self):
+        while not self._stop.is_set():
+            with self._frame_ready:
+                while not self._frames and not self._stop.is_set() and not self._capture_done:
+                    self._frame_ready.wait(timeout=0.5)
+                if not self._frames:
+                    if self._capture_done:
+                        break
+                    continue
+                # Always work on the freshest screen
+                frame_id, captured_at, frame, region = self._frames.pop()
+                self.dropped += len(self._frames)
+                self._frames.clear()
+
+            keyframe = self.processed % self.yolo_every == 0
+            detections = self._pool.submit(detect_objects_with_yolo, frame) if keyframe else None
+            resources = self._pool.submit(read_hud, frame)
+            result = {
+                "frame_id": frame_id,
+                "captured_at": captured_at,
+                "frame": frame,
+                "region": region,
+                "detections": detections.result() if keyframe else None,
+                "resources": resources.result(),
+            }
+            result["completed_at"] = time.time()
+            result["latency"] = result["completed_at"] - captured_at
+
+            with self._result_ready:
+                self._latest = result
+                self.processed += 1
+                self._result_ready.notify_all()
+
+    # ---- consumers ----
+
+    def latest(self):
+        return self._latest
+
+    def wait_for_result(self, after_frame_id=-1, timeout=None):
+        # Block until a result newer than after_frame_id exists
+        with self._result_ready:
+            deadline = None if timeout is None else time.time() + timeout
+            while (self._latest is None or self._latest["frame_id"] <= after_frame_id) and not self._stop.is_set():
+                if self._processing_done:
+                    if self.error is not None:
+                        raise self.error
+                    return None
+                remaining = None if deadline is None else deadline - time.time()
+                if remaining is not None and remaining <= 0:
+                    return None
+                self._result_ready.wait(timeout=0.5 if remaining is None else min(remaining, 0.5))
+            return self._latest
+
+    def results(self):
+        # Yields every result the consumer is fast enough to see; results
+        # produced while the consumer was busy are skipped
+        last_id = -1
+        while not self._stop.is_set():
+            result = self.wait_for_result(last_id)
+            if result is None:
+                return
+            last_id = result["frame_id"]
+            yield result
+
+    def stats(self):
+        return {"captured": self.captured, "processed": self.processed, "dropped": self.dropped}
@@ -0,0 +1,166 @@
+import csv
+import functools
+import json
+import os
+import threading
+import time
+from collections import deque
+
+import numpy as np
+
+# ========================
+# ⏱️ Stage profiler
+# ========================
+# Named spans around the hot stages (capture, yolo, ocr.<ROI>, reward,
+# action.<step>, ...) feed rolling windows of durations. Disabled spans are a
+# shared no-op object, so instrumentation costs one attribute check when off.
+# Turn on with profiler.enable() or AOE4_PROFILE=1.
+
+class _NullSpan:
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+_NULL_SPAN = _NullSpan()
+
+
+class _Span:
+    __slots__ = ("window", "start")
+
+    def __init__(self, window):
+        self.window = window
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.window.append(time.perf_counter() - self.start)
+        return False
+
+
+class Profiler:
+    def __init__(self, window=2000, enabled=False):
+        self.window = window
+        self.enabled = enabled
+        self._spans = {}
+        self._lock = threading.Lock()
+
+    def enable(self):
+        self.enabled = True
+
+    def disable(self):
+        self.enabled = False
+
+    def _window(self, name):
+        window = self._spans.get(name)
+        if window is None:
+            with self._lock:
+                window = self._spans.setdefault(name, deque(maxlen=self.window))
+        return window
+
+    def span(self, name, detail=None):
+        # detail is appended as "name.detail", formatted only when enabled
+        if not self.enabled:
+            return _NULL_SPAN
+        if detail is not None:
+            name = f"{name}.{detail}"
+        return _Span(self._window(name))
+
+    def record(self, name, seconds):
+        if self.enabled:
+            self._window(name).append(seconds)
+
+    def reset(self):
+        with self._lock:
+            self._spans.clear()
+
+    def summary(self):
+        # {name: {count, mean_ms, p50_ms, p95_ms, p99_ms}}
+        out = {}
+        for name, window in sorted(self._spans.items()):
+            if not window:
+                continue
+            ms = np.fromiter(window, dtype=np.float64) * 1000
+            p50, p95, p99 = np.percentile(ms, [50, 95, 99])
+            out[name] = {
+                "count": len(ms),
+                "mean_ms": float(ms.mean()),
+                "p50_ms": float(p50),
+                "p95_ms": float(p95),
+                "p99_ms": float(p99),
+            }
+        return out
+
+    def dump_json(self, path, summary=None):
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        with open(path, "w") as f:
+            json.dump(summary if summary is not None else self.summary(), f, indent=2)
+
+    def dump_csv(self, path, summary=None):
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        with open(path, "w", newline="") as f:
+            writer = csv.writer(f)
+            writer.writerow(["span", "count", "mean_ms", "p50_ms", "p95_ms", "p99_ms"])
+            for name, s in (summary if summary is not None else self.summary()).items():
+                writer.writerow([name, s["count"], s["mean_ms"], s["p50_ms"], s["p95_ms"], s["p99_ms"]])
+
+    def dump(self, path, summary=None):
+        if path.endswith(".csv"):
+            self.dump_csv(path, summary)
+        else:
+            self.dump_json(path, summary)
+
+    def log_to(self, logger, summary=None):
+        # Any object with record(key, value), e.g. a stable-baselines3 logger
+        for name, s in (summary if summary is not None else self.summary()).items():
+            for stat in ("p50_ms", "p95_ms", "p99_ms"):
+                logger.record(f"timing/{name}/{stat}", s[stat])
+
+    def format(self):
+        lines = [f"{'span':<28}{'count':>8}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}"]
+        for name, s in self.summary().items():
+            lines.append(f"{name:<28}{s['count']:>8}{s['p50_ms']:>10.2f}{s['p95_ms']:>10.2f}{s['p99_ms']:>10.2f}")
+        return "\n".join(lines)
+
+
+profiler = Profiler(enabled=os.environ.get("AOE4_PROFILE", "") not in ("", "0"))
+
+
+def profiled(name):
+    # Decorator form of profiler.span(name)
+    def decorator(fn):
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            if not profiler.enabled:
+                return fn(*args, **kwargs)
+            with profiler.span(name):
+                return fn(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def make_sb3_callback(log_every=1):
+    # Writes the span percentiles next to PPO's own scalars (TensorBoard in
+    # ./logs) at the end of every rollout. Env spans are read from the first
+    # env through AOEEnv.profile_summary(), so subprocess workers are covered.
+    from stable_baselines3.common.callbacks import BaseCallback
+
+    class ProfilerCallback(BaseCallback):
+        def __init__(self):
+            super().__init__()
+            self.rollouts = 0
+
+        def _on_step(self):
+            return True
+
+        def _on_rollout_end(self):
+            self.rollouts += 1
+            if self.rollouts % log_every == 0:
+                summary = dict(self.training_env.env_method("profile_summary", indices=[0])[0])
+                summary.update(profiler.summary())  # Spans of this (learner) process
+                profiler.log_to(self.logger, summary)
+
+    return ProfilerCallback()
@@ -0,0 +1,162 @@
+import json
+import os
+
+# ========================
+# 📐 ROI layout profiles
+# ========================
+# Every screen rectangle the bot reads (HUD counters, minimap) lives in one
+# profile, defined at the resolution it was measured on and scaled to the
+# actual window size on demand. Scaled copies are cached per size, and each
+# one precomputes the (row slice, column slice) pair of every region, so
+# cropping is a plain frame[profile.slices[name]].
+# tools/roi_calibrator.py exports profiles to ROI_PROFILE_PATH.
+
+BASE_RESOLUTION = (2560, 1440)  # (width, height) the defaults were measured on
+ROI_PROFILE_PATH = "data/roi_profile.json"
+
+# (x, y, w, h) at BASE_RESOLUTION
+DEFAULT_REGIONS = {
+    "Population": (48, 1139, 103, 39),
+    "Idle": (186, 1132, 56, 45),
+    "Food Count": (51, 1210, 104, 48),
+    "Food Villagers": (186, 1210, 62, 44),
+    "Wood Count": (51, 1265, 101, 43),
+    "Wood Villagers": (189, 1261, 63, 43),
+    "Gold Count": (52, 1319, 105, 39),
+    "Gold Villagers": (187, 1317, 62, 38),
+    "Stone Count": (50, 1370, 104, 38),
+    "Stone Villagers": (186, 1367, 63, 39),
+    "Minimap": (1974, 810, 585, 606),
+}
+HUD_NAMES = tuple(name for name in DEFAULT_REGIONS if name != "Minimap")
+
+
+def merge_rects(rects, gap=0):
+    # Merges rectangles that overlap or lie within `gap` pixels of each other
+    # into their bounding boxes, until no two are that close
+    boxes = [[x, y, x + w, y + h] for x, y, w, h in rects]
+    merged = True
+    while merged:
+        merged = False
+        for i in range(len(boxes)):
+            for j in range(i + 1, len(boxes)):
+                a, b = boxes[i], boxes[j]
+                if a[0] - gap <= b[2] and b[0] - gap <= a[2] and a[1] - gap <= b[3] and b[1] - gap <= a[3]:
+                    boxes[i] = [min(a[0], b[0]), min(a[1], b[1]), max(a[2], b[2]), max(a[3], b[3])]
+                    del boxes[j]
+                    merged = True
+                    break
+            if merged:
+                break
+    return [(x1, y1, x2 - x1, y2 - y1) for x1, y1, x2, y2 in boxes]
+
+
+class ROIProfile:
+    def __init__(self, regions=None, resolution=BASE_RESOLUTION):
+        self.resolution = tuple(int(v) for v in resolution)
+        self.regions = {name: tuple(int(v) for v in rect) for name, rect in (regions or DEFAULT_REGIONS).items()}
+        self.slices = {name: (slice(y, y + h), slice(x, x + w)) for name, (x, y, w, h) in self.regions.items()}
+        self._scaled = {}
+
+    def __getitem__(self, name):
+        return self.regions[name]
+
+    def __contains__(self, name):
+        return name in self.regions
+
+    def crop(self, frame, name):
+        return frame[self.slices[name]]
+
+    def scaled(self, width, height):
+        size = (int(width), int(height))
+        if size == self.resolution:
+            return self
+        profile = self._scaled.get(size)
+        if profile is None:
+            sx, sy = size[0] / self.resolution[0], size[1] / self.resolution[1]
+            regions = {
+                name: (round(x * sx), round(y * sy), max(1, round(w * sx)), max(1, round(h * sy)))
+                for name, (x, y, w, h) in self.regions.items()
+            }
+            profile = self._scaled[size] = ROIProfile(regions, size)
+        return profile
+
+    def for_frame(self, frame):
+        return self.scaled(frame.shape[1], frame.shape[0])
+
+    def union(self, names=None):
+        rects = [self.regions[n] for n in (names or self.regions)]
+        x1 = min(r[0] for r in rects)
+        y1 = min(r[1] for r in rects)
+        x2 = max(r[0] + r[2] for r in rects)
+        y2 = max(r[1] + r[3] for r in rects)
+        return (x1, y1, x2 - x1, y2 - y1)
+
+    def capture_rects(self, names=None, gap=32):
+        # As few rectangles as cover the named regions: clusters of nearby
+        # regions share one rectangle, distant ones (HUD vs minimap) don't
+        return merge_rects([self.regions[n] for n in (names or self.regions)], gap)
+
+    def to_dict(self):
+        return {"resolution": list(self.resolution), "regions": {k: list(v) for k, v in self.regions.items()}}
+
+    @classmethod
+    def from_dict(cls, data):
+        return cls(data["regions"], data.get("resolution", BASE_RESOLUTION))
+
+    def save(self, path=ROI_PROFILE_PATH):
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        with open(path, "w") as f:
+            json.dump(self.to_dict(), f, indent=2)
+
+    @classmethod
+    def load(cls, path=ROI_PROFILE_PATH):
+        with open(path) as f:
+            data = json.load(f)
+        # Regions missing from a partial calibration keep their defaults,
+        # rescaled to the calibrated resolution
+        defaults = cls().scaled(*data.get("resolution", BASE_RESOLUTION)).regions
+        return cls.from_dict({**data, "regions": {**defaults, **data["regions"]}})
+
+
+# ========================
+# 🌐 Active profile
+# ========================
+
+_profile = None
+_screen_size = None
+
+
+def get_roi_profile():
+    global _profile
+    if _profile is None:
+        _profile = ROIProfile.load() if os.path.isfile(ROI_PROFILE_PATH) else ROIProfile()
+    return _profile
+
+
+def set_roi_profile(profile):
+    # A ROIProfile or the path of an exported one
+    global _profile
+    _profile = ROIProfile.load(profile) if isinstance(profile, str) else profile
+
+
+def screen_size():
+    # Size of the game view as last seen by the capture, else the profile's
+    return _screen_size or get_roi_profile().resolution
+
+
+def set_screen_size(width, height):
+    global _screen_size
+    _screen_size = (int(width), int(height))
+
+
+def from_base(x, y):
+    # Coordinates given at BASE_RESOLUTION (e.g. the env's action space) -> current screen
+    w, h = screen_size()
+    return int(x * w / BASE_RESOLUTION[0]), int(y * h / BASE_RESOLUTION[1])
+
+
+def to_base(x, y):
+    # Current screen coordinates (e.g. a detection box) -> BASE_RESOLUTION
+    w, h = screen_size()
+    return int(x * BASE_RESOLUTION[0] / w), int(y * BASE_RESOLUTION[1] / h)
@@ -0,0 +1,69 @@
+import time
+
+import cv2
+import numpy as np
+
+# ========================
+# ⏳ Settle detection
+# ========================
+# After an action the screen needs a moment to react. Instead of a fixed
+# sleep, poll frames and compare heavily downsampled grayscale crops of only
+# the regions that matter (HUD counters + around the action's target). Once
+# consecutive polls stop changing, the screen has settled.
+
+ACTION_AREA = 300  # Side of the square watched around each action coordinate
+
+
+def point_rects(points, frame_w, frame_h, size=ACTION_AREA):
+    # A size x size square around each point, kept inside the frame
+    rects = []
+    for x, y in points:
+        left = int(min(max(0, x - size // 2), max(0, frame_w - size)))
+        top = int(min(max(0, y - size // 2), max(0, frame_h - size)))
+        rects.append((left, top, min(size, frame_w), min(size, frame_h)))
+    return rects
+
+
+class SettleDetector:
+    def __init__(self, timeout=1.0, poll_interval=0.03, threshold=2.0, stable_polls=2, downscale=8, min_wait=0.05):
+        self.timeout = timeout
+        self.poll_interval = poll_interval
+        self.threshold = threshold          # Mean absolute gray-level change counted as "still"
+        self.stable_polls = stable_polls    # Consecutive still polls needed
+        self.downscale = downscale
+        self.min_wait = min_wait            # Give the game at least this long to start reacting
+
+    def signature(self, frame, rects):
+        parts = []
+        for x, y, w, h in rects:
+            crop = frame[y:y + h, x:x + w]
+            if crop.size == 0:
+                continue
+            small = cv2.resize(crop, (max(1, w // self.downscale), max(1, h // self.downscale)), interpolation=cv2.INTER_AREA)
+            if small.ndim == 3:
+                small = cv2.cvtColor(small, cv2.COLOR_BGR2GRAY)
+            parts.append(small.reshape(-1))
+        return np.concatenate(parts).astype(np.int16) if parts else np.zeros(0, dtype=np.int16)
+
+    def wait(self, read_frame, rects):
+        # read_frame() -> (frame, region); returns (last frame, region, seconds waited)
+        start = time.time()
+        time.sleep(self.min_wait)
+        previous = None
+        stable = 0
+        frame, region = None, None
+        while True:
+            frame, region = read_frame()
+            if frame is None:
+                break
+            current = self.signature(frame, rects)
+            if previous is not None and len(current) == len(previous):
+                change = np.abs(current - previous).mean() if len(current) else 0.0
+                stable = stable + 1 if change < self.threshold else 0
+                if stable >= self.stable_polls:
+                    break
+            previous = current
+            if time.time() - start >= self.timeout:
+                break
+            time.sleep(self.poll_interval)
+        return frame, region, time.time() - start
@@ -0,0 +1,330 @@
+import numpy as np
+
+from .minimap import MINIMAP_CHANNELS, get_minimap_parser
+
+# ========================
+# 🧪 Simulated AoE4 economy
+# ========================
+# A small, deterministic-per-seed model of the early economy: villagers
+# gathering from resource nodes, houses raising the population cap, mills
+# boosting food, and the Town Center training villagers from a queue. It
+# speaks the same protocol as the live backend (see backends.py): observe()
+# returns a frame plus the {"detections", "resources"} dict that
+# extract_game_info produces, and execute() takes AOEEnv's decoded actions.
+# Coordinates are screen pixels of a 2560x1440 game view.
+
+SCREEN_W, SCREEN_H = 2560, 1440
+WORLD_W, WORLD_H = 3 * SCREEN_W, 3 * SCREEN_H
+PAN_STEP = 400
+
+START_RESOURCES = {"food": 200, "wood": 150, "gold": 100, "stone": 0}
+START_VILLAGERS = 6
+VILLAGER_COST = 50  # food
+VILLAGER_TRAIN_TIME = 20.0
+MAX_QUEUE = 5
+HOUSE_COST = 50  # wood
+MILL_COST = 50  # wood
+BUILD_TIME = 25.0
+BASE_POP_CAP = 10
+HOUSE_POP = 10
+MAX_POP = 200
+
+# Resources per villager per game second
+GATHER_RATES = {"food": 0.65, "wood": 0.75, "gold": 0.65, "stone": 0.65}
+MILL_FOOD_BONUS = 0.15
+
+NODE_RESOURCE = {"Berry": "food", "Sheep": "food", "Forest": "wood", "Gold": "gold", "Stone": "stone"}
+
+CLASS_COLORS = {
+    "TownCenter": (40, 40, 200),
+    "Villager": (230, 200, 60),
+    "Scout": (230, 120, 60),
+    "House": (60, 60, 160),
+    "Mill": (60, 140, 160),
+    "Berry": (160, 40, 160),
+    "Sheep": (240, 240, 240),
+    "Forest": (30, 110, 30),
+    "Gold": (20, 200, 230),
+    "Stone": (150, 150, 150),
+}
+BACKGROUND = (40, 90, 60)
+
+
+class Entity:
+    __slots__ = ("cls", "x", "y", "w", "h", "task", "busy_until")
+
+    def __init__(self, cls, x, y, w, h):
+        self.cls = cls
+        self.x, self.y, self.w, self.h = x, y, w, h
+        self.task = "idle"  # villagers: idle / food / wood / gold / stone / build
+        self.busy_until = 0.0
+
+
+class SimulatedGame:
+    def __init__(self, seed=None, dt=2.0, frame_size=(720, 1280)):
+        self.rng = np.random.default_rng(seed)
+        self.dt = dt
+        self.frame_size = frame_size
+        self._scale = (frame_size[0] / SCREEN_H, frame_size[1] / SCREEN_W)
+        self._background = np.broadcast_to(np.array(BACKGROUND, dtype=np.uint8), (*frame_size, 3)).copy()
+        self._colors = {cls: np.array(color, dtype=np.uint8) for cls, color in CLASS_COLORS.items()}
+        self._default_color = np.array((255, 255, 255), dtype=np.uint8)
+        self.reset()
+
+    # ---- state ----
+
+    def reset(self):
+        self.time = 0.0
+        self.resources = dict(START_RESOURCES)
+        self.camera = [SCREEN_W, SCREEN_H]  # top-left of the view in world coordinates
+        self.explored = {tuple(self.camera)}  # Camera positions seen so far (the rest is fog)
+        self.queue = 0
+        self.queue_progress = 0.0
+        self.houses = 0
+        self.mills = 0
+        self.pending = []  # (finish_time, building class, x, y)
+        self.selection = []
+
+        cx, cy = WORLD_W // 2, WORLD_H // 2
+        self.town_center = Entity("TownCenter", cx - 160, cy - 160, 320, 320)
+        self.buildings = [self.town_center]
+        self.villagers = [self._spawn_villager() for _ in range(START_VILLAGERS)]
+        self.scout = Entity("Scout", cx + 250, cy + 150, 40, 60)
+
+        # Resource nodes scattered around the Town Center
+        self.nodes = []
+        for cls, count, size in (("Berry", 2, 120), ("Sheep", 4, 50), ("Forest", 3, 300), ("Gold", 1, 160), ("Stone", 1, 160)):
+            for _ in range(count):
+                angle = self.rng.uniform(0, 2 * np.pi)
+                dist = self.rng.uniform(450, 1100)
+                x = int(np.clip(cx + dist * np.cos(angle), 0, WORLD_W - size))
+                y = int(np.clip(cy + dist * np.sin(angle), 0, WORLD_H - size))
+                self.nodes.append(Entity(cls, x, y, size, size))
+
+    def _spawn_villager(self):
+        tc = self.town_center
+        x = tc.x + tc.w + int(self.rng.integers(0, 120))
+        y = tc.y + int(self.rng.integers(0, tc.h))
+        return Entity("Villager", x, y, 40, 60)
+
+    @property
+    def population(self):
+        return len(self.villagers) + 1  # + scout
+
+    @property
+    def population_cap(self):
+        return min(MAX_POP, BASE_POP_CAP + HOUSE_POP * self.houses)
+
+    # ---- simulation ----
+
+    def advance(self, seconds):
+        end = self.time + seconds
+
+        # Town Center production
+        if self.queue:
+            self.queue_progress += seconds
+            while self.queue and self.queue_progress >= VILLAGER_TRAIN_TIME and self.population < self.population_cap:
+                self.queue -= 1
+                self.queue_progress -= VILLAGER_TRAIN_TIME
+                self.villagers.append(self._spawn_villager())
+            if not self.queue or self.population >= self.population_cap:
+                self.queue_progress = min(self.queue_progress, VILLAGER_TRAIN_TIME)
+        else:
+            self.queue_progress = 0.0
+
+        # Construction
+        for item in [p for p in self.pending if p[0] <= end]:
+            self.pending.remove(item)
+            _, cls, x, y = item
+            self.buildings.append(Entity(cls, x, y, 160, 160))
+            if cls == "House":
+                self.houses += 1
+            else:
+                self.mills += 1
+        for v in self.villagers:
+            if v.task == "build" and v.busy_until <= end:
+                v.task = "idle"
+
+        # Gathering
+        counts = self.villager_counts()
+        for res, rate in GATHER_RATES.items():
+            if res == "food" and self.mills:
+                rate *= 1 + MILL_FOOD_BONUS
+            self.resources[res] += counts[res] * rate * seconds
+
+        self.time = end
+
+    def villager_counts(self):
+        counts = {"idle": 0, "food": 0, "wood": 0, "gold": 0, "stone": 0, "build": 0}
+        for v in self.villagers:
+            counts[v.task] += 1
+        return counts
+
+    # ---- actions ----
+
+    def _to_world(self, x, y):
+        return x + self.camera[0], y + self.camera[1]
+
+    def _hit(self, entities, x, y):
+        wx, wy = self._to_world(x, y)
+        for e in entities:
+            if e.x <= wx <= e.x + e.w and e.y <= wy <= e.y + e.h:
+                return e
+        return None
+
+    def _pick_villager(self, x=None, y=None):
+        # A selected villager if any, otherwise the free villager nearest the target
+        candidates = [v for v in self.selection if v.task != "build"] or [v for v in self.villagers if v.task != "build"]
+        if not candidates:
+            return None
+        if x is None:
+            return candidates[0]
+        wx, wy = self._to_world(x, y)
+        return min(candidates, key=lambda v: (v.x - wx) ** 2 + (v.y - wy) ** 2)
+
+    def _build(self, cls, cost, x, y):
+        if self.resources["wood"] < cost:
+            return
+        villager = self._pick_villager(x, y)
+        if villager is None:
+            return
+        self.resources["wood"] -= cost
+        villager.task = "build"
+        villager.busy_until = self.time + BUILD_TIME
+        wx, wy = self._to_world(x, y)
+        self.pending.append((self.time + BUILD_TIME, cls, wx, wy))
+
+    def execute(self, action_type, x1, y1, x2, y2):
+        if action_type == 0:
+            # Nothing is ever garrisoned in the simulation; selects the TC
+            self.selection = []
+        elif action_type == 1:
+            self._build("House", HOUSE_COST, x1, y1)
+        elif action_type == 2:
+            self._build("Mill", MILL_COST, x1, y1)
+        elif action_type == 3:
+            if self.resources["food"] >= VILLAGER_COST and self.queue < MAX_QUEUE:
+                self.resources["food"] -= VILLAGER_COST
+                self.queue += 1
+        elif action_type == 4:
+            hit = self._hit(self.villagers, x1, y1)
+            self.selection = [hit] if hit else []
+        elif action_type == 5:
+            # Double click selects every villager on screen doing the same task
+            hit = self._hit(self.villagers, x1, y1)
+            self.selection = [v for v in self.villagers if hit and v.task == hit.task and self._on_screen(v)]
+        elif action_type == 6:
+            node = self._hit(self.nodes, x1, y1)
+            for v in self.selection:
+                if v.task != "build":
+                    v.task = NODE_RESOURCE[node.cls] if node else "idle"
+        elif action_type == 7:
+            wx1, wy1 = self._to_world(min(x1, x2), min(y1, y2))
+            wx2, wy2 = self._to_world(max(x1, x2), max(y1, y2))
+            self.selection = [v for v in self.villagers if wx1 <= v.x <= wx2 and wy1 <= v.y <= wy2]
+        elif 8 <= action_type <= 11:
+            dx, dy = {8: (0, -PAN_STEP), 9: (0, PAN_STEP), 10: (-PAN_STEP, 0), 11: (PAN_STEP, 0)}[action_type]
+            self.camera[0] = int(np.clip(self.camera[0] + dx, 0, WORLD_W - SCREEN_W))
+            self.camera[1] = int(np.clip(self.camera[1] + dy, 0, WORLD_H - SCREEN_H))
+            self.explored.add(tuple(self.camera))
+        # 12 / 13 rotate the camera: no effect on the simulated economy
+
+    # ---- perception ----
+
+    def _on_screen(self, e):
+        cx, cy = self.camera
+        return e.x + e.w > cx and e.x < cx + SCREEN_W and e.y + e.h > cy and e.y < cy + SCREEN_H
+
+    def detections(self):
+        cx, cy = self.camera
+        out = []
+        for e in self.nodes + self.buildings + self.villagers + [self.scout]:
+            if self._on_screen(e):
+                x1, y1 = max(0, e.x - cx), max(0, e.y - cy)
+                x2, y2 = min(SCREEN_W, e.x + e.w - cx), min(SCREEN_H, e.y + e.h - cy)
+                out.append({"class": e.cls, "box": [int(x1), int(y1), int(x2), int(y2)], "conf": 1.0})
+        return out
+
+    def _coverage(self, entities, rows, cols):
+        # Share of each world cell covered by the entities' rectangles
+        if not entities:
+            return np.zeros((rows, cols), dtype=np.float32)
+        r = np.array([(e.x, e.y, e.w, e.h) for e in entities], dtype=np.float32)
+        xs = np.linspace(0, WORLD_W, cols + 1, dtype=np.float32)
+        ys = np.linspace(0, WORLD_H, rows + 1, dtype=np.float32)
+        ox = np.clip(np.minimum(r[:, None, 0] + r[:, None, 2], xs[None, 1:]) - np.maximum(r[:, None, 0], xs[None, :-1]), 0, None)
+        oy = np.clip(np.minimum(r[:, None, 1] + r[:, None, 3], ys[None, 1:]) - np.maximum(r[:, None, 1], ys[None, :-1]), 0, None)
+        share = np.einsum("nr,nc->rc", oy, ox) / ((WORLD_W / cols) * (WORLD_H / rows))
+        return np.minimum(share, 1.0)
+
+    def minimap_grid(self, grid):
+        # The parser's (channels, rows, cols) grid, straight from world state.
+        # No enemies in the simulation; fog is every cell the camera never showed.
+        rows, cols = grid
+        out = np.zeros((len(MINIMAP_CHANNELS), rows, cols), dtype=np.float32)
+        out[MINIMAP_CHANNELS.index("own")] = self._coverage(self.buildings + self.villagers + [self.scout], rows, cols)
+        out[MINIMAP_CHANNELS.index("resources")] = self._coverage(self.nodes, rows, cols)
+        cy = (np.arange(rows) + 0.5) * WORLD_H / rows
+        cx = (np.arange(cols) + 0.5) * WORLD_W / cols
+        seen = np.zeros((rows, cols), dtype=bool)
+        for x, y in self.explored:
+            seen |= ((cy >= y) & (cy < y + SCREEN_H))[:, None] & ((cx >= x) & (cx < x + SCREEN_W))[None, :]
+        out[MINIMAP_CHANNELS.index("fog")] = ~seen
+        return out
+
+    def resources_dict(self):
+        counts = self.villager_counts()
+        return {
+            "current_population": self.population,
+            "max_population": self.population_cap,
+            "idle_villagers": counts["idle"],
+            "food": int(self.resources["food"]),
+            "food_villagers": counts["food"],
+            "wood": int(self.resources["wood"]),
+            "wood_villagers": counts["wood"],
+            "gold": int(self.resources["gold"]),
+            "gold_villagers": counts["gold"],
+            "stone": int(self.resources["stone"]),
+            "stone_villagers": counts["stone"],
+        }
+
+    def render(self, detections):
+        frame = self._background.copy()
+        sy, sx = self._scale
+        for d in detections:
+            x1, y1, x2, y2 = d["box"]
+            frame[int(y1 * sy):int(y2 * sy) + 1, int(x1 * sx):int(x2 * sx) + 1] = self._colors.get(d["class"], self._default_color)
+        return frame
+
+
+class SimulatedGameBackend:
+    live = False
+
+    def __init__(self, seed=None, dt=2.0, frame_size=(720, 1280)):
+        self.game = SimulatedGame(seed=seed, dt=dt, frame_size=frame_size)
+        self.minimap = False
+
+    def request(self, resources=(), classes=(), minimap=False):
+        # Resources and classes are always complete; only the minimap is opt-in
+        self.minimap = self.minimap or minimap
+
+    def reset(self):
+        self.game.reset()
+
+    def observe(self):
+        detections = self.game.detections()
+        info = {"detections": detections, "resources": self.game.resources_dict()}
+        if self.minimap:
+            info["minimap"] = self.game.minimap_grid(get_minimap_parser().grid)
+        return self.game.render(detections), info
+
+    def execute(self, action_type, x1, y1, x2, y2, detections):
+        self.game.execute(action_type, x1, y1, x2, y2)
+
+    def settle(self, action=None):
+        # One env step is dt seconds of game time; no wall-clock wait
+        self.game.advance(self.game.dt)
+        return 0.0
+
+    def close(self):
+        pass
@@ -0,0 +1,159 @@
+import time
+
+import cv2
+import numpy as np
+
+from .detections import Detections
+
+# ========================
+# 🎯 Object tracker
+# ========================
+# Gives detections persistent IDs across frames. On a keyframe, YOLO boxes are
+# matched to the existing tracks by class-gated IoU (greedy, best pairs
+# first); matched tracks take the new box and refine their velocity, the rest
+# start new tracks. Between keyframes every track is propagated by its own
+# velocity plus the camera pan, estimated by phase correlation of two
+# downsampled frames, so positions stay current without running YOLO.
+
+def iou_matrix(a, b):
+    # (N, 4) x (M, 4) xyxy boxes -> (N, M) IoU
+    if len(a) == 0 or len(b) == 0:
+        return np.zeros((len(a), len(b)))
+    x1 = np.maximum(a[:, None, 0], b[None, :, 0])
+    y1 = np.maximum(a[:, None, 1], b[None, :, 1])
+    x2 = np.minimum(a[:, None, 2], b[None, :, 2])
+    y2 = np.minimum(a[:, None, 3], b[None, :, 3])
+    inter = np.clip(x2 - x1, 0, None) * np.clip(y2 - y1, 0, None)
+    area_a = (a[:, 2] - a[:, 0]) * (a[:, 3] - a[:, 1])
+    area_b = (b[:, 2] - b[:, 0]) * (b[:, 3] - b[:, 1])
+    return inter / np.maximum(area_a[:, None] + area_b[None, :] - inter, 1e-9)
+
+
+class ObjectTracker:
+    def __init__(self, iou_threshold=0.3, max_age=2.0, velocity_gain=0.5, camera_motion=True, motion_downscale=8):
+        self.iou_threshold = iou_threshold
+        self.max_age = max_age                # Seconds a track survives without being re-detected
+        self.velocity_gain = velocity_gain    # How far each keyframe pulls the velocity towards the measured one
+        self.camera_motion = camera_motion
+        self.motion_downscale = motion_downscale
+        self.reset()
+
+    def reset(self):
+        self.names = {}
+        self._boxes = np.empty((0, 4))
+        self._velocity = np.empty((0, 4))    # Pixels per second, excluding camera pans
+        self._class_ids = np.empty(0, dtype=np.int32)
+        self._conf = np.empty(0, dtype=np.float32)
+        self._ids = np.empty(0, dtype=np.int64)
+        self._last_seen = np.empty(0)
+        self._next_id = 1
+        self._time = None
+        self._previous_gray = None
+
+    def __len__(self):
+        return len(self._ids)
+
+    # ---- motion ----
+
+    def camera_shift(self, frame):
+        # Screen-space (dx, dy) the view moved since the last frame given
+        small = cv2.resize(frame, (frame.shape[1] // self.motion_downscale, frame.shape[0] // self.motion_downscale), interpolation=cv2.INTER_AREA)
+        if small.ndim == 3:
+            small = cv2.cvtColor(small, cv2.COLOR_BGR2GRAY)
+        gray = small.astype(np.float32)
+        previous, self._previous_gray = self._previous_gray, gray
+        if previous is None or previous.shape != gray.shape:
+            return 0.0, 0.0
+        (dx, dy), response = cv2.phaseCorrelate(previous, gray)
+        if response < 0.1:  # No clear peak: scene changed rather than panned
+            return 0.0, 0.0
+        return dx * self.motion_downscale, dy * self.motion_downscale
+
+    def predict(self, timestamp=None, frame=None):
+        # Moves every track to `timestamp` without a detection pass
+        timestamp = time.time() if timestamp is None else timestamp
+        if self._time is not None and len(self._ids):
+            dt = max(0.0, timestamp - self._time)
+            self._boxes += self._velocity * dt
+        if frame is not None and self.camera_motion:
+            dx, dy = self.camera_shift(frame)
+            self._boxes += (dx, dy, dx, dy)
+        self._time = timestamp
+        self._expire(timestamp)
+        return self.objects()
+
+    def _expire(self, timestamp):
+        keep = timestamp - self._last_seen <= self.max_age
+        if not keep.all():
+            self._select(keep)
+
+    def _select(self, mask):
+        self._boxes = self._boxes[mask]
+        self._velocity = self._velocity[mask]
+        self._class_ids = self._class_ids[mask]
+        self._conf = self._conf[mask]
+        self._ids = self._ids[mask]
+        self._last_seen = self._last_seen[mask]
+
+    # ---- association ----
+
+    def _match(self, boxes, class_ids):
+        # Greedy class-gated IoU assignment -> (track indices, detection indices)
+        iou = iou_matrix(self._boxes, boxes)
+        iou[self._class_ids[:, None] != class_ids[None, :]] = 0
+        tracks, dets = np.nonzero(iou >= self.iou_threshold)
+        order = np.argsort(-iou[tracks, dets], kind="stable")
+        used_t, used_d = set(), set()
+        matched_t, matched_d = [], []
+        for t, d in zip(tracks[order].tolist(), dets[order].tolist()):
+            if t in used_t or d in used_d:
+                continue
+            used_t.add(t)
+            used_d.add(d)
+            matched_t.append(t)
+            matched_d.append(d)
+        return np.array(matched_t, dtype=int), np.array(matched_d, dtype=int)
+
+    def update(self, detections, timestamp=None, frame=None):
+        # Keyframe: fold a fresh detection pass into the tracks
+        timestamp = time.time() if timestamp is None else timestamp
+        if not isinstance(detections, Detections):
+            detections = list(detections)
+            # Classes not seen before get new ids; existing ids (and tracks) keep theirs
+            names = dict(self.names)
+            known = set(names.values())
+            for class_name in dict.fromkeys(d["class"] for d in detections):
+                if class_name not in known:
+                    names[max(names, default=-1) + 1] = class_name
+                    known.add(class_name)
+            detections = Detections.from_dicts(detections, names)
+        if detections.names:
+            self.names = detections.names
+        self.predict(timestamp, frame)
+
+        boxes = detections.boxes.astype(np.float64)
+        t_idx, d_idx = self._match(boxes, detections.class_ids)
+        if len(t_idx):
+            # Residual against the prediction corrects the velocity estimate
+            dt = np.maximum(timestamp - self._last_seen[t_idx], 1e-3)[:, None]
+            residual = boxes[d_idx] - self._boxes[t_idx]
+            self._velocity[t_idx] += self.velocity_gain * residual / dt
+            self._boxes[t_idx] = boxes[d_idx]
+            self._conf[t_idx] = detections.conf[d_idx]
+            self._last_seen[t_idx] = timestamp
+
+        new = np.ones(len(detections), dtype=bool)
+        new[d_idx] = False
+        n_new = int(new.sum())
+        if n_new:
+            self._boxes = np.concatenate([self._boxes, boxes[new]])
+            self._velocity = np.concatenate([self._velocity, np.zeros((n_new, 4))])
+            self._class_ids = np.concatenate([self._class_ids, detections.class_ids[new]])
+            self._conf = np.concatenate([self._conf, detections.conf[new]])
+            self._ids = np.concatenate([self._ids, np.arange(self._next_id, self._next_id + n_new)])
+            self._last_seen = np.concatenate([self._last_seen, np.full(n_new, timestamp)])
+            self._next_id += n_new
+        return self.objects()
+
+    def objects(self):
+        return Detections(np.rint(self._boxes), self._class_ids, self._conf, self.names, self._ids)
@@ -0,0 +1,302 @@
+import glob
+import json
+import os
+import queue
+import threading
+import time
+
+import gym
+import numpy as np
+
+# ========================
+# 📼 Trajectory recordings
+# ========================
+# TrajectoryRecorder wraps an env and streams every step to disk; row t of a
+# recording holds the observation the policy saw, the action it took, the
+# reward and done flag that followed, and the numeric scalars of the step's
+# info dict. Rows go into fixed-size chunks, one .npy memory map per field:
+#   chunk_00000.obs.npy        (or chunk_00000.obs.<key>.npy for Dict observations)
+#   chunk_00000.action.npy
+#   chunk_00000.reward.npy / .done.npy / .info.<key>.npy
+#   episodes.npy               (start, length, total reward, done) per episode
+#   meta.json                  field shapes and dtypes, chunk size, step count
+# Chunks are preallocated; the last one is only valid up to meta["steps"].
+# TrajectoryDataset reads one or many recordings back in batches, gathering
+# rows straight from the memory maps, so nothing is loaded whole.
+
+EPISODE_INDEX_DTYPE = np.dtype([
+    ("start", np.int64),
+    ("length", np.int64),
+    ("reward", np.float64),
+    ("done", np.bool_),
+])
+
+
+def observation_fields(space):
+    # {field: (shape, dtype)} for an observation space
+    if isinstance(space, gym.spaces.Dict):
+        return {f"obs.{key}": (s.shape, s.dtype) for key, s in space.spaces.items()}
+    return {"obs": (space.shape, space.dtype)}
+
+
+def session_directory(root, rank=0):
+    # One recording per worker and run, so repeated sessions accumulate
+    return os.path.join(root, f"{time.strftime('%Y%m%d_%H%M%S')}_env{rank}")
+
+
+class TrajectoryRecorder(gym.Wrapper):
+    def __init__(self, env, directory, chunk_size=1024):
+        super().__init__(env)
+        os.makedirs(directory, exist_ok=True)
+        self.directory = directory
+        self.chunk_size = chunk_size
+        self.fields = observation_fields(env.observation_space)
+        self.fields["action"] = (env.action_space.shape, np.int64)
+        self.fields["reward"] = ((), np.float32)
+        self.fields["done"] = ((), np.bool_)
+        self.info_keys = None  # Numeric info scalars, fixed by the first step
+        self.steps = 0  # Completed rows
+        self._chunk = None
+        self._chunk_id = -1
+        self._pending = False  # Row self.steps holds an observation awaiting its action
+        self._episodes = []
+        self._episode_start = None
+        self._episode_reward = 0.0
+
+    # ---- writing ----
+
+    def _open_chunk(self):
+        self._close_chunk()
+        self._chunk_id += 1
+        self._chunk = {
+            name: np.lib.format.open_memmap(self._chunk_path(name), mode="w+", dtype=dtype, shape=(self.chunk_size, *shape))
+            for name, (shape, dtype) in self.fields.items()
+        }
+
+    def _close_chunk(self):
+        if self._chunk is not None:
+            for array in self._chunk.values():
+                array.flush()
+            self._chunk = None
+
+    def _chunk_path(self, name, chunk_id=None):
+        return os.path.join(self.directory, f"chunk_{self._chunk_id if chunk_id is None else chunk_id:05d}.{name}.npy")
+
+    def _write_obs(self, obs):
+        if self.steps // self.chunk_size != self._chunk_id:
+            self._open_chunk()
+        row = self.steps % self.chunk_size
+        if isinstance(obs, dict):
+            for key, value in obs.items():
+                self._chunk[f"obs.{key}"][row] = value
+        else:
+            self._chunk["obs"][row] = obs
+        self._pending = True
+
+    def _write_step(self, action, reward, done, info):
+        if self.info_keys is None:
+            self.info_keys = [k for k, v in info.items() if isinstance(v, (bool, int, float, np.number))]
+            for key in self.info_keys:
+                self.fields[f"info.{key}"] = ((), np.float32)
+            # Add the info columns to the already open chunk
+            for key in self.info_keys:
+                self._chunk[f"info.{key}"] = np.lib.format.open_memmap(
+                    self._chunk_path(f"info.{key}"), mode="w+", dtype=np.float32, shape=(self.chunk_size,))
+        row = self.steps % self.chunk_size
+        self._chunk["action"][row] = action
+        self._chunk["reward"][row] = reward
+        self._chunk["done"][row] = done
+        for key in self.info_keys:
+            self._chunk[f"info.{key}"][row] = info.get(key, 0)
+        self.steps += 1
+        self._pending = False
+        self._episode_reward += reward
+
+    def _end_episode(self, done):
+        if self._episode_start is not None and self.steps > self._episode_start:
+            self._episodes.append((self._episode_start, self.steps - self._episode_start, self._episode_reward, done))
+        self._episode_start = None
+        self.flush_index()
+
+    def reset(self, **kwargs):
+        obs = self.env.reset(**kwargs)
+        self._end_episode(False)  # A reset before done cuts the episode short
+        self._episode_start = self.steps
+        self._episode_reward = 0.0
+        self._write_obs(obs)
+        return obs
+
+    def step(self, action):
+        obs, reward, done, info = self.env.step(action)
+        if self._pending:
+            self._write_step(action, reward, done, info)
+            if done:
+                self._end_episode(True)
+            else:
+                self._write_obs(obs)
+        return obs, reward, done, info
+
+    def flush_index(self):
+        # Rewritten after every episode, so a crashed session still leaves a readable recording
+        if self._chunk is not None:
+            for array in self._chunk.values():
+                array.flush()
+        np.save(os.path.join(self.directory, "episodes.npy"), np.array(self._episodes, dtype=EPISODE_INDEX_DTYPE))
+        fields = {name: {"shape": list(shape), "dtype": np.dtype(dtype).str} for name, (shape, dtype) in self.fields.items()}
+        with open(os.path.join(self.directory, "meta.json"), "w") as f:
+            json.dump({"format": "trajectory", "steps": self.steps, "chunks": self._chunk_id + 1,
+                       "chunk_size": self.chunk_size, "fields": fields}, f, indent=2)
+
+    def close(self):
+        self._end_episode(False)
+        self._close_chunk()
+        self.env.close()
+
+
+# ========================
+# 📚 Offline dataset
+# ========================
+
+class _Recording:
+    def __init__(self, directory):
+        self.directory = directory
+        with open(os.path.join(directory, "meta.json")) as f:
+            self.meta = json.load(f)
+        self.steps = self.meta["steps"]
+        self.chunk_size = self.meta["chunk_size"]
+        self.episodes = np.load(os.path.join(directory, "episodes.npy"))
+        self._maps = {}
+
+    def column(self, name, chunk_id):
+        key = (name, chunk_id)
+        array = self._maps.get(key)
+        if array is None:
+            array = np.load(os.path.join(self.directory, f"chunk_{chunk_id:05d}.{name}.npy"), mmap_mode="r")
+            self._maps[key] = array
+        return array
+
+
+def find_recordings(root):
+    if os.path.exists(os.path.join(root, "meta.json")):
+        return [root]
+    return sorted(os.path.dirname(p) for p in glob.glob(os.path.join(root, "**", "meta.json"), recursive=True))
+
+
+class TrajectoryDataset:
+    def __init__(self, paths, fields=None):
+        # paths: a recording, a directory of recordings, or a list of either
+        if isinstance(paths, str):
+            paths = [paths]
+        directories = [d for p in paths for d in find_recordings(p)]
+        self.recordings = [r for r in map(_Recording, directories) if r.meta.get("format") == "trajectory" and r.steps]
+        if not self.recordings:
+            raise ValueError(f"No trajectory recordings in {paths}")
+
+        first = self.recordings[0].meta["fields"]
+        if fields is None:
+            # Fields every recording has (info columns can differ between versions)
+            fields = [name for name in first if all(name in r.meta["fields"] for r in self.recordings)]
+        self.fields = {name: (tuple(first[name]["shape"]), np.dtype(first[name]["dtype"])) for name in fields}
+        for r in self.recordings:
+            for name, (shape, _) in self.fields.items():
+                if tuple(r.meta["fields"][name]["shape"]) != shape:
+                    raise ValueError(f"{r.directory}: {name} has shape {r.meta['fields'][name]['shape']}, expected {list(shape)}")
+        self._offsets = np.cumsum([0] + [r.steps for r in self.recordings])
+        self._returns = {}
+
+    def __len__(self):
+        return int(self._offsets[-1])
+
+    @property
+    def observation_shapes(self):
+        return {name: shape for name, (shape, _) in self.fields.items() if name == "obs" or name.startswith("obs.")}
+
+    @property
+    def episodes(self):
+        return sum(len(r.episodes) for r in self.recordings)
+
+    def returns(self, gamma=0.99):
+        # Discounted return-to-go of every row, episodes cut at done flags
+        if gamma not in self._returns:
+            out = np.zeros(len(self), dtype=np.float32)
+            position = len(self)
+            for r in reversed(self.recordings):
+                running = 0.0
+                for chunk_id in reversed(range((r.steps - 1) // r.chunk_size + 1)):
+                    n = min(r.chunk_size, r.steps - chunk_id * r.chunk_size)
+                    rewards = r.column("reward", chunk_id)[:n]
+                    dones = r.column("done", chunk_id)[:n]
+                    for i in range(n - 1, -1, -1):
+                        running = float(rewards[i]) + (0.0 if dones[i] else gamma * running)
+                        out[position - n + i] = running
+                    position -= n
+                # The recording's last episode may be unfinished; its tail is bootstrapped with 0
+            self._returns[gamma] = out
+        return self._returns[gamma]
+
+    def get(self, indices, gamma=None):
+        # Rows at the given global indices -> {"obs", "action", "reward", "done", ...}
+        # ("obs" is a dict for Dict observations). Sorted indices read fastest.
+        indices = np.asarray(indices, dtype=np.int64)
+        batch = {name: np.empty((len(indices), *shape), dtype=dtype) for name, (shape, dtype) in self.fields.items()}
+        recording_ids = np.searchsorted(self._offsets, indices, side="right") - 1
+        for rid in np.unique(recording_ids):
+            r = self.recordings[rid]
+            positions = np.flatnonzero(recording_ids == rid)
+            local = indices[positions] - self._offsets[rid]
+            chunk_ids = local // r.chunk_size
+            for cid in np.unique(chunk_ids):
+                selected = chunk_ids == cid
+                rows = local[selected] % r.chunk_size
+                for name in self.fields:
+                    batch[name][positions[selected]] = r.column(name, int(cid))[rows]
+        if gamma is not None:
+            batch["return"] = self.returns(gamma)[indices]
+
+        obs_keys = [name for name in batch if name.startswith("obs.")]
+        if obs_keys:
+            batch["obs"] = {name[4:]: batch.pop(name) for name in obs_keys}
+        return batch
+
+    def batches(self, batch_size=64, shuffle=True, seed=None, drop_last=False, gamma=None, prefetch=2):
+        # One pass over the dataset. With prefetch > 0 the next batches are
+        # gathered on a background thread while the caller trains on this one.
+        order = np.random.default_rng(seed).permutation(len(self)) if shuffle else np.arange(len(self))
+        stop = len(order) - len(order) % batch_size if drop_last else len(order)
+        # Each batch is read in index order: neighbouring rows share pages of the memory map
+        slices = [np.sort(order[i:i + batch_size]) for i in range(0, stop, batch_size)]
+        if prefetch <= 0:
+            for indices in slices:
+                yield self.get(indices, gamma)
+            return
+
+        ready = queue.Queue(maxsize=prefetch)
+        cancelled = threading.Event()
+
+        def load():
+            try:
+                for indices in slices:
+                    if cancelled.is_set():
+                        return
+                    ready.put(self.get(indices, gamma))
+            except Exception as e:
+                ready.put(e)
+            ready.put(None)
+
+        worker = threading.Thread(target=load, name="trajectory-loader", daemon=True)
+        worker.start()
+        try:
+            while True:
+                batch = ready.get()
+                if batch is None:
+                    break
+                if isinstance(batch, Exception):
+                    raise batch
+                yield batch
+        finally:
+            cancelled.set()
+            while worker.is_alive():
+                try:
+                    ready.get_nowait()
+                except queue.Empty:
+                    worker.join(0.01)
@@ -1,78 +1,240 @@
-import cv2
-import numpy as np
-import pyautogui
-from ultralytics import YOLO
-import pytesseract
-import pygetwindow as gw
+import os
+import threading
+from collections.abc import Mapping
 
-pytesseract.pytesseract.tesseract_cmd = r'C:\\Program Files\\Tesseract-OCR\\tesseract.exe'
+from .frame_source import LiveWindowSource
+from .digit_ocr import DIGIT_TEMPLATE_PATH, binarize, get_recognizer
+from .ocr_cache import OCRCache
+from .detections import Detections
+from .detection_gate import DetectionGate
+from .yolo_backend import YoloDetector
+from .debug_renderer import DebugRenderer
+from .minimap import parse_minimap
+from .profiling import profiled, profiler
+from .roi_profile import DEFAULT_REGIONS, get_roi_profile
+
+# Nothing heavy happens at import: the YOLO model loads on the first
+# detection, pytesseract on the first Tesseract read, and the debug renderer
+# starts on the first show_detections() (never when headless).
+
+TESSERACT_CMD = os.environ.get("TESSERACT_CMD") or (r'C:\Program Files\Tesseract-OCR\tesseract.exe' if os.name == "nt" else None)
+HEADLESS = os.environ.get("AOE4_HEADLESS", "") not in ("", "0")
 
 YOLO_MODEL_PATH = "data/models/best.pt"
+# Inference backend settings, see yolo_backend.py and set_yolo_backend()
+YOLO_CONFIG = {"backend": "torch", "imgsz": 640, "int8": False, "batch": 1}
 WINDOW_NAME = "AOE4 Game View"
 
-POPULATION_REGION = (48, 1139, 103, 39)
-IDLE_VILLAGER_REGION = (186, 1132, 56, 45)
+# Defaults at 2560x1440; read_hud uses the active ROI profile scaled to each frame
+POPULATION_REGION = DEFAULT_REGIONS["Population"]
+IDLE_VILLAGER_REGION = DEFAULT_REGIONS["Idle"]
+
+FOOD_COUNT_REGION = DEFAULT_REGIONS["Food Count"]
+FOOD_VILLAGER_REGION = DEFAULT_REGIONS["Food Villagers"]
+
+WOOD_COUNT_REGION = DEFAULT_REGIONS["Wood Count"]
+WOOD_VILLAGER_REGION = DEFAULT_REGIONS["Wood Villagers"]
+
+GOLD_COUNT_REGION = DEFAULT_REGIONS["Gold Count"]
+GOLD_VILLAGER_REGION = DEFAULT_REGIONS["Gold Villagers"]
+
+STONE_COUNT_REGION = DEFAULT_REGIONS["Stone Count"]
+STONE_VILLAGER_REGION = DEFAULT_REGIONS["Stone Villagers"]
+
+# (label, region, resource keys) — two keys means a "current/max" fraction
+HUD_REGIONS = [
+    ("Population", POPULATION_REGION, ("current_population", "max_population")),
+    ("Idle", IDLE_VILLAGER_REGION, ("idle_villagers",)),
+    ("Food Count", FOOD_COUNT_REGION, ("food",)),
+    ("Food Villagers", FOOD_VILLAGER_REGION, ("food_villagers",)),
+    ("Wood Count", WOOD_COUNT_REGION, ("wood",)),
+    ("Wood Villagers", WOOD_VILLAGER_REGION, ("wood_villagers",)),
+    ("Gold Count", GOLD_COUNT_REGION, ("gold",)),
+    ("Gold Villagers", GOLD_VILLAGER_REGION, ("gold_villagers",)),
+    ("Stone Count", STONE_COUNT_REGION, ("stone",)),
+    ("Stone Villagers", STONE_VILLAGER_REGION, ("stone_villagers",)),
+]
+
+RESOURCE_KEYS = tuple(k for _, _, keys in HUD_REGIONS for k in keys)
+
+_hud_layouts = {}
+
+def hud_regions_for(frame):
+    # HUD_REGIONS with the active profile's rectangles for this frame size
+    return hud_regions_for_size(frame.shape[1], frame.shape[0])
+
+def hud_regions_for_size(width, height):
+    profile = get_roi_profile().scaled(width, height)
+    layout = _hud_layouts.get(profile)
+    if layout is None:
+        layout = _hud_layouts[profile] = [(label, profile[label], keys) for label, _, keys in HUD_REGIONS]
+    return layout
+
+# "templates" reads the HUD in-process with the fitted digit templates,
+# "tesseract" shells out per region (used automatically when no templates exist)
+OCR_BACKEND = "templates"
+_warned_no_templates = False
+
+# Parsed HUD values keyed on a fingerprint of each thresholded crop
+OCR_CACHE_ENABLED = True
+ocr_cache = OCRCache(max_entries=64)
+
+# Optional frame-difference gate in front of YOLO (see enable_detection_gate)
+detection_gate = None
+
+# Debug overlays run on their own thread (see debug_renderer.py)
+debug_renderer = None
+
+def set_headless(headless=True):
+    # Headless runs never open windows: show_detections and env rendering become no-ops
+    global HEADLESS
+    HEADLESS = headless
 
-FOOD_COUNT_REGION = (51, 1210, 104, 48)
-FOOD_VILLAGER_REGION = (186, 1210, 62, 44)
+def is_headless():
+    return HEADLESS
 
-WOOD_COUNT_REGION = (51, 1265, 101, 43)
-WOOD_VILLAGER_REGION = (189, 1261, 63, 43)
+def get_debug_renderer():
+    # The game view window with detections and HUD regions, created on first
+    # use; None when headless unless one was set explicitly (e.g. video only)
+    global debug_renderer
+    if debug_renderer is None and not HEADLESS:
+        debug_renderer = DebugRenderer(WINDOW_NAME, hud_regions=True)
+    return debug_renderer
 
-GOLD_COUNT_REGION = (52, 1319, 105, 39)
-GOLD_VILLAGER_REGION = (187, 1317, 62, 38)
+def set_debug_renderer(renderer):
+    global debug_renderer
+    close_debug_renderer()
+    debug_renderer = renderer
 
-STONE_COUNT_REGION = (50, 1370, 104, 38)
-STONE_VILLAGER_REGION = (186, 1367, 63, 39)
+def close_debug_renderer():
+    if debug_renderer is not None:
+        debug_renderer.close()
 
-cv2.namedWindow(WINDOW_NAME, cv2.WINDOW_NORMAL)
-cv2.resizeWindow(WINDOW_NAME, 960, 540)
-cv2.moveWindow(WINDOW_NAME, -1500, 500)
+def _load_detector(**config):
+    try:
+        return YoloDetector(YOLO_MODEL_PATH, **config)
+    except Exception as e:
+        print(f"[Vision] Could not load YOLO model: {e}")
+        return None
 
-try:
-    yolo_model = YOLO(YOLO_MODEL_PATH)
-except Exception as e:
-    print(f"[Vision] Could not load YOLO model: {e}")
-    yolo_model = None
+yolo_model = None  # Set by get_yolo_model() on first use
+_yolo_loaded = False
+_yolo_lock = threading.Lock()  # Pipeline workers may all hit the first detection at once
 
-def capture_game_window(title_keyword="Age of Empires IV "):
-    windows = gw.getWindowsWithTitle(title_keyword)
-    if not windows:
-        print("[Vision] Game window not found.")
-        return None, None
-    win = windows[0]
-    if win.isMinimized:
-        win.restore()
-    region = (win.left, win.top, win.width, win.height)
-    screenshot = pyautogui.screenshot(region=region)
-    frame = cv2.cvtColor(np.array(screenshot), cv2.COLOR_RGB2BGR)
-    return frame, region
+def get_yolo_model():
+    global yolo_model, _yolo_loaded
+    if not _yolo_loaded:
+        with _yolo_lock:
+            if not _yolo_loaded:
+                yolo_model = _load_detector(**YOLO_CONFIG)
+                _yolo_loaded = True
+    return yolo_model
 
+def set_yolo_backend(backend="torch", imgsz=640, int8=False, batch=1, **kwargs):
+    # Swaps the detector, exporting the weights for the backend if needed
+    global yolo_model, _yolo_loaded
+    YOLO_CONFIG.update(backend=backend, imgsz=imgsz, int8=int8, batch=batch, **kwargs)
+    with _yolo_lock:
+        yolo_model = _load_detector(**YOLO_CONFIG)
+        _yolo_loaded = True
+    if detection_gate is not None:
+        detection_gate.reset()
+    return yolo_model
+
+_frame_source = None
+
+def set_frame_source(source):
+    global _frame_source
+    _frame_source = source
+
+def get_frame_source():
+    global _frame_source
+    if _frame_source is None:
+        _frame_source = LiveWindowSource()
+    return _frame_source
+
+@profiled("capture")
+def capture_game_window(title_keyword="Age of Empires IV ", source=None):
+    if source is None:
+        if _frame_source is None and title_keyword != "Age of Empires IV ":
+            return LiveWindowSource(title_keyword).read()
+        source = get_frame_source()
+    return source.read()
+
+@profiled("yolo")
 def detect_objects_with_yolo(frame, target_classes=None, conf_threshold=0.25):
+    yolo_model = get_yolo_model()
     if yolo_model is None:
-        return []
-    results = yolo_model.predict(source=frame, conf=conf_threshold, verbose=False)[0]
-    detections = []
-    for box in results.boxes:
-        cls_id = int(box.cls)
-        class_name = yolo_model.names[cls_id]
-        conf = float(box.conf)
-        x1, y1, x2, y2 = map(int, box.xyxy[0])
-        if (target_classes is None) or (class_name in target_classes):
-            detections.append({"class": class_name, "box": [x1, y1, x2, y2], "conf": conf})
-    return detections
-
-def extract_ocr_number(frame, region, label_name="", expect_fraction=False):
-    x, y, w, h = region
-    crop = frame[y:y+h, x:x+w]
-    gray = cv2.cvtColor(crop, cv2.COLOR_BGR2GRAY)
-    _, thresh = cv2.threshold(gray, 180, 255, cv2.THRESH_BINARY)
-    text = pytesseract.image_to_string(thresh, config='--psm 7 -c tessedit_char_whitelist=0123456789/')
+        return Detections.empty()
+    class_ids = None
+    if target_classes is not None:
+        # Let NMS drop unwanted classes instead of filtering afterwards
+        class_ids = [i for i, name in yolo_model.names.items() if name in target_classes]
+
+    def predict(image, imgsz=None):
+        return yolo_model.predict(image, conf=conf_threshold, classes=class_ids, imgsz=imgsz)
+
+    if detection_gate is not None:
+        key = (tuple(class_ids) if class_ids is not None else None, conf_threshold)
+        detection_gate.imgsz = yolo_model.imgsz  # Crops are sized relative to the detector's input
+        return detection_gate.run(frame, predict, key=key)
+    return predict(frame)
+
+def detect_objects_batch(frames, target_classes=None, conf_threshold=0.25):
+    # One Detections per frame, inferred in batches of YOLO_CONFIG["batch"]
+    yolo_model = get_yolo_model()
+    if yolo_model is None:
+        return [Detections.empty() for _ in frames]
+    class_ids = None
+    if target_classes is not None:
+        class_ids = [i for i, name in yolo_model.names.items() if name in target_classes]
+    with profiler.span("yolo.batch"):
+        return yolo_model.predict_many(frames, conf=conf_threshold, classes=class_ids)
+
+def enable_detection_gate(**kwargs):
+    # Skip YOLO on unchanged frames / tiles; kwargs go to DetectionGate
+    global detection_gate
+    detection_gate = DetectionGate(**kwargs)
+    return detection_gate
+
+def disable_detection_gate():
+    global detection_gate
+    detection_gate = None
+
+def get_detection_gate_stats():
+    return detection_gate.stats() if detection_gate is not None else None
+
+def set_ocr_backend(backend):
+    global OCR_BACKEND
+    if backend not in ("templates", "tesseract"):
+        raise ValueError(f"Unknown OCR backend: {backend}")
+    OCR_BACKEND = backend
+
+def _resolve_ocr_backend(backend=None):
+    global _warned_no_templates
+    backend = backend or OCR_BACKEND
+    if backend == "templates" and get_recognizer() is None:
+        if not _warned_no_templates:
+            print(f"[Vision] No digit templates at {DIGIT_TEMPLATE_PATH}, falling back to Tesseract.")
+            _warned_no_templates = True
+        return "tesseract"
+    return backend
 
-    if label_name:
-        cv2.rectangle(frame, (x, y), (x + w, y + h), (255, 255, 0), 1)
-        cv2.putText(frame, label_name, (x, y - 5), cv2.FONT_HERSHEY_SIMPLEX, 0.4, (255, 255, 0), 1)
+_pytesseract = None
 
+def _get_pytesseract():
+    global _pytesseract
+    if _pytesseract is None:
+        import pytesseract
+        if TESSERACT_CMD:
+            pytesseract.pytesseract.tesseract_cmd = TESSERACT_CMD
+        _pytesseract = pytesseract
+    return _pytesseract
+
+def tesseract_read(thresh):
+    return _get_pytesseract().image_to_string(thresh, config='--psm 7 -c tessedit_char_whitelist=0123456789/')
+
+def parse_ocr_text(text, expect_fraction=False):
     if expect_fraction:
         if '/' in text:
             parts = text.strip().split('/')
@@ -84,51 +246,187 @@ def extract_ocr_number(frame, region, label_name="", expect_fraction=False):
         digits = ''.join(filter(str.isdigit, text))
         return int(digits) if digits else 0
 
+def threshold_regions(frame, regions):
+    # One grayscale + threshold pass over the bounding box of all regions,
+    # then every region is a view into that
+    x0 = min(r[0] for r in regions)
+    y0 = min(r[1] for r in regions)
+    x1 = max(r[0] + r[2] for r in regions)
+    y1 = max(r[1] + r[3] for r in regions)
+    thresh = binarize(frame[y0:y1, x0:x1])
+    return [thresh[y - y0:y - y0 + h, x - x0:x - x0 + w] for x, y, w, h in regions]
+
+def get_ocr_cache_stats():
+    return ocr_cache.stats()
+
+def extract_ocr_number(frame, region, label_name="", expect_fraction=False, backend=None):
+    with profiler.span("ocr", label_name or tuple(region)):
+        return _extract_ocr_number(frame, region, expect_fraction, backend)
+
+def _extract_ocr_number(frame, region, expect_fraction, backend):
+    x, y, w, h = region
+    thresh = binarize(frame[y:y+h, x:x+w])
+    backend = _resolve_ocr_backend(backend)
+
+    if OCR_CACHE_ENABLED:
+        roi = (backend, tuple(region))
+        key = ocr_cache.fingerprint(thresh)
+        hit, value = ocr_cache.get(roi, key)
+        if hit:
+            return value
+
+    if backend == "templates":
+        text = get_recognizer().read(thresh)
+    else:
+        text = tesseract_read(thresh)
+    value = parse_ocr_text(text, expect_fraction)
+
+    if OCR_CACHE_ENABLED:
+        ocr_cache.put(roi, key, value)
+    return value
+
+def read_hud(frame, backend=None, keys=None):
+    backend = _resolve_ocr_backend(backend)
+    hud_regions = hud_regions_for(frame)
+    if keys is not None:
+        hud_regions = [entry for entry in hud_regions if any(k in keys for k in entry[2])]
+        if not hud_regions:
+            return {}
+    threshes = threshold_regions(frame, [region for _, region, _ in hud_regions])
+
+    # Only crops that differ from every cached crop of their ROI get OCR'd
+    values = [None] * len(hud_regions)
+    fingerprints = [None] * len(hud_regions)
+    pending = []
+    for i, ((_, region, _), thresh) in enumerate(zip(hud_regions, threshes)):
+        if OCR_CACHE_ENABLED:
+            fingerprints[i] = ocr_cache.fingerprint(thresh)
+            hit, values[i] = ocr_cache.get((backend, tuple(region)), fingerprints[i])
+            if hit:
+                continue
+        pending.append(i)
+
+    if pending:
+        if backend == "templates":
+            # All changed ROIs are classified together in one batch
+            with profiler.span("ocr.templates_batch"):
+                texts = get_recognizer().read_many([threshes[i] for i in pending])
+        else:
+            texts = []
+            for i in pending:
+                with profiler.span("ocr", hud_regions[i][0]):
+                    texts.append(tesseract_read(threshes[i]))
+        for i, text in zip(pending, texts):
+            _, region, region_keys = hud_regions[i]
+            values[i] = parse_ocr_text(text, expect_fraction=len(region_keys) == 2)
+            if OCR_CACHE_ENABLED:
+                ocr_cache.put((backend, tuple(region)), fingerprints[i], values[i])
+
+    resources = {}
+    for (label_name, region, region_keys), value in zip(hud_regions, values):
+        if len(region_keys) == 2:
+            resources.update(zip(region_keys, value))
+        else:
+            resources[region_keys[0]] = value
+    return resources
+
+def show_detections(frame, detections):
+    # Hands the frame to the debug renderer, which draws on its own copy
+    # (rate-limited, off this thread); never touches `frame`
+    renderer = get_debug_renderer()
+    if renderer is not None:
+        renderer.submit(frame, detections)
 
+class LazyResources(Mapping):
+    # Resource dict whose HUD regions are only OCR'd when first read
+    def __init__(self, frame, keys=None):
+        self._frame = frame
+        self._keys = tuple(keys) if keys is not None else RESOURCE_KEYS
+        self._values = {}
 
-def extract_game_info(frame=None, show_window=False):
+    def __getitem__(self, key):
+        if key not in self._keys:
+            raise KeyError(key)
+        if key not in self._values:
+            # A fraction region fills both of its keys at once
+            self._values.update(read_hud(self._frame, keys=(key,)))
+        return self._values[key]
+
+    def __iter__(self):
+        return iter(self._keys)
+
+    def __len__(self):
+        return len(self._keys)
+
+    def __repr__(self):
+        return repr(dict(self))
+
+
+class LazyGameInfo(Mapping):
+    # Same shape as the extract_game_info dict; the detection pass runs on
+    # first access of "detections", each OCR region on first access of its
+    # key, the minimap grid (only offered when minimap=True) on first access
+    def __init__(self, frame, resources=None, classes=None, minimap=False):
+        self.frame = frame
+        self.classes = classes
+        self._resources = LazyResources(frame, resources)
+        self._detections = None
+        self._keys = ("detections", "resources", "minimap") if minimap else ("detections", "resources")
+        self._minimap = None
+
+    @property
+    def detections(self):
+        if self._detections is None:
+            self._detections = detect_objects_with_yolo(self.frame, target_classes=self.classes)
+        return self._detections
+
+    @property
+    def minimap(self):
+        if self._minimap is None:
+            with profiler.span("minimap"):
+                self._minimap = parse_minimap(self.frame)
+        return self._minimap
+
+    def __getitem__(self, key):
+        if key == "detections":
+            return self.detections
+        if key == "resources":
+            return self._resources
+        if key == "minimap" and "minimap" in self._keys:
+            return self.minimap
+        raise KeyError(key)
+
+    def __iter__(self):
+        return iter(self._keys)
+
+    def __len__(self):
+        return len(self._keys)
+
+
+def extract_game_info(frame=None, show_window=False, source=None, resources=None, classes=None, lazy=False, minimap=False):
+    # resources: resource keys to read (default all), classes: YOLO classes
+    # to keep (default all), lazy: defer all work until fields are accessed,
+    # minimap: also return the minimap occupancy grid (see minimap.py)
     if frame is None:
-        frame, _ = capture_game_window()
+        frame, _ = capture_game_window(source=source)
         if frame is None:
             print("[Vision] No frame captured.")
             return {}
 
-    detections = detect_objects_with_yolo(frame)
-    current_pop, max_pop = extract_ocr_number(frame, POPULATION_REGION, "Population", expect_fraction=True)
-    idle_count = extract_ocr_number(frame, IDLE_VILLAGER_REGION, "Idle")
-    food_count = extract_ocr_number(frame, FOOD_COUNT_REGION, "Food Count")
-    food_villagers = extract_ocr_number(frame, FOOD_VILLAGER_REGION, "Food Villagers")
-    wood_count = extract_ocr_number(frame, WOOD_COUNT_REGION, "Wood Count")
-    wood_villagers = extract_ocr_number(frame, WOOD_VILLAGER_REGION, "Wood Villagers")
-    gold_count = extract_ocr_number(frame, GOLD_COUNT_REGION, "Gold Count")
-    gold_villagers = extract_ocr_number(frame, GOLD_VILLAGER_REGION, "Gold Villagers")
-    stone_count = extract_ocr_number(frame, STONE_COUNT_REGION, "Stone Count")
-    stone_villagers = extract_ocr_number(frame, STONE_VILLAGER_REGION, "Stone Villagers")
+    if lazy:
+        return LazyGameInfo(frame, resources=resources, classes=classes, minimap=minimap)
+
+    detections = detect_objects_with_yolo(frame, target_classes=classes)
+    resources = read_hud(frame, keys=resources)
 
     if show_window and frame is not None:
-        annotated = frame.copy()
-        for obj in detections:
-            x1, y1, x2, y2 = obj["box"]
-            label = f"{obj['class']} {obj['conf']:.2f}"
-            cv2.rectangle(annotated, (x1, y1), (x2, y2), (0, 255, 0), 2)
-            cv2.putText(annotated, label, (x1, y1 - 5), cv2.FONT_HERSHEY_SIMPLEX, 0.5, (0, 255, 0), 1)
-        cv2.imshow(WINDOW_NAME, annotated)
-        cv2.waitKey(1)
-
-    return {
+        show_detections(frame, detections)
+
+    info = {
         "detections": detections,
-        "resources": {
-            "current_population": current_pop,
-            "max_population": max_pop,
-            "idle_villagers": idle_count,
-            "food": food_count,
-            "food_villagers": food_villagers,
-            "wood": wood_count,
-            "wood_villagers": wood_villagers,
-            "gold": gold_count,
-            "gold_villagers": gold_villagers,
-            "stone": stone_count,
-            "stone_villagers": stone_villagers,
-        }
+        "resources": resources,
     }
-
+    if minimap:
+        with profiler.span("minimap"):
+            info["minimap"] = parse_minimap(frame)
+    return info
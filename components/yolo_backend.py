@@ -0,0 +1,106 @@
+import os
+import time
+
+import numpy as np
+
+from .detections import Detections
+
+# ========================
+# 🧠 YOLO inference backends
+# ========================
+# The trained Ultralytics weights can run as:
+#   "torch"    -> the .pt model through PyTorch (reference)
+#   "onnx"     -> exported to ONNX, run by ONNX Runtime
+#   "openvino" -> exported to OpenVINO IR, usually the fastest on Intel CPUs
+# Exports are written next to the weights and reused on later runs. int8
+# quantizes the export: OpenVINO through Ultralytics' calibrated export (needs
+# a dataset yaml, int8_data), ONNX through ONNX Runtime's dynamic weight
+# quantization. All backends are driven through Ultralytics' predict, so
+# preprocessing, NMS and the returned Detections are identical.
+
+YOLO_BACKENDS = ("torch", "onnx", "openvino")
+
+
+def exported_path(weights, backend, imgsz=640, int8=False):
+    stem, _ = os.path.splitext(weights)
+    if backend == "torch":
+        return weights
+    if backend == "onnx":
+        return f"{stem}_{imgsz}{'_int8' if int8 else ''}.onnx"
+    if backend == "openvino":
+        return f"{stem}_{imgsz}{'_int8' if int8 else ''}_openvino_model"
+    raise ValueError(f"Unknown YOLO backend: {backend}")
+
+
+def export_model(weights, backend, imgsz=640, int8=False, int8_data=None, force=False):
+    # Returns the path of a model the backend can load, exporting it if needed
+    target = exported_path(weights, backend, imgsz, int8)
+    if backend == "torch" or (os.path.exists(target) and not force):
+        return target
+
+    from ultralytics import YOLO
+    model = YOLO(weights)
+    if backend == "onnx":
+        # Dynamic axes so one export serves every batch size
+        exported = model.export(format="onnx", imgsz=imgsz, dynamic=True, simplify=True)
+        if int8:
+            from onnxruntime.quantization import QuantType, quantize_dynamic
+            quantize_dynamic(exported, target, weight_type=QuantType.QUInt8)
+            os.remove(exported)
+        else:
+            os.replace(exported, target)
+    else:
+        kwargs = {"data": int8_data} if int8 and int8_data else {}
+        exported = model.export(format="openvino", imgsz=imgsz, int8=int8, dynamic=True, **kwargs)
+        if os.path.abspath(exported) != os.path.abspath(target):
+            if os.path.exists(target):
+                import shutil
+                shutil.rmtree(target)
+            os.replace(exported, target)
+    print(f"[Vision] Exported {weights} -> {target}")
+    return target
+
+
+class YoloDetector:
+    def __init__(self, weights, backend="torch", imgsz=640, int8=False, batch=1, device=None, warmup=1, int8_data=None):
+        if backend not in YOLO_BACKENDS:
+            raise ValueError(f"Unknown YOLO backend: {backend}")
+        from ultralytics import YOLO
+
+        self.weights = weights
+        self.backend = backend
+        self.imgsz = imgsz
+        self.int8 = int8
+        self.batch = max(1, batch)
+        self.device = device
+        self.path = export_model(weights, backend, imgsz, int8, int8_data)
+        self.model = YOLO(self.path, task="detect")
+        self.names = dict(self.model.names)  # Exports carry the class names in their metadata
+        self.warmup_time = self.warmup(warmup) if warmup else 0.0
+
+    def warmup(self, runs=1, shape=(1440, 2560, 3)):
+        # The first predict builds the graph / compiles kernels; pay for it up front
+        dummy = np.zeros(shape, dtype=np.uint8)
+        start = time.perf_counter()
+        for _ in range(runs):
+            self.predict(dummy)
+        return time.perf_counter() - start
+
+    def _run(self, images, conf, classes, imgsz=None):
+        results = self.model.predict(source=images, conf=conf, classes=classes, imgsz=imgsz or self.imgsz,
+                                     device=self.device, verbose=False)
+        return [Detections.from_yolo(r, self.names) for r in results]
+
+    def predict(self, frame, conf=0.25, classes=None, imgsz=None):
+        # imgsz overrides the input size for this call (e.g. smaller for a crop)
+        return self._run(frame, conf, classes, imgsz)[0]
+
+    def predict_many(self, frames, conf=0.25, classes=None):
+        # Batched inference over several frames, self.batch at a time
+        out = []
+        for i in range(0, len(frames), self.batch):
+            out.extend(self._run(list(frames[i:i + self.batch]), conf, classes))
+        return out
+
+    def __repr__(self):
+        return f"YoloDetector({self.backend}, imgsz={self.imgsz}, int8={self.int8}, batch={self.batch})"
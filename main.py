@@ -1,30 +1,112 @@
+import argparse
 import time
-import cv2
-from env.vision import extract_game_info, capture_game_window
+from env.vision import extract_game_info, capture_game_window, get_ocr_cache_stats, show_detections, enable_detection_gate, get_detection_gate_stats, read_hud, set_yolo_backend, set_headless, set_debug_renderer, close_debug_renderer, WINDOW_NAME
+from env.debug_renderer import DebugRenderer, DEBUG_FPS
 from env.game_state import GameState
+from env.tracker import ObjectTracker
+from env.frame_source import open_frame_source, RecordingSource
+from env.pipeline import PerceptionPipeline
+from env.profiling import profiler
 
-state = GameState()
-target_fps = 30
-frame_interval = 1 / target_fps
+parser = argparse.ArgumentParser()
+parser.add_argument("--source", default="live", help="'live', 'hud' (HUD regions only), a screenshot directory or a recorded frame archive")
+parser.add_argument("--record", default=None, help="Record every captured frame into this archive directory")
+parser.add_argument("--fps", type=float, default=30, help="Target loop rate (0 = as fast as possible)")
+parser.add_argument("--pipelined", action="store_true", help="Capture, YOLO and OCR on separate worker threads")
+parser.add_argument("--profile", default=None, help="Time every stage and write the percentiles here on exit (.json or .csv)")
+parser.add_argument("--yolo-gate", type=float, default=None, metavar="THRESHOLD",
+                    help="Reuse detections on unchanged screen tiles (mean gray-level change per tile, e.g. 6)")
+parser.add_argument("--track", action="store_true", help="Track objects across frames (stable IDs)")
+parser.add_argument("--yolo-every", type=int, default=1, help="Run YOLO every N frames, tracking in between (implies --track)")
+parser.add_argument("--yolo-backend", default="torch", choices=["torch", "onnx", "openvino"])
+parser.add_argument("--yolo-imgsz", type=int, default=640, help="YOLO input size")
+parser.add_argument("--yolo-int8", action="store_true", help="Quantize the exported model to INT8")
+parser.add_argument("--headless", action="store_true", help="Never open debug windows")
+parser.add_argument("--debug-fps", type=float, default=DEBUG_FPS, help="Max rate of the debug view (0 = every frame)")
+parser.add_argument("--debug-video", default=None, help="Also write the debug view to this video file (.mp4)")
+args = parser.parse_args()
 
-try:
+if args.profile:
+    profiler.enable()
+if args.headless:
+    set_headless()
+if args.debug_video or args.debug_fps != DEBUG_FPS:
+    set_debug_renderer(DebugRenderer(WINDOW_NAME, max_fps=args.debug_fps, video_path=args.debug_video,
+                                     show=not args.headless, hud_regions=True))
+if (args.yolo_backend, args.yolo_imgsz, args.yolo_int8) != ("torch", 640, False):
+    print(f"🧠 YOLO backend: {set_yolo_backend(args.yolo_backend, imgsz=args.yolo_imgsz, int8=args.yolo_int8)}")
+if args.yolo_gate is not None:
+    enable_detection_gate(tile_threshold=args.yolo_gate)
+
+source = open_frame_source(args.source)
+if args.record:
+    source = RecordingSource(source, args.record)
+replaying = not source.live
+
+tracking = args.track or args.yolo_every > 1
+state = GameState(tracker=ObjectTracker() if tracking else None)
+target_fps = args.fps
+frame_interval = 1 / target_fps if target_fps > 0 else 0
+
+def run_serial():
+    frame_index = 0
     while True:
         start = time.time()
 
-        frame, region = capture_game_window()
+        frame, region = capture_game_window(source=source)
         if frame is None:
+            if replaying:
+                print("🏁 Replay finished.")
+                break
             print("🛑 Could not capture game window.")
             time.sleep(1)
             continue
 
-        info = extract_game_info(frame=frame, show_window=True)
+        if frame_index % args.yolo_every == 0:
+            info = extract_game_info(frame=frame, show_window=not tracking)
+        else:
+            info = {"resources": read_hud(frame)}
+        frame_index += 1
+        if tracking:
+            info["frame"] = frame  # Lets the tracker follow camera pans
         state.update(info)
+        if tracking:
+            show_detections(frame, state.objects)
         print(state)
 
         elapsed = time.time() - start
+        profiler.record("loop", elapsed)
         wait = max(0, frame_interval - elapsed)
         time.sleep(wait)
 
+def run_pipelined():
+    # Capture paces itself at the target rate; the loop just consumes the
+    # freshest finished result
+    with PerceptionPipeline(source, capture_fps=target_fps, stop_when_exhausted=replaying, yolo_every=args.yolo_every) as pipeline:
+        for result in pipeline.results():
+            state.update(result)
+            show_detections(result["frame"], state.objects)
+            print(f"{state} | latency: {1000 * result['latency']:.0f}ms")
+        print(f"🏁 Pipeline stopped: {pipeline.stats()}")
+
+try:
+    if args.pipelined:
+        run_pipelined()
+    else:
+        run_serial()
+
 except KeyboardInterrupt:
     print("\n👋 Exiting.")
-    cv2.destroyAllWindows()
\ No newline at end of file
+finally:
+    stats = get_ocr_cache_stats()
+    print(f"🗃️ OCR cache: {stats['hits']} hits / {stats['misses']} misses ({100 * stats['hit_rate']:.1f}%)")
+    gate = get_detection_gate_stats()
+    if gate:
+        print(f"🚦 YOLO gate: {gate['reused']} reused / {gate['partial']} partial / {gate['full']} full "
+              f"(skip rate {100 * gate['skip_rate']:.1f}%, {100 * gate['relative_cost']:.1f}% of full YOLO cost)")
+    if args.profile:
+        print(profiler.format())
+        profiler.dump(args.profile)
+        print(f"⏱️ Timings written to {args.profile}")
+    source.close()
+    close_debug_renderer()
\ No newline at end of file
@@ -0,0 +1,90 @@
+import argparse
+import itertools
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from env.frame_source import open_frame_source
+from env.digit_ocr import DIGIT_TEMPLATE_PATH, DigitRecognizer, set_recognizer
+from env import vision
+from env.vision import HUD_REGIONS, hud_regions_for, read_hud, tesseract_read, threshold_regions
+
+# 🔢 Fit the in-process digit templates and compare them against Tesseract.
+#
+#   python tools/ocr_compare.py --corpus data/screenshots --fit
+#   python tools/ocr_compare.py --corpus data/screenshots
+#
+# Without a labels file, Tesseract's own reads are used as labels for fitting
+# and as the reference for the comparison.
+
+def corpus(path, limit):
+    # One pass over the first `limit` frames; the source is reopened per pass,
+    # so only the frame being read is resident
+    with open_frame_source(path) as source:
+        for frame, _ in itertools.islice(source, limit):
+            yield frame
+
+
+def fit_templates(frames, out_path):
+    crops, texts = [], []
+    for frame in frames:
+        threshes = threshold_regions(frame, [region for _, region, _ in hud_regions_for(frame)])
+        for thresh in threshes:
+            text = "".join(ch for ch in tesseract_read(thresh) if ch in "0123456789/")
+            if text:
+                crops.append(thresh)
+                texts.append(text)
+    recognizer = DigitRecognizer.fit(crops, texts)
+    recognizer.save(out_path)
+    print(f"✅ Fitted templates for '{''.join(recognizer.labels)}' from {len(crops)} crops -> {out_path}")
+    return recognizer
+
+
+def compare(frames):
+    # Time real reads, not cache hits
+    vision.OCR_CACHE_ENABLED = False
+    timings = {"tesseract": [], "templates": []}
+    matches = {keys: 0 for _, _, keys in HUD_REGIONS}
+    for frame in frames:
+        results = {}
+        for backend in timings:
+            start = time.perf_counter()
+            results[backend] = read_hud(frame, backend=backend)
+            timings[backend].append(time.perf_counter() - start)
+        for keys in matches:
+            if all(results["tesseract"][k] == results["templates"][k] for k in keys):
+                matches[keys] += 1
+
+    n = len(timings["tesseract"])
+    print(f"\n📊 {n} frames")
+    for backend, times in timings.items():
+        ms = 1000 * sum(times) / max(n, 1)
+        print(f"  {backend:<10} {ms:8.2f} ms/frame  ({1000 / ms if ms else float('inf'):.1f} FPS)")
+    print("\n🎯 Agreement with Tesseract per region")
+    for label_name, _, keys in HUD_REGIONS:
+        print(f"  {label_name:<16} {100 * matches[keys] / max(n, 1):6.1f}%")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--corpus", default="data/screenshots", help="Screenshot directory or frame archive")
+    parser.add_argument("--templates", default=DIGIT_TEMPLATE_PATH)
+    parser.add_argument("--fit", action="store_true", help="(Re)fit templates before comparing")
+    parser.add_argument("--limit", type=int, default=200)
+    args = parser.parse_args()
+
+    if next(corpus(args.corpus, args.limit), None) is None:
+        print("🛑 No frames in corpus.")
+        return
+
+    if args.fit:
+        set_recognizer(fit_templates(corpus(args.corpus, args.limit), args.templates))
+    else:
+        set_recognizer(DigitRecognizer.load(args.templates))
+    compare(corpus(args.corpus, args.limit))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,256 @@
+import argparse
+import json
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from env.debug_renderer import DebugRenderer
+from env.digit_ocr import get_recognizer
+from env.frame_source import ImageDirectorySource, open_frame_source
+from env.profiling import profiler
+from env import vision
+from env.vision import (RESOURCE_KEYS, enable_detection_gate, extract_game_info, extract_ocr_number,
+                        get_detection_gate_stats, hud_regions_for, read_hud, set_ocr_backend, set_yolo_backend)
+
+# 📏 Perception benchmark over a fixed frame corpus.
+#
+#   python tools/perception_bench.py --corpus data/screenshots --write-labels
+#   python tools/perception_bench.py --corpus data/screenshots --save-baseline
+#   python tools/perception_bench.py --corpus data/screenshots
+#
+# The labels file maps a screenshot file name (or the frame index, for
+# archives) to its true HUD values: {"aoe4_20250101_120000.png": {"food": 200,
+# "max_population": 10, ...}}. --write-labels seeds it from the current reads,
+# to be corrected by hand. Every run is compared against the baseline file
+# when it exists; a regression beyond --tolerance exits with status 1.
+#
+# FPS covers extract_game_info only. Two stages are timed outside it:
+# "annotate" draws the debug overlay of every frame synchronously (live, the
+# DebugRenderer does this on its own thread), and with the templates OCR
+# backend, which reads all HUD regions in one ocr.templates_batch call, every
+# region is also read on its own to give per-region ocr.<region> latencies.
+
+BENCH_DIR = "data/benchmarks"
+DEFAULT_LABELS = os.path.join(BENCH_DIR, "labels.json")
+DEFAULT_BASELINE = os.path.join(BENCH_DIR, "baseline.json")
+
+
+def corpus(path, limit):
+    # Yields (name, frame) for one pass over the first `limit` frames. The
+    # source is reopened every pass, so at most one decoded frame is resident.
+    # Frames are not copied: nothing on the measured path writes into them.
+    source = open_frame_source(path)
+    names = [os.path.basename(p) for p in source.paths] if isinstance(source, ImageDirectorySource) else None
+    with source:
+        for i, (frame, _) in enumerate(source):
+            if i >= limit:
+                break
+            yield (names[i] if names else str(i)), frame
+
+
+def write_labels(path, limit, out_path):
+    vision.OCR_CACHE_ENABLED = False
+    labels = {name: read_hud(frame) for name, frame in corpus(path, limit)}
+    os.makedirs(os.path.dirname(out_path) or ".", exist_ok=True)
+    with open(out_path, "w") as f:
+        json.dump(labels, f, indent=2)
+    print(f"📝 Wrote labels for {len(labels)} frames to {out_path} (check them by hand)")
+
+
+def run(path, limit, labels, repeat, warmup):
+    renderer = DebugRenderer(show=False, max_fps=0, hud_regions=True)
+    per_region = vision.OCR_BACKEND == "templates" and get_recognizer() is not None
+    for _, frame in corpus(path, min(warmup, limit)):
+        extract_game_info(frame=frame)
+    if vision.detection_gate is not None:
+        vision.detection_gate.reset()
+    profiler.reset()
+    profiler.enable()
+
+    correct = {k: 0 for k in RESOURCE_KEYS}
+    labeled = {k: 0 for k in RESOURCE_KEYS}
+    frames_exact = 0
+    frames_labeled = 0
+    total = 0.0
+    n = 0
+    for _ in range(repeat):
+        for name, frame in corpus(path, limit):
+            n += 1
+            start = time.perf_counter()
+            info = extract_game_info(frame=frame)
+            elapsed = time.perf_counter() - start
+            total += elapsed
+            profiler.record("extract_game_info", elapsed)
+
+            with profiler.span("annotate"):
+                renderer.render(frame, info["detections"])
+            if per_region:
+                for label_name, region, region_keys in hud_regions_for(frame):
+                    extract_ocr_number(frame, region, label_name, expect_fraction=len(region_keys) == 2)
+
+            truth = labels.get(name)
+            if truth is None:
+                continue
+            frames_labeled += 1
+            all_ok = True
+            for key, value in truth.items():
+                if key not in labeled:
+                    continue
+                labeled[key] += 1
+                if info["resources"].get(key) == value:
+                    correct[key] += 1
+                else:
+                    all_ok = False
+            frames_exact += all_ok
+
+    per_key = {k: correct[k] / labeled[k] for k in RESOURCE_KEYS if labeled[k]}
+    total_labeled = sum(labeled.values())
+    return {
+        "frames": n,
+        "fps": n / total if total else 0.0,
+        "stages": profiler.summary(),
+        "ocr_regions_unbatched": per_region,
+        "ocr": {
+            "exact_match": sum(correct.values()) / total_labeled if total_labeled else None,
+            "frame_exact_match": frames_exact / frames_labeled if frames_labeled else None,
+            "labeled_frames": frames_labeled,
+            "per_key": per_key,
+        },
+    }
+
+
+def report(results):
+    print(f"\n📊 {results['frames']} frames at {results['fps']:.1f} FPS (extract_game_info)")
+    print(profiler.format())
+    if results.get("ocr_regions_unbatched"):
+        print("   ocr.<region>: each region read on its own, outside the FPS; the pipeline reads them "
+              "together in ocr.templates_batch")
+    gate = results.get("yolo_gate")
+    if gate:
+        print(f"\n🚦 YOLO gate: skip rate {100 * gate['skip_rate']:.1f}%, "
+              f"{gate['partial']} partial, {gate['full']} full inferences, "
+              f"{100 * gate['relative_cost']:.1f}% of full YOLO cost")
+    ocr = results["ocr"]
+    if ocr["exact_match"] is None:
+        print("\n🎯 No labeled frames, OCR accuracy not measured")
+        return
+    print(f"\n🎯 OCR exact match: {100 * ocr['exact_match']:.1f}% of values, "
+          f"{100 * ocr['frame_exact_match']:.1f}% of frames ({ocr['labeled_frames']} labeled)")
+    for key, rate in ocr["per_key"].items():
+        print(f"  {key:<20} {100 * rate:6.1f}%")
+
+
+def compare(results, baseline, tolerance, min_delta_ms):
+    # Returns the list of regressions. fps and p50 latencies use a relative
+    # tolerance (latencies must also grow by min_delta_ms, so sub-millisecond
+    # noise is ignored); p95 is shown but not gated; accuracy may not drop.
+    regressions = []
+
+    def check(name, old, new, higher_is_better, gated=True):
+        if old is None or new is None:
+            return
+        change = (new - old) / old if old else 0.0
+        if higher_is_better:
+            worse = change < -tolerance
+        else:
+            worse = change > tolerance and new - old > min_delta_ms
+        worse = worse and gated
+        mark = "❌" if worse else "  "
+        print(f"{mark} {name:<32}{old:>10.2f}{new:>10.2f}{100 * change:>+9.1f}%")
+        if worse:
+            regressions.append(name)
+
+    print(f"\n📐 Against baseline ({baseline.get('created', '?')})")
+    print(f"   {'metric':<32}{'baseline':>10}{'now':>10}{'change':>10}")
+    check("fps", baseline["fps"], results["fps"], higher_is_better=True)
+    for name, stats in results["stages"].items():
+        old = baseline["stages"].get(name)
+        if old:
+            check(f"{name} p50_ms", old["p50_ms"], stats["p50_ms"], higher_is_better=False)
+            check(f"{name} p95_ms", old["p95_ms"], stats["p95_ms"], higher_is_better=False, gated=False)
+
+    old_acc, new_acc = baseline["ocr"]["exact_match"], results["ocr"]["exact_match"]
+    if old_acc is not None and new_acc is not None:
+        print(f"   {'ocr exact_match':<32}{100 * old_acc:>9.1f}%{100 * new_acc:>9.1f}%")
+        if new_acc < old_acc:
+            regressions.append("ocr exact_match")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--corpus", default="data/screenshots", help="Screenshot directory or frame archive")
+    parser.add_argument("--labels", default=DEFAULT_LABELS)
+    parser.add_argument("--baseline", default=DEFAULT_BASELINE)
+    parser.add_argument("--ocr-backend", default=None, choices=["templates", "tesseract"])
+    parser.add_argument("--limit", type=int, default=200)
+    parser.add_argument("--repeat", type=int, default=1)
+    parser.add_argument("--warmup", type=int, default=3, help="Frames run before timing starts (model load, first predict)")
+    parser.add_argument("--cache", action="store_true", help="Keep the OCR cache on (default: every frame is really read)")
+    parser.add_argument("--tolerance", type=float, default=0.1, help="Allowed relative slowdown before it counts as a regression")
+    parser.add_argument("--min-delta-ms", type=float, default=0.5, help="Smallest p50 slowdown that counts as a regression")
+    parser.add_argument("--yolo-backend", default=None, choices=["torch", "onnx", "openvino"])
+    parser.add_argument("--yolo-imgsz", type=int, default=640)
+    parser.add_argument("--yolo-int8", action="store_true")
+    parser.add_argument("--yolo-gate", type=float, default=None, metavar="THRESHOLD", help="Benchmark with the YOLO frame-difference gate on")
+    parser.add_argument("--write-labels", action="store_true", help="Seed the labels file from the current reads and exit")
+    parser.add_argument("--save-baseline", action="store_true")
+    parser.add_argument("--out", default=None, help="Also write this run's results here")
+    args = parser.parse_args()
+
+    if next(corpus(args.corpus, args.limit), None) is None:
+        print("🛑 No frames in corpus.")
+        return 1
+    if args.ocr_backend:
+        set_ocr_backend(args.ocr_backend)
+    if args.write_labels:
+        write_labels(args.corpus, args.limit, args.labels)
+        return 0
+
+    labels = {}
+    if os.path.exists(args.labels):
+        with open(args.labels) as f:
+            labels = json.load(f)
+    vision.OCR_CACHE_ENABLED = args.cache
+    if args.yolo_backend:
+        set_yolo_backend(args.yolo_backend, imgsz=args.yolo_imgsz, int8=args.yolo_int8)
+    if args.yolo_gate is not None:
+        enable_detection_gate(tile_threshold=args.yolo_gate)
+
+    results = run(args.corpus, args.limit, labels, args.repeat, args.warmup)
+    results.update({
+        "created": time.strftime("%Y-%m-%d %H:%M:%S"),
+        "corpus": args.corpus,
+        "ocr_backend": args.ocr_backend or vision.OCR_BACKEND,
+        "yolo_loaded": vision.get_yolo_model() is not None,
+        "yolo": repr(vision.get_yolo_model()),
+        "yolo_gate": get_detection_gate_stats(),
+    })
+    report(results)
+
+    if args.out:
+        with open(args.out, "w") as f:
+            json.dump(results, f, indent=2)
+
+    if args.save_baseline:
+        os.makedirs(os.path.dirname(args.baseline) or ".", exist_ok=True)
+        with open(args.baseline, "w") as f:
+            json.dump(results, f, indent=2)
+        print(f"\n💾 Baseline saved to {args.baseline}")
+        return 0
+
+    if os.path.exists(args.baseline):
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        regressions = compare(results, baseline, args.tolerance, args.min_delta_ms)
+        if regressions:
+            print(f"\n🚨 {len(regressions)} regression(s): {', '.join(regressions)}")
+            return 1
+        print("\n✅ No regressions")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
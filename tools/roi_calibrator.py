@@ -1,25 +1,79 @@
+import argparse
+import os
+import sys
+
 import cv2
-import pyautogui
 import numpy as np
 
-def main():
-    print("🖱️ Select the ROI for your target region (e.g. resources or villager counts).")
-    print("🔒 Press ENTER or SPACE when done, ESC to cancel.")
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from env.roi_profile import DEFAULT_REGIONS, ROI_PROFILE_PATH, ROIProfile, get_roi_profile
 
+# 📐 Measure ROIs on a screenshot and export them as a layout profile.
+#
+#   python tools/roi_calibrator.py                      # pick one ROI, print it
+#   python tools/roi_calibrator.py --all                # re-measure every region, save the profile
+#   python tools/roi_calibrator.py --region Minimap     # re-measure just the minimap
+#
+# The profile stores the screenshot's resolution, and vision scales it to
+# whatever window size it is later used with.
+
+def grab(image_path=None):
+    if image_path:
+        return cv2.imread(image_path, cv2.IMREAD_COLOR)
     # Take full screenshot (or you could capture the game window here instead)
-    screenshot = pyautogui.screenshot()
-    frame = cv2.cvtColor(np.array(screenshot), cv2.COLOR_RGB2BGR)
+    import pyautogui
+    return cv2.cvtColor(np.array(pyautogui.screenshot()), cv2.COLOR_RGB2BGR)
+
+
+def select(frame, title, current=None):
+    preview = frame.copy()
+    if current is not None:
+        x, y, w, h = current
+        cv2.rectangle(preview, (x, y), (x + w, y + h), (0, 255, 255), 1)  # Current guess, for reference
+    roi = cv2.selectROI(title, preview, fromCenter=False, showCrosshair=True)
+    cv2.destroyWindow(title)
+    return tuple(int(v) for v in roi) if roi and roi[2] > 0 and roi[3] > 0 else None
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--image", default=None, help="Calibrate on a saved screenshot instead of the screen")
+    parser.add_argument("--region", action="append", default=[], choices=list(DEFAULT_REGIONS), help="Region(s) to (re)measure")
+    parser.add_argument("--all", action="store_true", help="Measure every region in turn")
+    parser.add_argument("--out", default=ROI_PROFILE_PATH)
+    args = parser.parse_args()
+
+    frame = grab(args.image)
+    if frame is None:
+        print("🛑 Could not read the screenshot.")
+        return
+    height, width = frame.shape[:2]
+
+    names = list(DEFAULT_REGIONS) if args.all else args.region
+    if not names:
+        print("🖱️ Select the ROI for your target region (e.g. resources or villager counts).")
+        print("🔒 Press ENTER or SPACE when done, ESC to cancel.")
+        roi = select(frame, "Select ROI")
+        if roi:
+            x, y, w, h = roi
+            print(f"\n📏 Selected ROI: (x={x}, y={y}, width={w}, height={h})")
+            print(f"👉 Use this in your code as: ({x}, {y}, {w}, {h})")
+        return
 
-    # Select ROI
-    roi = cv2.selectROI("Select ROI", frame, fromCenter=False, showCrosshair=True)
+    # Start from the current profile at this resolution, so unmeasured regions keep their place
+    regions = dict(get_roi_profile().scaled(width, height).regions)
+    for name in names:
+        print(f"🖱️ Select '{name}' (ENTER/SPACE to confirm, ESC to keep the current one)")
+        roi = select(frame, f"Select {name}", regions.get(name))
+        if roi:
+            regions[name] = roi
+            print(f"📏 {name}: {roi}")
 
-    # Clean up
-    cv2.destroyWindow("Select ROI")
+    profile = ROIProfile(regions, (width, height))
+    profile.save(args.out)
+    print(f"💾 Saved ROI profile for {width}x{height} to {args.out}")
 
-    if roi:
-        x, y, w, h = roi
-        print(f"\n📏 Selected ROI: (x={x}, y={y}, width={w}, height={h})")
-        print(f"👉 Use this in your code as: ({x}, {y}, {w}, {h})")
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
@@ -1,63 +1,181 @@
-import pyautogui
-import keyboard
+import argparse
 import datetime
 import os
-import csv
+import queue
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
 
-# Folders
-FULL_IMG_DIR = "./data/screenshots"
-MINIMAP_DIR = "./data/minimap"
-LOG_FILE = "./data/screenshot_log.csv"
+import cv2
+import numpy as np
 
-os.makedirs(FULL_IMG_DIR, exist_ok=True)
-os.makedirs(MINIMAP_DIR, exist_ok=True)
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
-# Game UI constants (you can tune these)
-MINIMAP_OFFSET = (1974, 810, 585, 606) 
+from env.frame_source import ShardedArchiveWriter, encode_frame
+from env.roi_profile import get_roi_profile
 
-AUTO_CAPTURE_INTERVAL = 3.0 # Set to >0 for automatic screenshots every X seconds
+# 📸 Dataset capture service.
+#
+#   python tools/screenshot_hotkey.py                       # SPACE + auto every 3s
+#   python tools/screenshot_hotkey.py --interval 0.5 --codec jpg --minimap
+#
+# Captures go into a compressed shard archive per session (readable by
+# open_frame_source / ShardReplaySource) instead of loose PNGs. The hotkey
+# only sets an event, the main thread sleeps until that event or the next
+# auto-capture is due, encoding runs on a worker pool and a single writer
+# thread appends the results in capture order. Frames nearly identical to
+# the last saved one are dropped.
 
-print("🎯 Screenshot Tool Active")
-print("🕹️  Press [SPACE] to capture")
-print("⏱️  Auto-capture:", "OFF" if AUTO_CAPTURE_INTERVAL == 0 else f"every {AUTO_CAPTURE_INTERVAL}s")
+CAPTURE_DIR = "./data/captures"
 
-def save_screenshot():
-    timestamp = datetime.datetime.now().strftime("%Y%m%d_%H%M%S")
-    base_filename = f"aoe4_{timestamp}"
+AUTO_CAPTURE_INTERVAL = 3.0  # Set to >0 for automatic screenshots every X seconds
 
-    # Fullscreen
-    img = pyautogui.screenshot()
-    full_path = os.path.join(FULL_IMG_DIR, f"{base_filename}.png")
-    img.save(full_path)
 
-    # Minimap crop
-    x, y, w, h = MINIMAP_OFFSET
-    minimap = img.crop((x, y, x + w, y + h))
-    minimap_path = os.path.join(MINIMAP_DIR, f"{base_filename}_minimap.png")
-    minimap.save(minimap_path)
+class CaptureService:
+    def __init__(self, directory, interval=AUTO_CAPTURE_INTERVAL, key="space", codec="png", param=None,
+                 shard_size=256, workers=2, dedup_threshold=1.5, minimap=False):
+        self.interval = interval
+        self.key = key
+        self.codec = codec
+        self.param = param
+        self.dedup_threshold = dedup_threshold  # Mean gray-level change on a thumbnail; 0 keeps everything
+        meta = {"created": datetime.datetime.now().isoformat(timespec="seconds")}
+        self.archive = ShardedArchiveWriter(directory, shard_size=shard_size, codec=codec, param=param, meta=meta)
+        self.minimap_archive = None
+        if minimap:
+            self.minimap_archive = ShardedArchiveWriter(os.path.join(directory, "minimap"), shard_size=shard_size,
+                                                        codec=codec, param=param, meta=meta)
 
-    # Log
-    with open(LOG_FILE, mode='a', newline='') as f:
-        writer = csv.writer(f)
-        writer.writerow([timestamp, full_path, minimap_path])
+        self._trigger = threading.Event()
+        self._stop = threading.Event()
+        self._key_held = False
+        self._pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="encode")
+        self._pending = queue.Queue(maxsize=4 * workers)  # Bounds memory if encoding falls behind
+        self._writer = threading.Thread(target=self._write_loop, name="writer", daemon=True)
+        self._last_thumb = None
+        self.captured = 0
+        self.duplicates = 0
 
-    print(f"✅ Screenshot saved: {base_filename}")
+    # ---- trigger ----
 
-# Optional: time-based auto-capture
-last_capture = datetime.datetime.now()
+    def _on_key_down(self, _event):
+        # Held keys auto-repeat; only the first press counts
+        if not self._key_held:
+            self._key_held = True
+            self._trigger.set()
 
-try:
-    while True:
-        now = datetime.datetime.now()
+    def _on_key_up(self, _event):
+        self._key_held = False
 
-        if keyboard.is_pressed("space"):
-            save_screenshot()
-            while keyboard.is_pressed("space"):
-                pass  # avoid rapid spam
+    # ---- capture ----
 
-        elif AUTO_CAPTURE_INTERVAL > 0 and (now - last_capture).total_seconds() > AUTO_CAPTURE_INTERVAL:
-            save_screenshot()
-            last_capture = now
+    def _grab(self):
+        import pyautogui
+        return cv2.cvtColor(np.asarray(pyautogui.screenshot()), cv2.COLOR_RGB2BGR)
 
-except KeyboardInterrupt:
-    print("\n💀 Interrupted. Exiting.")
+    def _is_duplicate(self, frame):
+        thumb = cv2.resize(cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY), (64, 36), interpolation=cv2.INTER_AREA).astype(np.int16)
+        previous = self._last_thumb
+        if previous is not None and self.dedup_threshold > 0 and np.abs(thumb - previous).mean() < self.dedup_threshold:
+            return True
+        self._last_thumb = thumb
+        return False
+
+    def capture(self, manual=False):
+        timestamp = time.time()
+        frame = self._grab()
+        # Manual captures are deliberate, so only auto-captures are deduplicated
+        if not manual and self._is_duplicate(frame):
+            self.duplicates += 1
+            return
+        if manual:
+            self._is_duplicate(frame)  # Still becomes the reference for the next auto-capture
+        jobs = [(self.archive, self._pool.submit(encode_frame, frame, self.codec, self.param), frame.shape)]
+        if self.minimap_archive is not None:
+            # Minimap rectangle from the ROI profile, scaled to the screen size
+            minimap = get_roi_profile().for_frame(frame).crop(frame, "Minimap")
+            jobs.append((self.minimap_archive, self._pool.submit(encode_frame, minimap, self.codec, self.param), minimap.shape))
+        self._pending.put((timestamp, jobs))
+        self.captured += 1
+        print(f"✅ Captured frame {self.captured}{' (manual)' if manual else ''}")
+
+    def _write_loop(self):
+        # Appends in capture order; encoding itself happens on the pool
+        while True:
+            item = self._pending.get()
+            if item is None:
+                return
+            timestamp, jobs = item
+            for archive, future, shape in jobs:
+                archive.write_encoded(future.result(), shape, timestamp)
+            if len(self.archive) % 32 == 0:
+                self.archive.flush_index()
+
+    # ---- lifecycle ----
+
+    def run(self):
+        import keyboard
+        keyboard.on_press_key(self.key, self._on_key_down)
+        keyboard.on_release_key(self.key, self._on_key_up)
+        self._writer.start()
+
+        next_auto = time.time() + self.interval if self.interval > 0 else None
+        try:
+            while not self._stop.is_set():
+                timeout = None if next_auto is None else max(0.0, next_auto - time.time())
+                # Short waits keep Ctrl+C responsive on Windows
+                if self._trigger.wait(timeout=min(timeout, 0.5) if timeout is not None else 0.5):
+                    self._trigger.clear()
+                    self.capture(manual=True)
+                elif next_auto is not None and time.time() >= next_auto:
+                    self.capture()
+                    next_auto += self.interval
+                    if next_auto < time.time():  # Fell behind; don't burst to catch up
+                        next_auto = time.time() + self.interval
+        finally:
+            keyboard.unhook_all()
+            self.close()
+
+    def stop(self):
+        self._stop.set()
+
+    def close(self):
+        self._pending.put(None)
+        self._writer.join()
+        self._pool.shutdown(wait=True)
+        self.archive.close()
+        if self.minimap_archive is not None:
+            self.minimap_archive.close()
+        print(f"💾 {len(self.archive)} frames in {self.archive.directory} ({self.duplicates} near-duplicates skipped)")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--out", default=None, help="Archive directory (default: a new session under data/captures)")
+    parser.add_argument("--interval", type=float, default=AUTO_CAPTURE_INTERVAL, help="Auto-capture period in seconds (0 = hotkey only)")
+    parser.add_argument("--key", default="space")
+    parser.add_argument("--codec", default="png", choices=["png", "jpg"])
+    parser.add_argument("--param", type=int, default=None, help="PNG compression level (0-9) or JPEG quality (0-100)")
+    parser.add_argument("--shard-size", type=int, default=256, help="Frames per shard file")
+    parser.add_argument("--workers", type=int, default=2, help="Encoder threads")
+    parser.add_argument("--dedup-threshold", type=float, default=1.5, help="Skip auto-captures this close to the last saved frame (0 = off)")
+    parser.add_argument("--minimap", action="store_true", help="Also archive the minimap crop")
+    args = parser.parse_args()
+
+    out = args.out or os.path.join(CAPTURE_DIR, datetime.datetime.now().strftime("session_%Y%m%d_%H%M%S"))
+    service = CaptureService(out, interval=args.interval, key=args.key, codec=args.codec, param=args.param,
+                             shard_size=args.shard_size, workers=args.workers,
+                             dedup_threshold=args.dedup_threshold, minimap=args.minimap)
+
+    print("🎯 Screenshot Tool Active")
+    print(f"🕹️  Press [{args.key.upper()}] to capture, Ctrl+C to stop")
+    print("⏱️  Auto-capture:", "OFF" if args.interval <= 0 else f"every {args.interval}s")
+    try:
+        service.run()
+    except KeyboardInterrupt:
+        print("\n💀 Interrupted. Exiting.")
+
+
+if __name__ == "__main__":
+    main()
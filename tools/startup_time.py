@@ -0,0 +1,71 @@
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# ⏱️ Startup cost of the components package.
+#
+#   python tools/startup_time.py
+#   python tools/startup_time.py --runs 5 --out startup.json
+#
+# Every case runs in a fresh interpreter (nothing cached in-process), so the
+# numbers are what a tool, test or env worker pays before doing real work.
+# Run it on two commits to compare.
+
+SETUP = (
+    "import sys, time\n"
+    f"sys.path.insert(0, {ROOT!r})\n"
+    "import numpy as np\n"
+    "frame = np.zeros((1440, 2560, 3), dtype=np.uint8)\n"
+    "start = time.perf_counter()\n"
+)
+
+CASES = {
+    "import env": "import env\n",
+    "import env.vision": "import env.vision\n",
+    "import env.aoe_env": "import env.aoe_env\n",
+    "import + first HUD read": "from env.vision import read_hud\nread_hud(frame)\n",
+    "import + first detection": "from env.vision import detect_objects_with_yolo\ndetect_objects_with_yolo(frame)\n",
+}
+
+
+def measure(code):
+    script = SETUP + code + "print(time.perf_counter() - start)\n"
+    result = subprocess.run([sys.executable, "-c", script], cwd=ROOT, capture_output=True, text=True)
+    if result.returncode != 0:
+        raise RuntimeError(result.stderr.strip().splitlines()[-1] if result.stderr.strip() else "failed")
+    return float(result.stdout.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--runs", type=int, default=3, help="Fresh interpreters per case; the median is reported")
+    parser.add_argument("--headless", action="store_true", help="Set AOE4_HEADLESS for the measured processes")
+    parser.add_argument("--out", default=None, help="Write the results as JSON")
+    args = parser.parse_args()
+
+    if args.headless:
+        os.environ["AOE4_HEADLESS"] = "1"
+
+    results = {}
+    print(f"{'case':<28}{'median s':>10}{'min s':>10}")
+    for name, code in CASES.items():
+        try:
+            times = [measure(code) for _ in range(args.runs)]
+        except RuntimeError as e:
+            print(f"{name:<28}  ⚠️ {e}")
+            continue
+        results[name] = {"median_s": statistics.median(times), "min_s": min(times), "runs": times}
+        print(f"{name:<28}{results[name]['median_s']:>10.3f}{results[name]['min_s']:>10.3f}")
+
+    if args.out:
+        with open(args.out, "w") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
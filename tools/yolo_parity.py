@@ -0,0 +1,115 @@
+import argparse
+import json
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from env.frame_source import open_frame_source
+from env.tracker import iou_matrix
+from env.vision import YOLO_MODEL_PATH
+from env.yolo_backend import YoloDetector
+
+# ⚖️ Speed and accuracy cost of each YOLO inference backend.
+#
+#   python tools/yolo_parity.py --corpus data/screenshots
+#   python tools/yolo_parity.py --corpus data/screenshots --configs torch onnx onnx:int8 openvino openvino:int8 --imgsz 640 480
+#
+# The PyTorch model at the reference size is the ground truth. A box from
+# another config counts as matched when it has the same class and IoU >= 0.5
+# with a reference box. Recall is the share of reference boxes it found and
+# precision is the share of its own boxes that were matched.
+
+def match(reference, candidate, iou_threshold=0.5):
+    # Greedy same-class matching -> (matched pairs, mean IoU of the pairs)
+    iou = iou_matrix(reference.boxes.astype(np.float64), candidate.boxes.astype(np.float64))
+    iou[reference.class_ids[:, None] != candidate.class_ids[None, :]] = 0
+    pairs = []
+    while iou.size and iou.max() >= iou_threshold:
+        r, c = np.unravel_index(iou.argmax(), iou.shape)
+        pairs.append(iou[r, c])
+        iou[r, :] = 0
+        iou[:, c] = 0
+    return len(pairs), float(np.mean(pairs)) if pairs else 0.0
+
+
+def evaluate(detector, frames, reference, repeat):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        results = detector.predict_many(frames)
+    per_frame = (time.perf_counter() - start) / (repeat * len(frames))
+
+    matched = ref_total = cand_total = 0
+    ious = []
+    for ref, cand in zip(reference, results):
+        n, mean_iou = match(ref, cand)
+        matched += n
+        ref_total += len(ref)
+        cand_total += len(cand)
+        if n:
+            ious.append(mean_iou)
+    return {
+        "ms_per_frame": 1000 * per_frame,
+        "fps": 1 / per_frame if per_frame else 0.0,
+        "recall": matched / ref_total if ref_total else 1.0,
+        "precision": matched / cand_total if cand_total else 1.0,
+        "mean_iou": float(np.mean(ious)) if ious else 0.0,
+        "boxes": cand_total,
+        "warmup_s": detector.warmup_time,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--corpus", default="data/screenshots", help="Screenshot directory or frame archive")
+    parser.add_argument("--weights", default=YOLO_MODEL_PATH)
+    parser.add_argument("--configs", nargs="+", default=["torch", "onnx", "openvino"], help="backend or backend:int8")
+    parser.add_argument("--imgsz", type=int, nargs="+", default=[640])
+    parser.add_argument("--batch", type=int, default=1)
+    parser.add_argument("--int8-data", default=None, help="Dataset yaml for OpenVINO INT8 calibration")
+    parser.add_argument("--limit", type=int, default=50)
+    parser.add_argument("--repeat", type=int, default=1)
+    parser.add_argument("--out", default=None, help="Write the results as JSON")
+    args = parser.parse_args()
+
+    frames = []
+    for frame, _ in open_frame_source(args.corpus):
+        frames.append(frame)
+        if len(frames) >= args.limit:
+            break
+    if not frames:
+        print("🛑 No frames in corpus.")
+        return
+
+    reference_detector = YoloDetector(args.weights, backend="torch", imgsz=args.imgsz[0])
+    reference = reference_detector.predict_many(frames)
+
+    results = {}
+    for imgsz in args.imgsz:
+        for config in args.configs:
+            backend, _, option = config.partition(":")
+            name = f"{config}@{imgsz}"
+            try:
+                detector = YoloDetector(args.weights, backend=backend, imgsz=imgsz, int8=option == "int8",
+                                        batch=args.batch, int8_data=args.int8_data)
+            except Exception as e:
+                print(f"⚠️ {name}: {e}")
+                continue
+            results[name] = evaluate(detector, frames, reference, args.repeat)
+
+    print(f"\n📊 {len(frames)} frames, reference torch@{args.imgsz[0]} ({sum(len(r) for r in reference)} boxes)")
+    print(f"{'config':<22}{'ms/frame':>10}{'fps':>8}{'recall':>9}{'precision':>11}{'IoU':>7}{'warm-up s':>11}")
+    for name, r in results.items():
+        print(f"{name:<22}{r['ms_per_frame']:>10.1f}{r['fps']:>8.1f}{100 * r['recall']:>8.1f}%"
+              f"{100 * r['precision']:>10.1f}%{r['mean_iou']:>7.3f}{r['warmup_s']:>11.2f}")
+
+    if args.out:
+        with open(args.out, "w") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,29 +1,166 @@
-import cv2
+import argparse
+import multiprocessing
+import torch
 from stable_baselines3 import PPO
-from stable_baselines3.common.env_util import make_vec_env
-from stable_baselines3.common.vec_env import VecTransposeImage, DummyVecEnv
+from stable_baselines3.common.vec_env import VecTransposeImage, DummyVecEnv, SubprocVecEnv
 from env.aoe_env import AOEEnv
+from env.backends import ReplayBackend
+from env.frame_source import open_frame_source
+from env.profiling import profiler, make_sb3_callback
+from env import vision
+from env.yolo_backend import export_model
+from env.simulation import SimulatedGameBackend
+from env.tracker import ObjectTracker
+from env.trajectory import TrajectoryDataset, TrajectoryRecorder, session_directory
 
-# 🧠 Step 1: Wrap in DummyVecEnv manually
-env = DummyVecEnv([lambda: AOEEnv()])
-
-# 🧠 Step 2: THEN apply VecTransposeImage
-env = VecTransposeImage(env)
-
-# 🚀 Step 3: Train the model
-model = PPO(
-    "CnnPolicy",
-    env,
-    verbose=1,
-    tensorboard_log="./logs",
-    learning_rate=2.5e-4,
-    n_steps=128,
-    batch_size=64,
-    n_epochs=4,
-    gamma=0.99,
-    gae_lambda=0.95,
-    clip_range=0.2
-)
-
-model.learn(total_timesteps=100_000)
-model.save("models/rl_aoe_agent")
+
+def make_env(rank, backend="live", frames=None, render=True, num_envs=1, seed=0, obs_kwargs=None, profile=False,
+             yolo_config=None, record=None, track=False):
+    # Builds the env inside the worker process, so nothing unpicklable
+    # (windows, memory maps, models) crosses the process boundary
+    obs_kwargs = obs_kwargs or {}
+
+    def _init():
+        env = _make()
+        if record:
+            # Every step this worker plays is kept for offline pretraining
+            env = TrajectoryRecorder(env, session_directory(record, rank))
+        return env
+
+    def _make():
+        if profile:
+            profiler.enable()  # Each worker process has its own profiler
+        if yolo_config and backend != "sim":
+            vision.set_yolo_backend(**yolo_config)
+        env_kwargs = dict(obs_kwargs, tracker=ObjectTracker() if track else None)
+        if backend == "live":
+            return AOEEnv(render=render, **env_kwargs)
+        if backend == "replay":
+            source = open_frame_source(frames)
+            # Spread workers over the recording so they don't see identical frames
+            skip = rank * len(source) // num_envs if hasattr(source, "__len__") else 0
+            return AOEEnv(backend=ReplayBackend(source, skip=skip), render=render, **env_kwargs)
+        if backend == "sim":
+            # Render the simulation straight at observation size
+            width, height = obs_kwargs.get("obs_size", (1280, 720))
+            sim = SimulatedGameBackend(seed=seed + rank, frame_size=(height, width))
+            return AOEEnv(backend=sim, render=render, **env_kwargs)
+        raise ValueError(f"Unknown backend: {backend}")
+    return _init
+
+
+def pretrain(model, dataset, epochs=1, batch_size=256, value_coef=0.5):
+    # Behavior cloning on recorded steps: maximize the policy's log-likelihood
+    # of the recorded actions and regress the value head on the discounted
+    # returns, using PPO's own optimizer
+    policy = model.policy
+    policy.set_training_mode(True)
+    for epoch in range(epochs):
+        losses = []
+        for batch in dataset.batches(batch_size, seed=epoch, gamma=model.gamma):
+            obs, _ = policy.obs_to_tensor(batch["obs"])
+            actions = torch.as_tensor(batch["action"], device=model.device)
+            returns = torch.as_tensor(batch["return"], device=model.device)
+            values, log_prob, _ = policy.evaluate_actions(obs, actions)
+            loss = -log_prob.mean() + value_coef * torch.nn.functional.mse_loss(values.flatten(), returns)
+            policy.optimizer.zero_grad()
+            loss.backward()
+            torch.nn.utils.clip_grad_norm_(policy.parameters(), model.max_grad_norm)
+            policy.optimizer.step()
+            losses.append(loss.item())
+        print(f"📚 Pretrain epoch {epoch + 1}/{epochs}: loss {sum(losses) / max(1, len(losses)):.4f} over {len(dataset)} steps")
+    policy.set_training_mode(False)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--backend", default="live", choices=["live", "replay", "sim"])
+    parser.add_argument("--frames", default=None, help="Frame archive or screenshot directory for --backend replay")
+    parser.add_argument("--num-envs", type=int, default=1, help="Parallel envs, one subprocess each when > 1")
+    parser.add_argument("--timesteps", type=int, default=100_000)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--obs-mode", default="image", choices=["image", "structured"])
+    parser.add_argument("--obs-width", type=int, default=1280)
+    parser.add_argument("--obs-height", type=int, default=720)
+    parser.add_argument("--grayscale", action="store_true")
+    parser.add_argument("--frame-stack", type=int, default=1)
+    parser.add_argument("--obs-minimap", action="store_true", help="Add the minimap occupancy grid (structured mode)")
+    parser.add_argument("--action-mode", default="full", choices=["full", "grid", "compact", "object"])
+    parser.add_argument("--action-grid", type=int, nargs=2, default=None, metavar=("COLS", "ROWS"),
+                        help="Grid for --action-mode grid/compact, offsets around the anchor for object")
+    parser.add_argument("--track", action="store_true", help="Track objects across steps (macros keep using the same units)")
+    parser.add_argument("--yolo-backend", default="torch", choices=["torch", "onnx", "openvino"])
+    parser.add_argument("--yolo-imgsz", type=int, default=640)
+    parser.add_argument("--yolo-int8", action="store_true")
+    parser.add_argument("--profile", action="store_true", help="Log per-stage timing percentiles to TensorBoard and ./logs/timing.json")
+    parser.add_argument("--record", default=None, help="Record every step to trajectory files under this directory")
+    parser.add_argument("--pretrain", default=None, help="Behavior-clone the policy on recordings under this directory first")
+    parser.add_argument("--pretrain-epochs", type=int, default=1)
+    parser.add_argument("--pretrain-batch-size", type=int, default=256)
+    args = parser.parse_args()
+
+    if args.backend == "live" and args.num_envs > 1:
+        parser.error("There is only one live game window; use --num-envs 1 with --backend live")
+    if args.backend == "replay" and not args.frames:
+        parser.error("--backend replay needs --frames (a frame archive or screenshot directory)")
+
+    # 🧠 Step 1: Build the vectorized env (debug display only for a single live env)
+    render = args.num_envs == 1 and args.backend == "live"
+    obs_kwargs = {
+        "obs_mode": args.obs_mode,
+        "obs_size": (args.obs_width, args.obs_height),
+        "grayscale": args.grayscale,
+        "frame_stack": args.frame_stack,
+        "obs_minimap": args.obs_minimap,
+        "action_mode": args.action_mode,
+        "action_grid": args.action_grid,
+    }
+    yolo_config = None
+    if (args.yolo_backend, args.yolo_imgsz, args.yolo_int8) != ("torch", 640, False):
+        yolo_config = {"backend": args.yolo_backend, "imgsz": args.yolo_imgsz, "int8": args.yolo_int8}
+        # Export once here rather than racing to do it in every worker
+        export_model(vision.YOLO_MODEL_PATH, args.yolo_backend, args.yolo_imgsz, args.yolo_int8)
+    env_fns = [make_env(rank, args.backend, args.frames, render, args.num_envs, args.seed, obs_kwargs, args.profile, yolo_config,
+                        args.record, args.track)
+               for rank in range(args.num_envs)]
+    if args.num_envs > 1:
+        start_method = "forkserver" if "forkserver" in multiprocessing.get_all_start_methods() else "spawn"
+        env = SubprocVecEnv(env_fns, start_method=start_method)
+    else:
+        env = DummyVecEnv(env_fns)
+
+    # 🧠 Step 2: THEN apply VecTransposeImage
+    env = VecTransposeImage(env)
+
+    # 🚀 Step 3: Train the model
+    model = PPO(
+        "MultiInputPolicy" if args.obs_mode == "structured" else "CnnPolicy",
+        env,
+        verbose=1,
+        tensorboard_log="./logs",
+        learning_rate=2.5e-4,
+        n_steps=128,
+        batch_size=64,
+        n_epochs=4,
+        gamma=0.99,
+        gae_lambda=0.95,
+        clip_range=0.2
+    )
+
+    if args.pretrain:
+        dataset = TrajectoryDataset(args.pretrain)
+        print(f"📚 {len(dataset)} recorded steps in {dataset.episodes} episodes from {len(dataset.recordings)} recordings")
+        pretrain(model, dataset, args.pretrain_epochs, args.pretrain_batch_size)
+
+    callback = None
+    if args.profile:
+        profiler.enable()
+        callback = make_sb3_callback()
+
+    model.learn(total_timesteps=args.timesteps, callback=callback)
+    model.save("models/rl_aoe_agent")
+    if args.profile:
+        summary = env.env_method("profile_summary", indices=[0])[0]
+        summary.update(profiler.summary())
+        profiler.dump("./logs/timing.json", summary)
+    env.close()